@@ -15,6 +15,14 @@ class TaskStatus(models.IntegerChoices):
     CANCELED = 9, 'CANCELED'
 
 
+# Precedence of the statuses in the status history of an execution, the current status being the one of the highest
+# precedence. Statuses follow their order, except for UNKNOWN, which is logged once an execution is lost and thus
+# supersedes the statuses of a dispatched execution, but not its final statuses
+STATUS_PRECEDENCE = {status: 2 * status.value for status in TaskStatus} | {
+    TaskStatus.UNKNOWN: 2 * TaskStatus.RUNNING + 1
+}
+
+
 class MountPointTypes(models.TextChoices):
     FILE = 'FILE', 'FILE'
     DIRECTORY = 'DIRECTORY', 'DIRECTORY'
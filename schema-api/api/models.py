@@ -8,6 +8,7 @@ from api.constants import MountPointTypes, TaskStatus
 from util.constraints import ApplicationUniqueConstraint
 from util.decorators import update_fields
 from util.defaults import get_current_datetime
+from util.fields import CompressedTextField
 
 
 @update_fields()
@@ -72,8 +73,8 @@ class Task(models.Model):
     description = models.TextField(help_text='User-provided description')
     pending = models.BooleanField(
         default=True,
-        help_text='A boolean field that indicates whether a task is still running; completed tasks won\'t poll the '
-                  'underlying TESK API for the task status'
+        help_text='Whether the task still holds the resources that it requested; cleared once the task terminates, '
+                  'when it is released from the quotas ledgers'
     )
 
     submitted_at = models.DateTimeField(
@@ -84,6 +85,33 @@ class Task(models.Model):
     # To be moved
     latest_update = models.DateTimeField(null=True)
 
+    # Denormalized latest entry of the status history, maintained by TaskStatusLogService.log_status_update
+    current_status = models.IntegerField(
+        choices=TaskStatus.choices,
+        null=True,
+        help_text='Latest status of the task, as recorded in its status history'
+    )
+    current_status_at = models.DateTimeField(
+        null=True,
+        help_text='Timestamp of the latest status of the task'
+    )
+    # Position in the live events of the execution up to which they have been applied, maintained by
+    # TaskService.apply_live_data
+    events_cursor = models.PositiveIntegerField(
+        default=0,
+        help_text='Number of live events of the task execution that have already been applied'
+    )
+    # Time at which the live data of the dispatched execution are due to be checked, maintained by
+    # TaskService.apply_live_data
+    next_check_at = models.DateTimeField(
+        default=get_current_datetime,
+        help_text='Time at which the live data of the task execution are due to be checked'
+    )
+    live_data_misses = models.PositiveSmallIntegerField(
+        default=0,
+        help_text='Number of consecutive checks in which the live data of the task execution were missing'
+    )
+
     class Meta:
         constraints = [
             CheckConstraint(
@@ -93,6 +121,15 @@ class Task(models.Model):
                 name='update_after_task_submit'
             )
         ]
+        indexes = [
+            models.Index(fields=['current_status'], name='task_current_status_idx'),
+            models.Index(
+                fields=['next_check_at'], name='task_next_check_at_idx',
+                condition=Q(current_status__in=[
+                    TaskStatus.QUEUED, TaskStatus.INITIALIZING, TaskStatus.RUNNING, TaskStatus.SCHEDULED
+                ])
+            )
+        ]
 
     @property
     def inputs(self):
@@ -114,6 +151,10 @@ class StatusHistoryPoint(models.Model):
                 check=Q(status__in=[choice.value for choice in TaskStatus]),
                 name='status_history_enum'
             ),
+            UniqueConstraint(
+                fields=['task', 'status'],
+                name='status_history_task_status_unique'
+            ),
         ]
 
     def __str__(self):
@@ -279,5 +320,5 @@ class ResourceSet(models.Model):
 
 class ExecutorOutputLog(models.Model):
     executor = models.OneToOneField(Executor, on_delete=models.CASCADE)
-    stdout = models.TextField()
-    stderr = models.TextField()
+    stdout = CompressedTextField()
+    stderr = CompressedTextField()
@@ -1,10 +1,11 @@
+from django.conf import settings
 from django.core.validators import MinValueValidator
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
 from api.constants import MountPointTypes
 from api.validators import NotEqualsValidator
-from util.serializers import OmitEmptyValuesMixin, KVPairsField, ModelMemberRelatedField, LatestInstanceRelatedField
+from util.serializers import OmitEmptyValuesMixin, KVPairsField, ModelMemberRelatedField, CurrentStatusSerializer
 
 
 class StrictSerializationMixin(serializers.Serializer):
@@ -114,8 +115,7 @@ class TaskSerializer(BaseSerializer):
 class TasksBasicListSerializer(serializers.Serializer):
     uuid = serializers.UUIDField(read_only=True)
     name = serializers.CharField()
-    current_status = LatestInstanceRelatedField(StatusHistoryPointSerializer, ['-created_at'],
-                                                source='status_history_points')
+    current_status = CurrentStatusSerializer(source='*', read_only=True)
 
 
 class TasksDetailedListSerializer(TasksBasicListSerializer):
@@ -129,3 +129,17 @@ class TasksFullListSerializer(TasksDetailedListSerializer):
 
 class TasksListQPSerializer(serializers.Serializer):
     view = serializers.ChoiceField(('basic', 'detailed', 'full'), required=False, default='basic')
+
+
+class TaskLogsQPSerializer(serializers.Serializer):
+    executor = serializers.IntegerField(min_value=0, required=False)
+    offset = serializers.IntegerField(min_value=0, required=False, default=0)
+    limit = serializers.IntegerField(min_value=1, max_value=settings.TASK_LOGS['MAX_PAGE_SIZE'], required=False)
+    follow = serializers.BooleanField(required=False, default=False)
+
+    def validate(self, data):
+        if 'executor' not in data and ('limit' in data or data['offset'] or data['follow']):
+            raise ValidationError('An "executor" is required for ranged or followed reads of logs.')
+        if data['follow'] and 'limit' in data:
+            raise ValidationError('A "limit" cannot be combined with following the logs.')
+        return data
@@ -1,30 +1,42 @@
+import asyncio
 import json
+import logging
+import threading
+import time
 import uuid
 from collections import defaultdict
 from datetime import datetime
-from typing import Iterable, List, Tuple
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ValidationError, MultipleObjectsReturned
-from django.db import transaction
-from django.db.models import QuerySet, OuterRef, Subquery
+from django.db import close_old_connections, transaction
+from django.db.models import QuerySet, OuterRef, Subquery, Q, prefetch_related_objects, Case, When, Value, F, \
+    BinaryField
+from django.db.models.functions import Substr
 from django.utils import timezone
 
 from api import taskapis
-from api.constants import TaskStatus
+from api.constants import TaskStatus, STATUS_PRECEDENCE
 from api.models import Task, Executor, Env, MountPoint, Volume, ResourceSet, ExecutorOutputLog, Context, \
     Participation, StatusHistoryPoint, Tag
 from api.serializers import TaskSerializer
-from api.utils import get_task_manager
+from api.utils import get_task_manager, get_status_precedence, get_preceding_statuses, supersedes
+from api_auth import caches as api_token_cache
 from api_auth.constants import AuthEntityType
-from api_auth.models import AuthEntity
-from core.managers.base import ExecutionManifest, ExecutionDetails, UserInfo
-from core.utils import get_manager
-from quotas.evaluators import ActiveResourcesDbQuotasEvaluator, RequestedResourcesQuotasEvaluator, TasksQuotasEvaluator
+from api_auth.models import ApiToken, AuthEntity
+from core.managers.base import ExecutionManifest, ExecutionDetails, UserInfo, LiveExecutionData
+from core.utils import get_manager, get_next_check_at, get_next_retry_at
+from quotas.evaluators import RequestedResourcesQuotasEvaluator
 from quotas.models import ContextQuotas
-from quotas.services import QuotasService
-from util.exceptions import ApplicationError, ApplicationErrorHelper, ApplicationNotFoundError, \
-    ApplicationValidationError
+from quotas.services import QuotasService, QuotasLedgerService, RELEASED_STATUSES
+from util.exceptions import ApplicationError, ApplicationErrorHelper, ApplicationMissingExecutionError, \
+    ApplicationNotFoundError, ApplicationThrottledError, ApplicationValidationError
+from util.fields import EncodedValueReader
+
+logger = logging.getLogger(__name__)
 
 
 class UserContextService:
@@ -48,77 +60,123 @@ class TaskService:
         self.context = context
         self.auth_entity = auth_entity
 
+    def submit_task(self, *, executors: Iterable[Executor], **optional) -> Task:
+        return self.submit_tasks([{'executors': executors, **optional}])[0]
+
     @transaction.atomic
-    def submit_task(self, *, executors: Iterable[Executor], **optional):
-        input_mount_points = optional.pop('inputs', None)
-        output_mount_points = optional.pop('outputs', None)
-        volumes = optional.pop('volumes', None)
-        tags = optional.pop('tags', None)
-        resource_set = optional.pop('resources', None)
+    def submit_tasks(self, task_definitions: Iterable[dict]) -> List[Task]:
+        """Submit a batch of tasks, storing, evaluating and dispatching them together
+
+        Related entities are inserted with a single statement per table, quotas are evaluated once against the
+        aggregate request and tasks are dispatched to the manager with a single call; either all tasks of the batch
+        are accepted or none is.
+
+        Args:
+            task_definitions (Iterable[dict]): validated task definitions, as produced by `TaskSerializer`
+
+        Returns:
+            List[Task]: the submitted tasks, in the order of the given definitions
+        """
+        definitions = [dict(task_definition) for task_definition in task_definitions]
+        if not definitions:
+            return []
+
+        related = [
+            {field: definition.pop(field, None) for field in ('executors', 'inputs', 'outputs', 'volumes', 'tags',
+                                                              'resources')}
+            for definition in definitions
+        ]
 
-        task = Task.objects.create(context=self.context, user=self.auth_entity, **optional)
+        tasks = Task.objects.bulk_create([
+            Task(context=self.context, user=self.auth_entity, **definition) for definition in definitions
+        ])
+        TaskStatusLogService.log_status_update_many(tasks, TaskStatus.SUBMITTED)
+
+        # Executor order is assigned upfront so that envs can be matched to the executors returned by bulk_create
+        executors, executors_envs = [], []
+        for task, task_related in zip(tasks, related):
+            for order, executor in enumerate(task_related['executors'], start=1):
+                executor = dict(executor)
+                executors_envs.append(executor.pop('envs', None) or [])
+                executors.append(Executor(task=task, order=order, **executor))
+        created_executors = Executor.objects.bulk_create(executors)
+
+        envs = [
+            Env(executor=executor, key=kv_pair['key'], value=kv_pair['value'])
+            for executor, executor_envs in zip(created_executors, executors_envs)
+            for kv_pair in executor_envs
+        ]
+        if envs:
+            Env.objects.bulk_create(envs)
+
+        mount_points = [
+            MountPoint(task=task, is_input=is_input, **mount_point)
+            for task, task_related in zip(tasks, related)
+            for is_input, field in ((True, 'inputs'), (False, 'outputs'))
+            for mount_point in task_related[field] or []
+        ]
+        if mount_points:
+            MountPoint.objects.bulk_create(mount_points)
 
-        task_status_log_service = TaskStatusLogService(task)
-        task_status_log_service.log_status_update(TaskStatus.SUBMITTED)
-
-        i = 0
-        for executor in executors:
-            envs = executor.pop('envs', None)
-
-            i += 1
-            order = i
-            executor = Executor.objects.create(task=task, order=order, **executor)
-
-            if envs:
-                for kv_pair in envs:
-                    Env.objects.create(executor=executor, key=kv_pair['key'], value=kv_pair['value'])
-
-        if input_mount_points:
-            for mount_point in input_mount_points:
-                MountPoint.objects.create(task=task, is_input=True, **mount_point)
-        if output_mount_points:
-            for mount_point in output_mount_points:
-                MountPoint.objects.create(task=task, is_input=False, **mount_point)
+        volumes = [
+            Volume(task=task, path=volume_path)
+            for task, task_related in zip(tasks, related)
+            for volume_path in task_related['volumes'] or []
+        ]
         if volumes:
-            for volume_path in volumes:
-                Volume.objects.create(task=task, path=volume_path)
-
-        if resource_set:
-            ResourceSet.objects.create(task=task, **resource_set)
-        else:
-            ResourceSet.objects.create(task=task)
-
-        if tags:
-            tag_set = set(tags)
-            for tag in tag_set:
-                temp_tag = Tag.objects.get_or_create(value=tag)[0]
-                task.tags.add(temp_tag)
-
-        quotas_service = QuotasService(task.context, task.user)
+            Volume.objects.bulk_create(volumes)
+
+        ResourceSet.objects.bulk_create([
+            ResourceSet(task=task, **(task_related['resources'] or {})) for task, task_related in zip(tasks, related)
+        ])
+
+        tag_values = {tag for task_related in related for tag in task_related['tags'] or []}
+        if tag_values:
+            # Upsert so that primary keys of already existing tags are returned along with the new ones
+            tags = {
+                tag.value: tag for tag in Tag.objects.bulk_create(
+                    [Tag(value=tag_value) for tag_value in tag_values], update_conflicts=True,
+                    unique_fields=['value'], update_fields=['value']
+                )
+            }
+            TaskTag = Tag.tasks.through
+            TaskTag.objects.bulk_create([
+                TaskTag(task_id=task.id, tag_id=tags[tag_value].id)
+                for task, task_related in zip(tasks, related)
+                for tag_value in set(task_related['tags'] or [])
+            ])
+
+        prefetch_related_objects(tasks, 'executors')
+        quotas_service = QuotasService(self.context, self.auth_entity)
         context_quotas, participation_quotas = quotas_service.get_qualified_quotas()
-        RequestedResourcesQuotasEvaluator.evaluate(context_quotas, participation_quotas, task)
-        TasksQuotasEvaluator.evaluate(context_quotas, participation_quotas, task)
-        ActiveResourcesDbQuotasEvaluator.evaluate(context_quotas, participation_quotas, task)
-
-        task_status_log_service.log_status_update(TaskStatus.APPROVED)
-
-        task_serializer = TaskSerializer(task)
-        task_data = task_serializer.data
+        RequestedResourcesQuotasEvaluator.evaluate_many(context_quotas, participation_quotas, tasks)
+        # The reservation is cancelled if the tasks cannot be dispatched
+        with QuotasLedgerService(quotas_service.participation).reserve(tasks, context_quotas, participation_quotas):
+            TaskStatusLogService.log_status_update_many(tasks, TaskStatus.APPROVED)
+            self._dispatch_tasks(tasks)
+        return tasks
+
+    def _dispatch_tasks(self, tasks: List[Task]) -> None:
         if manager_name := get_task_manager():
+            prefetch_related_objects(tasks, 'executors__envs', 'volumes', 'tags', 'status_history_points')
             manager = get_manager(manager_name)
-            execution_details = ExecutionDetails(definition=json.dumps(task_data), is_task=True)
             user_info = UserInfo(unique_id=str(self.auth_entity.uuid), username=self.auth_entity.username,
                                  fs_user_dir=self.auth_entity.profile.fs_user_dir)
-            execution_manifest = ExecutionManifest(
-                execution=execution_details, user_info=user_info, context_id=str(self.context.id)
-            )
-            task.backend_ref = manager.submit(execution_manifest)
-            task.manager_name = manager_name
+            execution_manifests = [
+                ExecutionManifest(
+                    execution=ExecutionDetails(definition=json.dumps(task_data), is_task=True), user_info=user_info,
+                    context_id=str(self.context.id)
+                )
+                for task_data in TaskSerializer(tasks, many=True).data
+            ]
+            backend_refs = manager.submit_many(execution_manifests)
 
-            task.save()
+            for task, backend_ref in zip(tasks, backend_refs):
+                task.backend_ref = backend_ref
+                task.manager_name = manager_name
+            Task.objects.bulk_update(tasks, ['backend_ref', 'manager_name'])
 
-            task_status_log_service.log_status_update(TaskStatus.QUEUED)
-        return task
+            TaskStatusLogService.log_status_update_many(tasks, TaskStatus.QUEUED)
 
     def get_task(self, task_uuid: uuid.UUID):
         try:
@@ -127,21 +185,66 @@ class TaskService:
             raise ApplicationNotFoundError(f'No task was found with UUID "{task_uuid}"') from dne
         return task
 
-    def get_task_stdout(self, task_uuid: uuid.UUID):
+    @staticmethod
+    def get_live_task_logs(task: Task, stream: str) -> Optional[List[str]]:
+        """Retrieve the logs of a dispatched task from its manager, caching them briefly
+
+        Args:
+            task (Task): the task
+            stream (str): either 'stdout' or 'stderr'
+
+        Returns:
+            The logs of the task's executors, or None if the task is not dispatched or its manager cannot provide them
+        """
+        if not task.backend_ref or not TaskStatusLogService(task).is_task_dispatched():
+            return None
+
+        cache_key = f'tasks:{task.uuid}:{stream}'
+        logs = cache.get(cache_key)
+        if logs is not None:
+            return logs
+
+        manager = get_manager(task.manager_name)
+        try:
+            logs = manager.get_stdout(task.backend_ref) if stream == 'stdout' else \
+                manager.get_stderr(task.backend_ref)
+        except ApplicationMissingExecutionError:
+            return None
+        except Exception as e:
+            logger.warning(f'Failed to retrieve {stream} of task {task.uuid} from manager {task.manager_name}: {e}')
+            return None
+        cache.set(cache_key, logs, timeout=settings.TASK_RUNNING_LOGS_CACHE_TIMEOUT)
+        return logs
+
+    def _get_task_logs(self, task_uuid: uuid.UUID, stream: str) -> List[str]:
         task = self.get_task(task_uuid)
 
-        executors_stdout = [
-            executor_output_log.stdout for executor_output_log in ExecutorOutputLog.objects.filter(executor__task=task)
-        ]
-        return executors_stdout
+        # Logs of executions that are still running are read from their manager
+        logs = self.get_live_task_logs(task, stream)
+        if logs is not None:
+            return logs
+
+        # Final logs are persisted with the executors by the watcher, once the execution terminates
+        return list(
+            ExecutorOutputLog.objects.filter(executor__task=task).order_by('executor__order').values_list(
+                stream, flat=True
+            )
+        )
 
-    def get_task_stderr(self, task_uuid: uuid.UUID):
+    def get_task_log_reader(self, task_uuid: uuid.UUID, stream: str, executor_index: int) -> 'TaskLogReader':
         task = self.get_task(task_uuid)
+        executor_ids = list(
+            task.executors.order_by('order').values_list('id', flat=True)[executor_index:executor_index + 1]
+        )
+        if not executor_ids:
+            raise ApplicationNotFoundError(f'Task "{task_uuid}" has no executor with index {executor_index}')
+        return TaskLogReader(task, stream, executor_index, executor_ids[0])
 
-        executors_stderr = [
-            executor_output_log.stderr for executor_output_log in ExecutorOutputLog.objects.filter(executor__task=task)
-        ]
-        return executors_stderr
+    def get_task_stdout(self, task_uuid: uuid.UUID) -> List[str]:
+        return self._get_task_logs(task_uuid, 'stdout')
+
+    def get_task_stderr(self, task_uuid: uuid.UUID) -> List[str]:
+        return self._get_task_logs(task_uuid, 'stderr')
 
     def get_tasks(self) -> QuerySet[Task]:
         return Task.objects.filter(context=self.context, user=self.auth_entity)
@@ -163,23 +266,286 @@ class TaskService:
 
     @staticmethod
     @transaction.atomic
-    def synchronize_dispatched_executions(tasks_qs: QuerySet[Task]):
+    def apply_live_data(tasks: List[Task], live_data_map: Dict[str, LiveExecutionData]) -> List[Task]:
+        """Apply the live data of dispatched executions of a manager and schedule their next check
+
+        The new status history points of all tasks are inserted with a single statement and their denormalized fields
+        are updated with another, regardless of the number of tasks and points.
+
+        Args:
+            tasks (List[Task]): the dispatched tasks, all handled by the same manager
+            live_data_map (Dict[str, LiveExecutionData]): the live data of the executions, by backend ref
+
+        Returns:
+            List[Task]: the tasks whose current status changed
+        """
+        if not tasks:
+            return []
+
+        now = timezone.now()
+        max_misses = settings.EXECUTIONS_SYNCHRONIZATION['MAX_LIVE_DATA_MISSES']
+        status_history_points = []
+        transitioned_tasks = []
+        lost_tasks = []
+        for t in tasks:
+            task_live_data = live_data_map.get(t.backend_ref, None)
+            if task_live_data is None:
+                # Executions missing from the live data are retried less often, until they are considered lost
+                t.live_data_misses += 1
+                t.next_check_at = get_next_retry_at(now, t.live_data_misses)
+                if t.live_data_misses >= max_misses:
+                    status_history_points.append(StatusHistoryPoint(task=t, status=TaskStatus.UNKNOWN, created_at=now))
+                    lost_tasks.append((t, t.current_status))
+                    logger.warning(f'Live data of task {t.uuid} were missing {t.live_data_misses} times; marking '
+                                   f'it as {TaskStatus.UNKNOWN.label}')
+                continue
+
+            t.live_data_misses = 0
+            transitioned = False
+
+            if status_history := task_live_data.status_history:
+                status_history_points.extend(
+                    StatusHistoryPoint(task=t, status=status, created_at=created_at)
+                    for status, created_at in status_history
+                )
+                # The first point of the latest status is the one kept, in case the status is repeated
+                status = max((status for status, _ in status_history), key=STATUS_PRECEDENCE.get)
+                if supersedes(status, t.current_status):
+                    t.current_status = status
+                    t.current_status_at = min(created_at for s, created_at in status_history if s == status)
+                    t.latest_update = now
+                    transitioned = True
+                    transitioned_tasks.append(t)
+
+            if task_live_data.events_cursor is not None:
+                t.events_cursor = task_live_data.events_cursor
+            # Executions are re-checked quickly after a status transition and less often while unchanged
+            t.next_check_at = get_next_check_at(now, now if transitioned else t.current_status_at)
+
+        # Statuses that are already logged are skipped by the unique (task, status) constraint
+        StatusHistoryPoint.objects.bulk_create(status_history_points, ignore_conflicts=True)
+        TaskService._persist_final_logs(tasks, live_data_map)
+
+        # All tasks are updated with a single statement; the denormalized status is only moved forward, in case it
+        # has been updated concurrently since the tasks were read
+        transitions = [
+            (Q(pk=t.pk) & TaskStatusLogService._precedes_current_status(t.current_status), t)
+            for t in transitioned_tasks
+        ]
+        # Lost executions are marked as unknown only if their status has not been updated since they were read
+        for t, previous_status in lost_tasks:
+            t.current_status, t.current_status_at = TaskStatus.UNKNOWN, now
+            t.latest_update = now
+            transitions.append((Q(pk=t.pk, current_status=previous_status), t))
+        Task.objects.filter(pk__in=[t.pk for t in tasks]).update(
+            current_status=Case(*[When(q, then=Value(t.current_status)) for q, t in transitions],
+                                default=F('current_status')),
+            current_status_at=Case(*[When(q, then=Value(t.current_status_at)) for q, t in transitions],
+                                   default=F('current_status_at')),
+            latest_update=Case(*[When(q, then=Value(t.latest_update)) for q, t in transitions],
+                               default=F('latest_update')),
+            events_cursor=Case(*[When(pk=t.pk, then=Value(t.events_cursor)) for t in tasks]),
+            next_check_at=Case(*[When(pk=t.pk, then=Value(t.next_check_at)) for t in tasks]),
+            live_data_misses=Case(*[When(pk=t.pk, then=Value(t.live_data_misses)) for t in tasks])
+        )
+        terminated_task_ids = [t.pk for t in transitioned_tasks if t.current_status in RELEASED_STATUSES]
+        if terminated_task_ids or lost_tasks:
+            QuotasLedgerService.release(terminated_task_ids + [t.pk for t, _ in lost_tasks])
+        return transitioned_tasks
+
+    @staticmethod
+    def _persist_final_logs(tasks: List[Task], live_data_map: Dict[str, LiveExecutionData]) -> None:
+        # The logs of terminated executions are stored with the executors, in their execution order, so that they
+        # remain available after the manager archives the executions
+        final_tasks = {
+            t.pk: live_data_map[t.backend_ref] for t in tasks
+            if t.backend_ref in live_data_map and live_data_map[t.backend_ref].is_final
+        }
+        if not final_tasks:
+            return
+
+        executors = defaultdict(list)
+        for executor in Executor.objects.filter(task__in=final_tasks.keys()).order_by('order', 'id'):
+            executors[executor.task_id].append(executor)
+
+        executor_output_logs = []
+        for task_pk, task_live_data in final_tasks.items():
+            for i, executor in enumerate(executors[task_pk]):
+                executor_output_logs.append(ExecutorOutputLog(
+                    executor=executor,
+                    stdout=task_live_data.stdout[i] if i < len(task_live_data.stdout) else '',
+                    stderr=task_live_data.stderr[i] if i < len(task_live_data.stderr) else ''
+                ))
+        ExecutorOutputLog.objects.bulk_create(executor_output_logs, update_conflicts=True, unique_fields=['executor'],
+                                              update_fields=['stdout', 'stderr'])
+
+
+def _in_worker_thread(func):
+    """Wrap a function to be awaited in a thread of the executor of `sync_to_async`, rather than in the thread that all
+    the synchronous code of the process shares, closing the database connection it opens there once it returns"""
+    def run(*args):
+        try:
+            return func(*args)
+        finally:
+            close_old_connections()
 
-        grouped = defaultdict(list)
-        for t in tasks_qs:
-            grouped[t.manager_name].append(t)
+    return sync_to_async(run, thread_sensitive=False)
 
-        for manager_name, manager_tasks in grouped.items():
-            backend_refs = [w.backend_ref for w in manager_tasks]
 
-            manager = get_manager(manager_name)
-            live_data_map = dict(manager.list(ref_ids=backend_refs))
+class TaskLogReader:
+    """
+    Reads byte ranges of the log of a task's executor.
 
-            for t in manager_tasks:
-                task_live_data = live_data_map[t.backend_ref]
+    While the task is dispatched, the log is read from the task's manager, through the brief cache of the task's logs.
+    Otherwise, only the parts of the persisted log that a range requires are fetched and decompressed, so that the
+    cost of a read is proportional to its range rather than to the size of the log; see `CompressedTextField`.
+    """
 
-                task_status_log_service = TaskStatusLogService(t)
-                task_status_log_service.update_live_data(task_live_data.status_history)
+    def __init__(self, task: Task, stream: str, executor_index: int, executor_id: int):
+        self.task = task
+        self.stream = stream
+        self.executor_index = executor_index
+        self.executor_id = executor_id
+        self._live_log = self._get_live_log()
+        self._persisted_log = None
+
+    def _get_live_log(self) -> Optional[bytes]:
+        live_logs = TaskService.get_live_task_logs(self.task, self.stream)
+        if live_logs is None:
+            return None
+        return (live_logs[self.executor_index] if self.executor_index < len(live_logs) else '').encode('utf-8')
+
+    def _read_persisted_log(self, offset: int, length: Optional[int]) -> bytes:
+        # The stored value is read as is, to be decoded by the reader of the persisted log
+        data = ExecutorOutputLog.objects.filter(executor_id=self.executor_id).annotate(
+            data=Substr(self.stream, offset + 1, length, output_field=BinaryField())
+        ).values_list('data', flat=True).first()
+        return bytes(data) if data is not None else b''
+
+    def _get_persisted_log(self) -> EncodedValueReader:
+        if self._persisted_log is None:
+            self._persisted_log = EncodedValueReader(self._read_persisted_log)
+        return self._persisted_log
+
+    def refresh(self) -> None:
+        self.task.refresh_from_db(fields=['current_status'])
+        self._live_log = self._get_live_log()
+        self._persisted_log = None
+
+    def is_dispatched(self) -> bool:
+        return TaskStatusLogService(self.task).is_task_dispatched()
+
+    def get_size(self) -> int:
+        if self._live_log is not None:
+            return len(self._live_log)
+        return self._get_persisted_log().get_size()
+
+    def read(self, offset: int, length: int) -> bytes:
+        return b''.join(self.iter_chunks(offset, length))
+
+    def iter_chunks(self, offset: int = 0, length: int = None) -> Iterator[bytes]:
+        """Read a range of the log in chunks of at most `TASK_LOGS['CHUNK_SIZE']` bytes
+
+        Args:
+            offset (int): the offset of the range
+            length (int): the length of the range; up to the end of the log if omitted
+
+        Yields:
+            The consecutive chunks of the range
+        """
+        chunk_size = settings.TASK_LOGS['CHUNK_SIZE']
+        if self._live_log is None:
+            yield from self._get_persisted_log().iter_range(offset, length, chunk_size=chunk_size)
+            return
+
+        end = len(self._live_log) if length is None else min(offset + length, len(self._live_log))
+        for i in range(offset, end, chunk_size):
+            yield self._live_log[i:min(i + chunk_size, end)]
+
+    async def aiter_chunks(self, offset: int = 0, length: int = None) -> AsyncIterator[bytes]:
+        """Read a range of the log in chunks, like `iter_chunks`, for streaming responses served under ASGI
+
+        Each chunk is read in a worker thread, so that reading a log neither blocks the other requests nor is buffered
+        whole before it is sent.
+
+        Args:
+            offset (int): the offset of the range
+            length (int): the length of the range; up to the end of the log if omitted
+
+        Yields:
+            The consecutive chunks of the range
+        """
+        chunks = self.iter_chunks(offset, length)
+        read_chunk = _in_worker_thread(next)
+        while (chunk := await read_chunk(chunks, None)) is not None:
+            yield chunk
+
+    def follow(self, offset: int = 0) -> 'TaskLogFollower':
+        """Read the log from an offset onwards, waiting for new output for as long as the task is dispatched
+
+        Following stops once the task terminates and its remaining output is read, or after
+        `TASK_LOGS['FOLLOW_TIMEOUT_SECONDS']`. The follower waits on the event loop between its reads, yet polls the
+        log every `TASK_LOGS['FOLLOW_INTERVAL_SECONDS']`, so the followers of the process are limited to
+        `TASK_LOGS['MAX_FOLLOWERS']`.
+
+        Args:
+            offset (int): the offset to start reading from
+
+        Returns:
+            TaskLogFollower: the chunks of the log, as they are produced
+
+        Raises:
+            ApplicationThrottledError: if the process already serves the maximum number of followers
+        """
+        return TaskLogFollower(self._follow(offset))
+
+    async def _follow(self, offset: int) -> AsyncIterator[bytes]:
+        deadline = time.monotonic() + settings.TASK_LOGS['FOLLOW_TIMEOUT_SECONDS']
+        while True:
+            async for chunk in self.aiter_chunks(offset):
+                yield chunk
+                offset += len(chunk)
+            if time.monotonic() >= deadline or not await _in_worker_thread(self.is_dispatched)():
+                return
+            await asyncio.sleep(settings.TASK_LOGS['FOLLOW_INTERVAL_SECONDS'])
+            await _in_worker_thread(self.refresh)()
+
+
+class TaskLogFollower:
+    """
+    Iterates asynchronously over the chunks of a followed log, holding one of the follower slots of the process.
+
+    The slot is claimed on creation and released once the chunks are exhausted or the follower is closed, which the
+    streaming response does when the client disconnects.
+    """
+    _lock = threading.Lock()
+    _active = 0
+
+    def __init__(self, chunks: AsyncIterator[bytes]):
+        with TaskLogFollower._lock:
+            if TaskLogFollower._active >= settings.TASK_LOGS['MAX_FOLLOWERS']:
+                raise ApplicationThrottledError('Too many logs are already being followed. Try again later.')
+            TaskLogFollower._active += 1
+        self._chunks = chunks
+        self._closed = False
+
+    def __aiter__(self) -> 'TaskLogFollower':
+        return self
+
+    async def __anext__(self) -> bytes:
+        try:
+            return await anext(self._chunks)
+        except StopAsyncIteration:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        # The chunks are left to be finalized by the event loop, since closing them has to be awaited
+        with TaskLogFollower._lock:
+            if self._closed:
+                return
+            self._closed = True
+            TaskLogFollower._active -= 1
 
 
 class StatusHistoryPointService:
@@ -206,22 +572,98 @@ class TaskStatusLogService:
     @staticmethod
     def filter_tasks_by_status(queryset: QuerySet[Task], statuses: Iterable[TaskStatus]) -> QuerySet[
         Task]:
+        return queryset.filter(current_status__in=statuses)
+
+    @staticmethod
+    def refresh_current_status(queryset: QuerySet[Task]) -> int:
+        """Recompute the denormalized current status of the given tasks from their status history
+
+        Args:
+            queryset (QuerySet[Task]): the tasks whose `current_status` and `current_status_at` should be recomputed
 
+        Returns:
+            int: the number of updated tasks
+        """
         latest_statuses = StatusHistoryPoint.objects.filter(
             task=OuterRef('pk')
-        ).order_by('-status', '-created_at')
+        ).annotate(precedence=get_status_precedence()).order_by('-precedence', '-created_at')
 
-        tasks_with_latest_status = queryset.annotate(
-            latest_status=Subquery(latest_statuses.values('status')[:1])
+        updated = queryset.update(
+            current_status=Subquery(latest_statuses.values('status')[:1]),
+            current_status_at=Subquery(latest_statuses.values('created_at')[:1])
         )
-
-        return tasks_with_latest_status.filter(latest_status__in=statuses)
+        # Only tasks left pending in a final status are released, so that the rest of the batch is not locked
+        released_task_ids = list(
+            queryset.filter(pending=True, current_status__in=RELEASED_STATUSES).values_list('pk', flat=True)
+        )
+        if released_task_ids:
+            QuotasLedgerService.release(released_task_ids)
+        return updated
 
     @transaction.atomic
     def update_live_data(self, live_status_history: List[Tuple[TaskStatus, datetime]]):
-        for sl in live_status_history:
-            self.log_status_update(sl[0], created_at=sl[1], avoid_duplicates=True)
+        if not live_status_history:
+            return
+
+        # Statuses that are already logged are skipped by the unique (task, status) constraint
+        StatusHistoryPoint.objects.bulk_create([
+            StatusHistoryPoint(task=self.task, status=status, created_at=created_at)
+            for status, created_at in live_status_history
+        ], ignore_conflicts=True)
 
+        # The first point of the latest status is the one kept, in case the status is repeated
+        status = max((status for status, _ in live_status_history), key=STATUS_PRECEDENCE.get)
+        created_at = min(created_at for s, created_at in live_status_history if s == status)
+        self._update_current_status(StatusHistoryPoint(task=self.task, status=status, created_at=created_at))
+
+    @staticmethod
+    def _precedes_current_status(status: TaskStatus) -> Q:
+        # Each status is logged at most once per task and the latest status is the one of the highest precedence; only
+        # move the denormalized status forward
+        return Q(current_status__isnull=True) | Q(current_status__in=get_preceding_statuses(status))
+
+    @staticmethod
+    def log_status_update_many(tasks: List[Task], status: TaskStatus, created_at: datetime = None) -> List[
+        StatusHistoryPoint]:
+        """Log the same status update for multiple tasks, using a constant number of queries
+
+        Args:
+            tasks (List[Task]): the tasks whose status is updated
+            status (TaskStatus): the new status of the tasks
+            created_at (datetime): the time of the update; defaults to the current time
+
+        Returns:
+            List[StatusHistoryPoint]: the created status history points, in the order of the given tasks
+        """
+        created_at = created_at or timezone.now()
+        status_history_points = StatusHistoryPoint.objects.bulk_create([
+            StatusHistoryPoint(task=task, status=status, created_at=created_at) for task in tasks
+        ])
+
+        Task.objects.filter(
+            TaskStatusLogService._precedes_current_status(status), pk__in=[task.pk for task in tasks]
+        ).update(current_status=status, current_status_at=created_at)
+        for task in tasks:
+            if supersedes(status, task.current_status):
+                task.current_status = status
+                task.current_status_at = created_at
+        if status in RELEASED_STATUSES:
+            QuotasLedgerService.release([task.pk for task in tasks])
+        return status_history_points
+
+    def _update_current_status(self, status_history_point: StatusHistoryPoint) -> None:
+        status, created_at = status_history_point.status, status_history_point.created_at
+        updated = Task.objects.filter(pk=self.task.pk).filter(
+            self._precedes_current_status(status)
+        ).update(current_status=status, current_status_at=created_at)
+
+        if updated:
+            self.task.current_status = status
+            self.task.current_status_at = created_at
+            if status in RELEASED_STATUSES:
+                QuotasLedgerService.release([self.task.pk])
+
+    @transaction.atomic
     def log_status_update(self, status: TaskStatus, avoid_duplicates: bool = False, **optional) -> StatusHistoryPoint:
         if avoid_duplicates:
             try:
@@ -232,27 +674,39 @@ class TaskStatusLogService:
                         "status": status
                     }
                 )
-                return status_history_point
             except MultipleObjectsReturned:
-                return StatusHistoryPoint.objects.filter(task=self.task, status=status).order_by(
+                status_history_point = StatusHistoryPoint.objects.filter(task=self.task, status=status).order_by(
                     '-created_at').first()
         else:
-            return StatusHistoryPoint.objects.create(task=self.task, status=status, **optional)
+            status_history_point = StatusHistoryPoint.objects.create(task=self.task, status=status, **optional)
+
+        self._update_current_status(status_history_point)
+        return status_history_point
 
     def get_current_status(self) -> StatusHistoryPoint:
-        return StatusHistoryPoint.objects.filter(task=self.task).order_by('-status', '-created_at').first()
+        return StatusHistoryPoint.objects.filter(task=self.task).annotate(
+            precedence=get_status_precedence()
+        ).order_by('-precedence', '-created_at').first()
+
+    def _get_current_status_value(self) -> Optional[TaskStatus]:
+        # Tasks submitted before the current status was denormalized have none until `backfill_current_status` is run;
+        # their status history is consulted instead
+        if self.task.current_status is not None:
+            return self.task.current_status
+        current_status = self.get_current_status()
+        return current_status.status if current_status else None
 
     def is_task_pending(self) -> bool:
-        current_status = self.get_current_status()
-        return TaskStatus.SUBMITTED <= current_status.status <= TaskStatus.RUNNING
+        status = self._get_current_status_value()
+        return status is not None and TaskStatus.SUBMITTED <= status <= TaskStatus.RUNNING
 
     def is_task_dispatched(self) -> bool:
-        current_status = self.get_current_status()
-        return TaskStatus.QUEUED <= current_status.status <= TaskStatus.RUNNING
+        status = self._get_current_status_value()
+        return status is not None and TaskStatus.QUEUED <= status <= TaskStatus.RUNNING
 
     def does_task_await_dispatch(self):
-        current_status = self.get_current_status()
-        return TaskStatus.SUBMITTED <= current_status.status < TaskStatus.QUEUED
+        status = self._get_current_status_value()
+        return status is not None and TaskStatus.SUBMITTED <= status < TaskStatus.QUEUED
 
 
 class ParticipationService:
@@ -287,6 +741,8 @@ class ParticipationService:
 
     def remove_from_context(self, user: AuthEntity):
         participation = self.get_participation(user)
+        # The tokens of the participation are deleted along with it, so they are evicted from the cache beforehand
+        api_token_cache.invalidate_api_tokens(ApiToken.objects.filter(participation=participation))
         participation.delete()
 
 
@@ -1,14 +1,22 @@
 from datetime import datetime, timedelta
+from typing import List
+from unittest.mock import patch
 
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.test import override_settings
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework import status
-from rest_framework.test import APITestCase, APIClient
+from rest_framework.test import APITestCase, APIClient, APITransactionTestCase
 
-from api.models import Context, Participation
+from api.constants import TaskStatus
+from api.models import Context, Participation, Task, Executor, ExecutorOutputLog
+from api.services import TaskStatusLogService, TaskLogFollower
 from api_auth.constants import AuthEntityType
 from api_auth.models import AuthEntity, ApiToken
 from api_auth.services import ApiTokenService
+from quotas.services import QuotasService
 
 
 class UserContextsAPITestCase(APITestCase):
@@ -283,3 +291,182 @@ class UserContextInfoAPIViewTestCase(APITestCase):
             response.data['users']
         )
         self.assertIn('quotas', response.data)
+
+
+@patch('api.services.get_task_manager', return_value=None)
+class TasksBatchCreateAPITestCase(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        app_service = AuthEntity.objects.create(username='as', entity_type=AuthEntityType.APPLICATION_SERVICE)
+        cls.context = Context.objects.create(owner=app_service, name='context0')
+        cls.user = AuthEntity.objects.create(username='user0', parent=app_service)
+        Participation.objects.create(user=cls.user, context=cls.context)
+
+        ats = ApiTokenService(cls.user, cls.context)
+        cls.key, _ = ats.issue_token(duration='1d')
+
+    def setUp(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.key)
+
+    @staticmethod
+    def _get_task_definition(name: str) -> dict:
+        return {
+            'name': name,
+            'executors': [{'image': 'ubuntu:latest', 'command': ['echo', name]}],
+            'tags': ['batch']
+        }
+
+    def test_submit_batch_returns_per_item_results_in_request_order(self, _):
+        url = reverse('tasks_batch')
+        response = self.client.post(url, [self._get_task_definition(f'task{i}') for i in range(3)], format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertListEqual([item['name'] for item in response.data], ['task0', 'task1', 'task2'])
+        self.assertListEqual([item['current_status']['status'] for item in response.data], ['APPROVED'] * 3)
+
+        tasks = Task.objects.filter(uuid__in=[item['uuid'] for item in response.data])
+        self.assertEqual(tasks.count(), 3)
+        for task in tasks:
+            self.assertEqual(task.current_status, TaskStatus.APPROVED)
+            self.assertEqual(task.executors.count(), 1)
+            self.assertListEqual([t.value for t in task.tags.all()], ['batch'])
+
+    def test_submit_batch_with_invalid_item_reports_per_item_errors_and_stores_nothing(self, _):
+        url = reverse('tasks_batch')
+        response = self.client.post(url, [self._get_task_definition('task0'), {'name': 'task1'}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(response.data), 2)
+        self.assertFalse(response.data[0])
+        self.assertIn('executors', response.data[1])
+        self.assertFalse(Task.objects.exists())
+
+    def test_submit_batch_evaluates_quotas_against_the_whole_batch(self, _):
+        QuotasService(self.context).set_quotas(total_tasks=2)
+        url = reverse('tasks_batch')
+        response = self.client.post(url, [self._get_task_definition(f'task{i}') for i in range(3)], format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.data['resource'], 'total_tasks')
+        self.assertEqual(response.data['details']['requested'], 3)
+        self.assertFalse(Task.objects.exists())
+
+
+class TaskLogsTestDataMixin:
+
+    @classmethod
+    def create_test_data(cls):
+        app_service = AuthEntity.objects.create(username='as', entity_type=AuthEntityType.APPLICATION_SERVICE)
+        cls.context = Context.objects.create(owner=app_service, name='context0')
+        cls.user = AuthEntity.objects.create(username='user0', parent=app_service)
+        Participation.objects.create(user=cls.user, context=cls.context)
+
+        ats = ApiTokenService(cls.user, cls.context)
+        cls.key, _ = ats.issue_token(duration='1d')
+
+        cls.task = Task.objects.create(name='task', context=cls.context, user=cls.user, backend_ref='ref',
+                                       manager_name='default')
+        for order, stdout in enumerate(['first executor', 'καλημέρα κόσμε']):
+            executor = Executor.objects.create(task=cls.task, order=order, command=['echo'], image='alpine')
+            ExecutorOutputLog.objects.create(executor=executor, stdout=stdout, stderr='')
+        TaskStatusLogService.log_status_update_many([cls.task], TaskStatus.COMPLETED)
+
+
+class TaskLogsAPITestCase(TaskLogsTestDataMixin, APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_test_data()
+
+    def setUp(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.key)
+        self.url = reverse('task_stdout', kwargs={'uuid': self.task.uuid})
+
+    def test_get_task_stdout_returns_the_logs_of_all_executors(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertDictEqual(response.data, {'stdout': ['first executor', 'καλημέρα κόσμε']})
+
+    def test_get_executor_stdout_with_offset_and_limit_returns_a_byte_range(self):
+        response = self.client.get(self.url, {'executor': 1, 'offset': 4, 'limit': 6})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.content, 'καλημέρα'.encode('utf-8')[4:10])
+
+    def test_get_executor_stdout_with_range_header_returns_partial_content(self):
+        response = self.client.get(self.url, {'executor': 0}, HTTP_RANGE='bytes=6-13')
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(response.content, b'executor')
+        self.assertEqual(response['Content-Range'], 'bytes 6-13/14')
+
+        response = self.client.get(self.url, {'executor': 0}, HTTP_RANGE='bytes=-5')
+        self.assertEqual(response.content, b'cutor')
+
+    def test_get_executor_stdout_with_unsatisfiable_range_returns_416(self):
+        response = self.client.get(self.url, {'executor': 0}, HTTP_RANGE='bytes=14-')
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.assertEqual(response['Content-Range'], 'bytes */14')
+
+    def test_get_task_stderr_returns_the_logs_of_all_executors(self):
+        response = self.client.get(reverse('task_stderr', kwargs={'uuid': self.task.uuid}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertDictEqual(response.data, {'stderr': ['', '']})
+
+
+class TaskLogsStreamingAPITestCase(TaskLogsTestDataMixin, APITransactionTestCase):
+    """Streamed logs are read in worker threads, with connections of their own, so the test data are committed"""
+
+    def setUp(self):
+        self.create_test_data()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.key)
+        self.url = reverse('task_stdout', kwargs={'uuid': self.task.uuid})
+
+    @staticmethod
+    def consume(response) -> List[bytes]:
+        # Responses are consumed as the ASGI handler does, through their asynchronous iteration
+        async def consume_parts():
+            return [part async for part in response]
+
+        return async_to_sync(consume_parts)()
+
+    @override_settings(TASK_LOGS={**settings.TASK_LOGS, 'CHUNK_SIZE': 4})
+    def test_get_executor_stdout_streams_the_whole_log(self):
+        response = self.client.get(self.url, {'executor': 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.is_async)
+        parts = self.consume(response)
+        self.assertTrue(all(len(part) <= 4 for part in parts))
+        self.assertEqual(b''.join(parts), 'καλημέρα κόσμε'.encode('utf-8'))
+
+    def test_follow_executor_stdout_of_terminated_task_returns_the_rest_of_the_log(self):
+        response = self.client.get(self.url, {'executor': 0, 'offset': 6, 'follow': True})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(self.consume(response)), b'executor')
+
+    @override_settings(TASK_LOGS={**settings.TASK_LOGS, 'FOLLOW_INTERVAL_SECONDS': 0})
+    @patch('api.services.TaskLogReader.is_dispatched', side_effect=[True, True, False])
+    @patch('api.services.TaskService.get_live_task_logs', side_effect=[['first'], ['first', ''], ['first output']])
+    def test_follow_executor_stdout_of_dispatched_task_streams_the_log_as_it_is_produced(self, *_):
+        response = self.client.get(self.url, {'executor': 0, 'follow': True})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertListEqual(self.consume(response), [b'first', b' output'])
+
+    @override_settings(TASK_LOGS={**settings.TASK_LOGS, 'MAX_FOLLOWERS': 1})
+    def test_follow_executor_stdout_beyond_the_maximum_followers_returns_429(self):
+        async def output():
+            yield b'output'
+
+        follower = TaskLogFollower(output())
+        response = self.client.get(self.url, {'executor': 0, 'follow': True})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        # The slot of a follower is released once it is closed
+        follower.close()
+        response = self.client.get(self.url, {'executor': 0, 'follow': True})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(self.consume(response)), b'first executor')
+
+    def test_get_stdout_of_missing_executor_returns_404(self):
+        response = self.client.get(self.url, {'executor': 2})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_get_stdout_range_without_executor_returns_400(self):
+        response = self.client.get(self.url, {'offset': 2})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,13 +1,19 @@
 import datetime
+import importlib
 from unittest.mock import patch
 from datetime import datetime as dt
 
+from django.apps import apps
 from django.db import IntegrityError
+from django.db.models import BinaryField, ExpressionWrapper, F
+from django.db.models.functions import Substr
 from django.test import TestCase
 from django.utils import timezone
 
 from api.constants import TaskStatus
-from api.models import Task, StatusHistoryPoint
+from api.models import Task, StatusHistoryPoint, Executor, ExecutorOutputLog
+from workflows.models import Workflow, WorkflowStatusLog
+from util.fields import get_decompressed_size, iter_decompressed, EncodedValueReader, DEFAULT_FRAME_SIZE
 
 
 class StatusHistoryPointTestCase(TestCase):
@@ -88,3 +94,84 @@ class StatusHistoryPointTestCase(TestCase):
         task.delete()
         with self.assertRaises(StatusHistoryPoint.DoesNotExist):
             status_history_point.refresh_from_db()
+
+
+class CurrentStatusMigrationsTestCase(TestCase):
+
+    def setUp(self):
+        now = timezone.now()
+        self.history = [(TaskStatus.QUEUED, now), (TaskStatus.RUNNING, now + datetime.timedelta(seconds=1)),
+                        (TaskStatus.UNKNOWN, now + datetime.timedelta(seconds=2))]
+        self.task = Task.objects.create(name='task')
+        self.workflow = Workflow.objects.create(name='workflow')
+        for status, created_at in self.history:
+            StatusHistoryPoint.objects.create(task=self.task, status=status, created_at=created_at)
+            WorkflowStatusLog.objects.create(workflow=self.workflow, status=status, created_at=created_at)
+
+    def _assert_backfilled(self, migration: str, function: str):
+        Task.objects.update(current_status=None, current_status_at=None)
+        Workflow.objects.update(current_status=None, current_status_at=None)
+
+        getattr(importlib.import_module(f'migrations.{migration}'), function)(apps, None)
+
+        execution = self.workflow if migration.startswith('workflows') else self.task
+        execution.refresh_from_db()
+        self.assertEqual(execution.current_status, TaskStatus.UNKNOWN)
+        self.assertEqual(execution.current_status_at, self.history[-1][1])
+
+    def test_migrations_backfill_unknown_above_dispatched_statuses(self):
+        self._assert_backfilled('api.0012_task_current_status', 'backfill_current_status')
+        self._assert_backfilled('api.0013_task_events_cursor', 'remove_duplicate_statuses')
+        self._assert_backfilled('workflows.0003_workflow_current_status', 'backfill_current_status')
+        self._assert_backfilled('workflows.0004_workflow_events_cursor', 'remove_duplicate_statuses')
+
+
+class ExecutorOutputLogTestCase(TestCase):
+
+    def setUp(self):
+        task = Task.objects.create(name='sample-task')
+        self.executor = Executor.objects.create(task=task, order=0, command=['echo'], image='alpine')
+
+    def _get_stored_stdout(self) -> bytes:
+        return bytes(ExecutorOutputLog.objects.annotate(
+            data=ExpressionWrapper(F('stdout'), output_field=BinaryField())
+        ).values_list('data', flat=True).get(executor=self.executor))
+
+    def test_logs_are_stored_compressed_and_read_transparently(self):
+        stdout = ''.join(f'line {i}: καλημέρα\n' for i in range(10000))
+        ExecutorOutputLog.objects.create(executor=self.executor, stdout=stdout, stderr='short')
+
+        stored = self._get_stored_stdout()
+        self.assertLess(len(stored), len(stdout.encode('utf-8')) // 5)
+        self.assertEqual(get_decompressed_size(stored), len(stdout.encode('utf-8')))
+        self.assertEqual(ExecutorOutputLog.objects.get(executor=self.executor).stdout, stdout)
+        self.assertEqual(ExecutorOutputLog.objects.values_list('stderr', flat=True).get(), 'short')
+
+    def test_ranges_of_stored_logs_are_decompressed_incrementally(self):
+        stdout = ''.join(f'line {i}\n' for i in range(10000))
+        ExecutorOutputLog.objects.create(executor=self.executor, stdout=stdout, stderr='')
+
+        chunks = list(iter_decompressed(self._get_stored_stdout(), offset=1000, length=5000, chunk_size=1024))
+        self.assertTrue(all(len(chunk) <= 1024 for chunk in chunks))
+        self.assertEqual(b''.join(chunks), stdout.encode('utf-8')[1000:6000])
+
+    def test_ranges_of_stored_logs_are_read_from_the_frames_that_overlap_them(self):
+        stdout = ''.join(f'line {i}: καλημέρα\n' for i in range(100000))
+        ExecutorOutputLog.objects.create(executor=self.executor, stdout=stdout, stderr='')
+        data = stdout.encode('utf-8')
+
+        reads = []
+
+        def read(offset, length):
+            reads.append(length)
+            return bytes(ExecutorOutputLog.objects.annotate(
+                data=Substr('stdout', offset + 1, length, output_field=BinaryField())
+            ).values_list('data', flat=True).get(executor=self.executor))
+
+        reader = EncodedValueReader(read)
+        self.assertEqual(reader.get_size(), len(data))
+        self.assertEqual(b''.join(reader.iter_range(len(data) - 1024)), data[-1024:])
+        self.assertEqual(b''.join(reader.iter_range(300000, 5000, chunk_size=1024)), data[300000:305000])
+        # Only the header, the index and the compressed frames that overlap each range are fetched
+        self.assertTrue(all(length is not None and length < DEFAULT_FRAME_SIZE for length in reads))
+        self.assertLess(sum(reads), len(self._get_stored_stdout()) // 2)
@@ -1,10 +1,17 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest.mock import patch, MagicMock
 
-from api.models import Context, Participation
-from api.services import UserContextService
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from api.constants import TaskStatus, MountPointTypes
+from api.models import Context, Participation, Task, StatusHistoryPoint, Tag, Executor, ExecutorOutputLog
+from api.services import UserContextService, TaskStatusLogService, TaskService
 from api_auth.constants import AuthEntityType
-from api_auth.models import AuthEntity
-from util.exceptions import ApplicationError, ApplicationNotFoundError
+from api_auth.models import AuthEntity, UserProfile
+from core.managers.base import LiveExecutionData
+from util.exceptions import ApplicationError, ApplicationMissingExecutionError, ApplicationNotFoundError
 
 
 class UserContextTestCase(TestCase):
@@ -44,3 +51,304 @@ class UserContextTestCase(TestCase):
         ucs = UserContextService(self.user0)
         with self.assertRaises(ApplicationNotFoundError):
             ucs.retrieve_context(3)
+
+
+class TaskStatusLogServiceTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.task = Task.objects.create(name='task')
+
+    def test_log_status_update_sets_current_status(self):
+        tsls = TaskStatusLogService(self.task)
+        point = tsls.log_status_update(TaskStatus.SUBMITTED)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.current_status, TaskStatus.SUBMITTED)
+        self.assertEqual(self.task.current_status_at, point.created_at)
+
+    def test_log_status_update_does_not_move_current_status_backwards(self):
+        tsls = TaskStatusLogService(self.task)
+        ts = timezone.now()
+        tsls.log_status_update(TaskStatus.RUNNING, created_at=ts)
+        tsls.log_status_update(TaskStatus.QUEUED, created_at=ts + timedelta(seconds=1))
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.current_status, TaskStatus.RUNNING)
+        self.assertEqual(self.task.current_status_at, ts)
+
+    def test_log_status_update_of_unknown_supersedes_dispatched_but_not_final_statuses(self):
+        tsls = TaskStatusLogService(self.task)
+        tsls.log_status_update(TaskStatus.RUNNING)
+        tsls.log_status_update(TaskStatus.UNKNOWN)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.current_status, TaskStatus.UNKNOWN)
+        self.assertFalse(tsls.is_task_pending())
+
+        other_task = Task.objects.create(name='other-task')
+        TaskStatusLogService(other_task).log_status_update(TaskStatus.COMPLETED)
+        TaskStatusLogService(other_task).log_status_update(TaskStatus.UNKNOWN)
+        other_task.refresh_from_db()
+        self.assertEqual(other_task.current_status, TaskStatus.COMPLETED)
+
+    def test_pending_checks_fall_back_to_status_history_of_tasks_without_current_status(self):
+        StatusHistoryPoint.objects.create(task=self.task, status=TaskStatus.QUEUED, created_at=timezone.now())
+        tsls = TaskStatusLogService(self.task)
+        self.assertTrue(tsls.is_task_pending())
+        self.assertTrue(tsls.is_task_dispatched())
+        self.assertFalse(tsls.does_task_await_dispatch())
+
+        tsls = TaskStatusLogService(Task.objects.create(name='other-task'))
+        self.assertFalse(tsls.is_task_pending())
+        self.assertFalse(tsls.is_task_dispatched())
+
+    def test_filter_tasks_by_status_uses_current_status(self):
+        other_task = Task.objects.create(name='other-task')
+        TaskStatusLogService(self.task).log_status_update(TaskStatus.QUEUED)
+        TaskStatusLogService(other_task).log_status_update(TaskStatus.COMPLETED)
+        tasks = TaskStatusLogService.filter_tasks_by_status(Task.objects.all(), [TaskStatus.QUEUED])
+        self.assertListEqual(list(tasks), [self.task])
+
+    def test_refresh_current_status_recomputes_from_status_history(self):
+        ts = timezone.now()
+        StatusHistoryPoint.objects.create(task=self.task, status=TaskStatus.SUBMITTED, created_at=ts)
+        StatusHistoryPoint.objects.create(task=self.task, status=TaskStatus.APPROVED, created_at=ts)
+        TaskStatusLogService.refresh_current_status(Task.objects.filter(pk=self.task.pk))
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.current_status, TaskStatus.APPROVED)
+        self.assertEqual(self.task.current_status_at, ts)
+
+    @patch('api.services.QuotasLedgerService.release')
+    def test_refresh_current_status_releases_only_pending_tasks_in_a_final_status(self, release_mock):
+        ts = timezone.now()
+        terminated_task = Task.objects.create(name='terminated-task')
+        StatusHistoryPoint.objects.create(task=self.task, status=TaskStatus.RUNNING, created_at=ts)
+        StatusHistoryPoint.objects.create(task=terminated_task, status=TaskStatus.COMPLETED, created_at=ts)
+
+        TaskStatusLogService.refresh_current_status(Task.objects.all())
+
+        release_mock.assert_called_once_with([terminated_task.pk])
+
+    def test_update_live_data_inserts_only_new_statuses(self):
+        ts = timezone.now()
+        tsls = TaskStatusLogService(self.task)
+        tsls.log_status_update(TaskStatus.QUEUED, created_at=ts)
+
+        tsls.update_live_data([(TaskStatus.QUEUED, ts + timedelta(seconds=1)), (TaskStatus.RUNNING, ts)])
+        tsls.update_live_data([(TaskStatus.RUNNING, ts + timedelta(seconds=2))])
+
+        points = StatusHistoryPoint.objects.filter(task=self.task).order_by('status')
+        self.assertListEqual([(p.status, p.created_at) for p in points], [(TaskStatus.QUEUED, ts),
+                                                                          (TaskStatus.RUNNING, ts)])
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.current_status, TaskStatus.RUNNING)
+        self.assertEqual(self.task.current_status_at, ts)
+
+
+class TaskServiceApplyLiveDataTestCase(TestCase):
+
+    def setUp(self):
+        self.tasks = [Task.objects.create(name=f'task{i}', backend_ref=f'ref{i}') for i in range(10)]
+        TaskStatusLogService.log_status_update_many(self.tasks, TaskStatus.QUEUED)
+
+    def test_apply_live_data_writes_with_a_constant_number_of_statements(self):
+        ts = timezone.now()
+        live_data_map = {
+            t.backend_ref: LiveExecutionData(
+                status_history=[(TaskStatus.QUEUED, ts), (TaskStatus.RUNNING, ts)][:1 + i % 2], events_cursor=2
+            ) for i, t in enumerate(self.tasks)
+        }
+
+        # Savepoint, insert of the status history points, update of the tasks and savepoint release
+        with self.assertNumQueries(4):
+            transitioned_tasks = TaskService.apply_live_data(self.tasks, live_data_map)
+
+        self.assertListEqual(transitioned_tasks, self.tasks[1::2])
+        self.assertEqual(StatusHistoryPoint.objects.filter(status=TaskStatus.RUNNING).count(), 5)
+        for i, task in enumerate(Task.objects.order_by('id')):
+            self.assertEqual(task.current_status, TaskStatus.RUNNING if i % 2 else TaskStatus.QUEUED)
+            self.assertEqual(task.latest_update is not None, bool(i % 2))
+            self.assertEqual(task.events_cursor, 2)
+
+    def test_apply_live_data_does_not_move_concurrently_updated_status_backwards(self):
+        Task.objects.filter(pk=self.tasks[0].pk).update(current_status=TaskStatus.CANCELED)
+
+        TaskService.apply_live_data(self.tasks[:1], {
+            'ref0': LiveExecutionData(status_history=[(TaskStatus.RUNNING, timezone.now())])
+        })
+
+        self.tasks[0].refresh_from_db()
+        self.assertEqual(self.tasks[0].current_status, TaskStatus.CANCELED)
+
+    def test_apply_live_data_persists_logs_of_terminated_executions(self):
+        for order in range(2):
+            Executor.objects.create(task=self.tasks[0], order=order, command=['echo'], image='alpine')
+
+        TaskService.apply_live_data(self.tasks[:1], {'ref0': LiveExecutionData(
+            status_history=[(TaskStatus.COMPLETED, timezone.now())], stdout=['out0', 'out1'], stderr=['err0'],
+            is_final=True
+        )})
+
+        self.assertListEqual(
+            list(ExecutorOutputLog.objects.filter(executor__task=self.tasks[0]).order_by('executor__order')
+                 .values_list('stdout', 'stderr')),
+            [('out0', 'err0'), ('out1', '')]
+        )
+
+    @override_settings(EXECUTIONS_SYNCHRONIZATION={**settings.EXECUTIONS_SYNCHRONIZATION, 'MAX_LIVE_DATA_MISSES': 2})
+    def test_apply_live_data_retries_missing_executions_before_marking_them_unknown(self):
+        live_data_map = {'ref1': LiveExecutionData(status_history=[(TaskStatus.RUNNING, timezone.now())])}
+
+        TaskService.apply_live_data(self.tasks[:2], live_data_map)
+        self.tasks[0].refresh_from_db()
+        self.assertEqual((self.tasks[0].current_status, self.tasks[0].live_data_misses), (TaskStatus.QUEUED, 1))
+        first_retry_at = self.tasks[0].next_check_at
+
+        TaskService.apply_live_data(self.tasks[:2], live_data_map)
+        self.tasks[0].refresh_from_db()
+        self.assertEqual((self.tasks[0].current_status, self.tasks[0].live_data_misses), (TaskStatus.UNKNOWN, 2))
+        self.assertGreater(self.tasks[0].next_check_at - first_retry_at, timedelta(seconds=1))
+        self.assertTrue(StatusHistoryPoint.objects.filter(task=self.tasks[0], status=TaskStatus.UNKNOWN).exists())
+
+        # Executions found in the live data are applied regardless of the missing ones
+        self.tasks[1].refresh_from_db()
+        self.assertEqual((self.tasks[1].current_status, self.tasks[1].live_data_misses), (TaskStatus.RUNNING, 0))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class TaskServiceLogsTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        app_service = AuthEntity.objects.create(username='as', entity_type=AuthEntityType.APPLICATION_SERVICE)
+        cls.context = Context.objects.create(owner=app_service, name='context')
+        cls.user = AuthEntity.objects.create(username='user', parent=app_service)
+
+    def setUp(self):
+        self.task = Task.objects.create(name='task', context=self.context, user=self.user, backend_ref='ref',
+                                        manager_name='default')
+        for order in range(2):
+            executor = Executor.objects.create(task=self.task, order=order, command=['echo'], image='alpine')
+            ExecutorOutputLog.objects.create(executor=executor, stdout=f'out{order}', stderr=f'err{order}')
+        self.task_service = TaskService(context=self.context, auth_entity=self.user)
+
+    @patch('api.services.get_manager')
+    def test_get_task_stdout_of_terminated_task_is_served_from_the_db(self, get_manager_mock):
+        TaskStatusLogService.log_status_update_many([self.task], TaskStatus.COMPLETED)
+
+        self.assertListEqual(self.task_service.get_task_stdout(self.task.uuid), ['out0', 'out1'])
+        self.assertListEqual(self.task_service.get_task_stderr(self.task.uuid), ['err0', 'err1'])
+        get_manager_mock.assert_not_called()
+
+    @patch('api.services.get_manager')
+    def test_get_task_stdout_of_running_task_is_served_from_the_manager_and_cached(self, get_manager_mock):
+        TaskStatusLogService.log_status_update_many([self.task], TaskStatus.RUNNING)
+        get_manager_mock.return_value.get_stdout.return_value = ['live0']
+
+        for _ in range(2):
+            self.assertListEqual(self.task_service.get_task_stdout(self.task.uuid), ['live0'])
+        get_manager_mock.return_value.get_stdout.assert_called_once_with('ref')
+
+    @patch('api.services.get_manager')
+    def test_get_task_stdout_of_running_task_falls_back_to_the_db(self, get_manager_mock):
+        TaskStatusLogService.log_status_update_many([self.task], TaskStatus.RUNNING)
+        get_manager_mock.return_value.get_stdout.side_effect = ApplicationMissingExecutionError('missing')
+        get_manager_mock.return_value.get_stderr.side_effect = ConnectionError('unavailable')
+
+        self.assertListEqual(self.task_service.get_task_stdout(self.task.uuid), ['out0', 'out1'])
+        with self.assertLogs('api.services', level='WARNING'):
+            self.assertListEqual(self.task_service.get_task_stderr(self.task.uuid), ['err0', 'err1'])
+
+
+    @patch('api.services.get_manager')
+    def test_task_log_reader_reads_ranges_of_running_task_from_the_manager(self, get_manager_mock):
+        TaskStatusLogService.log_status_update_many([self.task], TaskStatus.RUNNING)
+        get_manager_mock.return_value.get_stdout.return_value = ['live0', 'live1 output']
+
+        reader = self.task_service.get_task_log_reader(self.task.uuid, 'stdout', 1)
+        self.assertEqual(reader.get_size(), 12)
+        self.assertEqual(reader.read(6, 3), b'out')
+        self.assertListEqual(list(reader.iter_chunks(6)), [b'output'])
+
+class TaskServiceSubmitTaskTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        app_service = AuthEntity.objects.create(username='as', entity_type=AuthEntityType.APPLICATION_SERVICE)
+        cls.context = Context.objects.create(owner=app_service, name='context')
+        cls.user = AuthEntity.objects.create(username='user', parent=app_service)
+        Participation.objects.create(user=cls.user, context=cls.context)
+        Tag.objects.create(value='existing')
+
+    @staticmethod
+    def _get_task_definition(n_executors: int) -> dict:
+        return {
+            'name': 'task',
+            'executors': [
+                {
+                    'image': 'ubuntu:latest',
+                    'command': ['echo', str(i)],
+                    'envs': [{'key': 'A', 'value': str(i)}, {'key': 'B', 'value': str(i)}]
+                }
+                for i in range(n_executors)
+            ],
+            'inputs': [{'url': '/host/input', 'path': '/data/input', 'type': MountPointTypes.FILE}],
+            'outputs': [{'url': '/host/output', 'path': '/data/output', 'type': MountPointTypes.DIRECTORY}],
+            'volumes': ['/data/volume'],
+            'tags': ['existing', 'new', 'new']
+        }
+
+    @patch('api.services.get_task_manager', return_value=None)
+    def test_submit_task_stores_related_entities(self, _):
+        task_service = TaskService(context=self.context, auth_entity=self.user)
+        task = task_service.submit_task(**self._get_task_definition(3))
+
+        executors = list(task.executors.order_by('order'))
+        self.assertListEqual([e.order for e in executors], [1, 2, 3])
+        self.assertListEqual([e.command for e in executors], [['echo', '0'], ['echo', '1'], ['echo', '2']])
+        for i, executor in enumerate(executors):
+            self.assertSetEqual({(env.key, env.value) for env in executor.envs.all()}, {('A', str(i)), ('B', str(i))})
+        self.assertEqual(task.inputs.count(), 1)
+        self.assertEqual(task.outputs.count(), 1)
+        self.assertListEqual([v.path for v in task.volumes.all()], ['/data/volume'])
+        self.assertSetEqual({t.value for t in task.tags.all()}, {'existing', 'new'})
+        self.assertEqual(Tag.objects.count(), 2)
+
+    @patch('api.services.get_manager')
+    @patch('api.services.get_task_manager', return_value='manager')
+    def test_submit_tasks_dispatches_batch_with_a_single_manager_call(self, _, get_manager_mock):
+        UserProfile.objects.create(user=self.user, fs_user_dir='user')
+        manager = MagicMock()
+        manager.submit_many.side_effect = lambda manifests: [f'ref{i}' for i in range(len(manifests))]
+        get_manager_mock.return_value = manager
+
+        task_service = TaskService(context=self.context, auth_entity=self.user)
+        tasks = task_service.submit_tasks([self._get_task_definition(i + 1) for i in range(3)])
+
+        manager.submit_many.assert_called_once()
+        manager.submit.assert_not_called()
+        self.assertEqual(len(manager.submit_many.call_args.args[0]), 3)
+        for i, task in enumerate(tasks):
+            task.refresh_from_db()
+            self.assertEqual(task.backend_ref, f'ref{i}')
+            self.assertEqual(task.manager_name, 'manager')
+            self.assertEqual(task.current_status, TaskStatus.QUEUED)
+            self.assertEqual(task.executors.count(), i + 1)
+
+    @patch('api.services.get_task_manager', return_value=None)
+    def test_submit_task_issues_a_fixed_number_of_queries_regardless_of_task_size(self, _):
+        TaskService(context=self.context, auth_entity=self.user).submit_task(**self._get_task_definition(1))
+        for n_executors in (1, 20):
+            context = Context.objects.get(pk=self.context.pk)
+            task_service = TaskService(context=context, auth_entity=self.user)
+            # The quotas are admitted with a conditional update of each of the context and participation ledgers
+            with self.assertNumQueries(20):
+                task_service.submit_task(**self._get_task_definition(n_executors))
+
+    @patch('api.services.get_task_manager', return_value=None)
+    def test_first_submission_creates_and_reconciles_the_quotas_ledgers(self, _):
+        # The conditional update of the context ledger misses; then each ledger is looked up, created, locked,
+        # reconciled (aggregated and saved) and updated
+        with self.assertNumQueries(31):
+            TaskService(context=self.context, auth_entity=self.user).submit_task(**self._get_task_definition(1))
+        participation = Participation.objects.get(context=self.context, user=self.user)
+        self.assertEqual(participation.quotas_ledger.total_tasks, 1)
+        self.assertEqual(self.context.quotas_ledger.total_tasks, 1)
@@ -1,11 +1,12 @@
 from django.urls import path
 
 from api.views import UserQuotasAPIView, TasksListCreateAPIView, TaskRetrieveAPIView, TaskStdoutAPIView, \
-    TaskStderrAPIView, UserContextInfoAPIView, TaskCancelAPIView
+    TaskStderrAPIView, UserContextInfoAPIView, TaskCancelAPIView, TasksBatchCreateAPIView
 from api_auth.views import ContextsAPIView, ContextDetailsAPIView
 
 urlpatterns = [
     path(r'tasks', TasksListCreateAPIView.as_view(), name='tasks'),
+    path(r'tasks/batch', TasksBatchCreateAPIView.as_view(), name='tasks_batch'),
     path(r'tasks/<uuid:uuid>', TaskRetrieveAPIView.as_view(), name='tasks2'),
     path(r'tasks/<uuid:uuid>/stdout', TaskStdoutAPIView.as_view(), name='task_stdout'),
     path(r'tasks/<uuid:uuid>/stderr', TaskStderrAPIView.as_view(), name='task_stderr'),
@@ -1,3 +1,8 @@
+from typing import List, Optional
+
+from django.db.models import Case, IntegerField, Value, When
+
+from api.constants import STATUS_PRECEDENCE, TaskStatus
 from core.apps import MANAGERS
 from core.managers.base import BaseExecutionManager
 from core.utils import get_manager
@@ -5,3 +10,19 @@ from core.utils import get_manager
 
 def get_task_manager() -> str:
     return MANAGERS['tasks']
+
+
+def get_status_precedence(field: str = 'status') -> Case:
+    """Expression of the precedence of the statuses of a field, for ordering status histories by `STATUS_PRECEDENCE`"""
+    return Case(
+        *[When(**{field: status}, then=Value(precedence)) for status, precedence in STATUS_PRECEDENCE.items()],
+        output_field=IntegerField()
+    )
+
+
+def get_preceding_statuses(status: TaskStatus) -> List[TaskStatus]:
+    return [s for s, precedence in STATUS_PRECEDENCE.items() if precedence < STATUS_PRECEDENCE[status]]
+
+
+def supersedes(status: TaskStatus, current_status: Optional[TaskStatus]) -> bool:
+    return current_status is None or STATUS_PRECEDENCE[status] > STATUS_PRECEDENCE[current_status]
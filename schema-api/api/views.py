@@ -1,6 +1,9 @@
 import logging
+import re
+from typing import Optional, Tuple
 
 from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
 from django_filters import rest_framework as filters
 from drf_spectacular.extensions import OpenApiAuthenticationExtension
 from drf_spectacular.types import OpenApiTypes
@@ -15,7 +18,7 @@ from api.constants import TaskStatus
 from api.filtersets import TaskFilter
 from api.models import Task
 from api.serializers import TaskSerializer, TasksListQPSerializer, TasksBasicListSerializer, \
-    TasksDetailedListSerializer, TasksFullListSerializer
+    TasksDetailedListSerializer, TasksFullListSerializer, TaskLogsQPSerializer
 from api.services import TaskService
 from api_auth.auth import ApiTokenAuthentication
 from api_auth.permissions import IsUser, IsActive, IsContextMember
@@ -359,6 +362,74 @@ class TasksListCreateAPIView(ListCreateAPIView):
         return Response(status=status.HTTP_201_CREATED, data=stored_data)
 
 
+class TasksBatchCreateAPIView(APIView):
+    authentication_classes = [ApiTokenAuthentication] if settings.USE_AUTH else []
+    permission_classes = [IsAuthenticated, IsUser, IsActive, IsContextMember] if settings.USE_AUTH else []
+
+    @extend_schema(
+        summary='Submit a batch of task execution requests.',
+        description='Creates multiple task requests for execution with a single request. Quotas are evaluated against '
+                    'the whole batch; either all tasks are accepted or none is.',
+        tags=['Task'],
+        request=TaskSerializer(many=True),
+        examples=[
+            OpenApiExample(
+                'valid-task-batch-input-0',
+                summary='Valid: minimal example',
+                description='A batch of two tasks that define the minimum required information for them to be valid.',
+                value=[
+                    {
+                        'name': 'hello world',
+                        'executors': [
+                            {
+                                'command': ['echo', 'hello_world'],
+                                'image': 'ubuntu:latest'
+                            }
+                        ]
+                    },
+                    {
+                        'name': 'goodbye world',
+                        'executors': [
+                            {
+                                'command': ['echo', 'goodbye_world'],
+                                'image': 'ubuntu:latest'
+                            }
+                        ]
+                    }
+                ],
+                request_only=True,
+                response_only=False
+            )
+        ],
+        responses={
+            201: OpenApiResponse(
+                description='Task requests were accepted. Response will contain the UUID and current status of each '
+                            'task, in the order in which the tasks were given.',
+                response=TasksBasicListSerializer(many=True)
+            ),
+            400: OpenApiResponse(
+                description='Some of the task requests were invalid. Response will contain information about potential '
+                            'errors in each of the requests, in the order in which the tasks were given.'
+            ),
+            401: OpenApiResponse(
+                description='Authentication failed. Perhaps no API token was provided in the `Authorization` header, '
+                            'or the API token was invalid.'
+            ),
+            403: OpenApiResponse(
+                description='The batch of task requests would violate the applied quotas.'
+            )
+        }
+    )
+    def post(self, request, **kwargs):
+        serializer = TaskSerializer(data=request.data, many=True, allow_empty=False,
+                                    max_length=settings.TASK_BATCH_MAX_SIZE)
+        serializer.is_valid(raise_exception=True)
+        task_service = TaskService(context=request.context,
+                                   auth_entity=request.user) if settings.USE_AUTH else TaskService()
+        tasks = task_service.submit_tasks(serializer.validated_data)
+        return Response(status=status.HTTP_201_CREATED, data=TasksBasicListSerializer(tasks, many=True).data)
+
+
 class TaskRetrieveAPIView(RetrieveAPIView):
     authentication_classes = [ApiTokenAuthentication] if settings.USE_AUTH else []
     permission_classes = [IsAuthenticated, IsUser, IsActive, IsContextMember] if settings.USE_AUTH else []
@@ -542,7 +613,104 @@ class TaskRetrieveAPIView(RetrieveAPIView):
         return Response(status=status.HTTP_200_OK, data=task_serializer.data)
 
 
-class TaskStdoutAPIView(APIView):
+task_logs_parameters = [
+    OpenApiParameter('executor', OpenApiTypes.INT, OpenApiParameter.QUERY,
+                     description='Index of an executor of the task, to retrieve only its log, as plain text. Ranges '
+                                 'of the log can be requested through the `offset` and `limit` parameters or through '
+                                 'a `Range` header; otherwise the whole log is streamed.', required=False),
+    OpenApiParameter('offset', OpenApiTypes.INT, OpenApiParameter.QUERY,
+                     description='Offset, in bytes, of the first byte of the executor\'s log to return',
+                     required=False),
+    OpenApiParameter('limit', OpenApiTypes.INT, OpenApiParameter.QUERY,
+                     description='Maximum number of bytes of the executor\'s log to return', required=False),
+    OpenApiParameter('follow', OpenApiTypes.BOOL, OpenApiParameter.QUERY,
+                     description='Keep streaming the executor\'s log, as it is produced, until the task terminates or '
+                                 'the following times out. Followers poll the log for as long as they stream, so their '
+                                 'number is limited and requests beyond the limit are throttled.',
+                     required=False),
+    OpenApiParameter('Range', OpenApiTypes.STR, OpenApiParameter.HEADER,
+                     description='Single byte range of the executor\'s log to return, e.g. `bytes=0-1023`',
+                     required=False)
+]
+
+
+class TaskExecutorLogMixin:
+    stream = None
+    content_type = 'text/plain; charset=utf-8'
+    range_pattern = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+    def parse_range(self, range_header: str, size: int) -> Optional[Tuple[int, int]]:
+        """Parse a single byte range of a `Range` header, as an offset and a length within a log of the given size
+
+        Headers that do not specify a single byte range are ignored, in which case None is returned.
+
+        Raises:
+            ValueError: if the range cannot be satisfied
+        """
+        match = self.range_pattern.match(range_header.strip())
+        if not match or not any(match.groups()):
+            return None
+
+        first, last = match.groups()
+        if not first:
+            # Suffix ranges request the last bytes of the log
+            start, end = max(size - int(last), 0), size - 1
+        else:
+            start, end = int(first), min(int(last), size - 1) if last else size - 1
+        if start >= size or end < start:
+            raise ValueError(f'Range "{range_header}" cannot be satisfied by a log of {size} bytes')
+        return start, min(end - start + 1, settings.TASK_LOGS['MAX_PAGE_SIZE'])
+
+    def get_task_log_response(self, request, uuid):
+        task_logs_query_params_serializer = TaskLogsQPSerializer(data=request.query_params.dict())
+        task_logs_query_params_serializer.is_valid(raise_exception=True)
+        query_params = task_logs_query_params_serializer.validated_data
+        if 'executor' in query_params:
+            return self.get_executor_log_response(request, uuid, query_params)
+
+        task_service = TaskService(context=request.context, auth_entity=request.user)
+        try:
+            task_logs = getattr(task_service, f'get_task_{self.stream}')(uuid)
+        except Task.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND, data={'message': f'No task was found with UUID "{uuid}"'})
+        return Response(status=status.HTTP_200_OK, data={self.stream: task_logs})
+
+    def get_executor_log_response(self, request, uuid, query_params: dict):
+        task_service = TaskService(context=request.context, auth_entity=request.user)
+        reader = task_service.get_task_log_reader(uuid, self.stream, query_params['executor'])
+
+        if query_params['follow']:
+            return StreamingHttpResponse(reader.follow(query_params['offset']), content_type=self.content_type)
+
+        range_header = request.headers.get('Range')
+        if range_header:
+            size = reader.get_size()
+            try:
+                byte_range = self.parse_range(range_header, size)
+            except ValueError:
+                response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+                response['Content-Range'] = f'bytes */{size}'
+                return response
+            if byte_range is not None:
+                start, length = byte_range
+                response = HttpResponse(reader.read(start, length), status=status.HTTP_206_PARTIAL_CONTENT,
+                                        content_type=self.content_type)
+                response['Content-Range'] = f'bytes {start}-{start + length - 1}/{size}'
+                response['Accept-Ranges'] = 'bytes'
+                return response
+
+        if 'limit' in query_params:
+            response = HttpResponse(reader.read(query_params['offset'], query_params['limit']),
+                                    content_type=self.content_type)
+        else:
+            response = StreamingHttpResponse(reader.aiter_chunks(query_params['offset']),
+                                             content_type=self.content_type)
+        response['Accept-Ranges'] = 'bytes'
+        return response
+
+
+class TaskStdoutAPIView(TaskExecutorLogMixin, APIView):
+    stream = 'stdout'
     authentication_classes = [ApiTokenAuthentication] if settings.USE_AUTH else []
     permission_classes = [IsAuthenticated, IsUser, IsActive, IsContextMember] if settings.USE_AUTH else []
 
@@ -554,7 +722,8 @@ class TaskStdoutAPIView(APIView):
         parameters=[
             OpenApiParameter('uuid', OpenApiTypes.UUID, OpenApiParameter.PATH,
                              description='UUID of the target task that was assigned during submission', required=True,
-                             allow_blank=False, many=False, )
+                             allow_blank=False, many=False, ),
+            *task_logs_parameters
         ],
         responses={
             200: OpenApiResponse(
@@ -585,6 +754,9 @@ class TaskStdoutAPIView(APIView):
                     )
                 ]
             ),
+            206: OpenApiResponse(
+                description='Requested byte range of the stdout of the specified executor is returned, as plain text'
+            ),
             400: OpenApiResponse(
                 description='Request was invalid. Response will contain information about potential errors in the '
                             'request.'
@@ -594,20 +766,22 @@ class TaskStdoutAPIView(APIView):
                             'or the API token was invalid.'
             ),
             404: OpenApiResponse(
-                description='Given UUID does not match an existing task'
+                description='Given UUID does not match an existing task or executor'
+            ),
+            416: OpenApiResponse(
+                description='Requested byte range is beyond the end of the stdout of the specified executor'
+            ),
+            429: OpenApiResponse(
+                description='Too many clients already follow logs; the stdout can be followed once one of them stops'
             )
         }
     )
     def get(self, request, uuid):
-        task_service = TaskService(context=request.context, auth_entity=request.user)
-        try:
-            task_stdout = task_service.get_task_stdout(uuid)
-        except Task.DoesNotExist:
-            return Response(status=status.HTTP_404_NOT_FOUND, data={'message': f'No task was found with UUID "{uuid}"'})
-        return Response(status=status.HTTP_200_OK, data={'stdout': task_stdout})
+        return self.get_task_log_response(request, uuid)
 
 
-class TaskStderrAPIView(APIView):
+class TaskStderrAPIView(TaskExecutorLogMixin, APIView):
+    stream = 'stderr'
     authentication_classes = [ApiTokenAuthentication] if settings.USE_AUTH else []
     permission_classes = [IsAuthenticated, IsUser, IsActive, IsContextMember] if settings.USE_AUTH else []
 
@@ -619,7 +793,8 @@ class TaskStderrAPIView(APIView):
         parameters=[
             OpenApiParameter('uuid', OpenApiTypes.UUID, OpenApiParameter.PATH,
                              description='UUID of the target task that was assigned during submission', required=True,
-                             allow_blank=False, many=False, )
+                             allow_blank=False, many=False, ),
+            *task_logs_parameters
         ],
         responses={
             200: OpenApiResponse(
@@ -637,6 +812,9 @@ class TaskStderrAPIView(APIView):
                     )
                 ]
             ),
+            206: OpenApiResponse(
+                description='Requested byte range of the stderr of the specified executor is returned, as plain text'
+            ),
             400: OpenApiResponse(
                 description='Request was invalid. Response will contain information about potential errors in the '
                             'request.'
@@ -646,17 +824,18 @@ class TaskStderrAPIView(APIView):
                             'or the API token was invalid.'
             ),
             404: OpenApiResponse(
-                description='Given UUID does not match an existing task'
+                description='Given UUID does not match an existing task or executor'
+            ),
+            416: OpenApiResponse(
+                description='Requested byte range is beyond the end of the stderr of the specified executor'
+            ),
+            429: OpenApiResponse(
+                description='Too many clients already follow logs; the stderr can be followed once one of them stops'
             )
         }
     )
     def get(self, request, uuid):
-        task_service = TaskService(context=request.context, auth_entity=request.user)
-        try:
-            task_stderr = task_service.get_task_stderr(uuid)
-        except Task.DoesNotExist:
-            return Response(status=status.HTTP_404_NOT_FOUND, data={'message': f'No task was found with UUID "{uuid}"'})
-        return Response(status=status.HTTP_200_OK, data={'stderr': task_stderr})
+        return self.get_task_log_response(request, uuid)
 
 
 class TaskCancelAPIView(APIView):
@@ -1,12 +1,38 @@
+from dataclasses import dataclass
+from typing import Optional
+
 from django.conf import settings
 from rest_framework import exceptions
 from rest_framework.authentication import BaseAuthentication, get_authorization_header
 from django.utils.translation import gettext_lazy as _
 
-from api_auth.models import ApiToken
+from api.models import Context, Participation
+from api_auth.constants import AuthEntityType
+from api_auth.models import ApiToken, AuthEntity
 from api_auth.services import ApiTokenService
 
 
+@dataclass(frozen=True)
+class Principal:
+    """
+    The entities resolved by authentication, loaded along with the API token, so that permissions can be evaluated
+    without querying the database.
+    """
+    auth_entity: AuthEntity
+    participation: Optional[Participation] = None
+
+    @property
+    def context(self) -> Optional[Context]:
+        return self.participation.context if self.participation is not None else None
+
+    @property
+    def is_active(self) -> bool:
+        is_active = self.auth_entity.is_active
+        if self.auth_entity.entity_type == AuthEntityType.USER:
+            is_active &= (self.auth_entity.parent is None or self.auth_entity.parent.is_active)
+        return is_active
+
+
 class ApiTokenAuthentication(BaseAuthentication):
     def authenticate(self, request):
         header = get_authorization_header(request).split()
@@ -36,5 +62,6 @@ class ApiTokenAuthentication(BaseAuthentication):
             request.context = authenticated[1].context
         else:
             user = authenticated[0]
+        request.principal = Principal(user, authenticated[1])
 
         return user, token
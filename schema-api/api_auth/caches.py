@@ -0,0 +1,61 @@
+"""
+Cache of resolved API tokens
+
+Tokens are cached by their digest, along with the entities that they authenticate, in a local LRU cache of each process
+and, when caching is enabled, in the shared default cache. Entries are invalidated when the tokens, or the entities that
+they authenticate, are updated; since the local caches of other processes cannot be invalidated, local entries expire
+after a shorter timeout, which bounds how long a revoked token may still be accepted.
+"""
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from api_auth.models import ApiToken
+
+
+def _get_cache_key(digest: str) -> str:
+    return f'api-tokens:{digest}'
+
+
+def _get_timeout(api_token: ApiToken, timeout: int) -> int:
+    return max(min(timeout, int((api_token.expiry - timezone.now()).total_seconds())), 0)
+
+
+def get_api_token(digest: str) -> Optional[ApiToken]:
+    key = _get_cache_key(digest)
+    local_cache = caches[settings.API_TOKEN_CACHE['LOCAL_CACHE']]
+
+    api_token = local_cache.get(key)
+    if api_token is None:
+        api_token = caches['default'].get(key)
+        if api_token is None:
+            return None
+        local_cache.set(key, api_token, timeout=_get_timeout(api_token, settings.API_TOKEN_CACHE['LOCAL_TIMEOUT']))
+
+    # Timeouts are rounded down to whole seconds, so the expiry is checked on each hit as well
+    if api_token.expiry <= timezone.now():
+        return None
+    return api_token
+
+
+def set_api_token(api_token: ApiToken) -> None:
+    key = _get_cache_key(api_token.digest)
+    caches['default'].set(key, api_token, timeout=_get_timeout(api_token, settings.API_TOKEN_CACHE['TIMEOUT']))
+    caches[settings.API_TOKEN_CACHE['LOCAL_CACHE']].set(
+        key, api_token, timeout=_get_timeout(api_token, settings.API_TOKEN_CACHE['LOCAL_TIMEOUT'])
+    )
+
+
+def invalidate_api_tokens(api_tokens: QuerySet[ApiToken]) -> None:
+    """Remove API tokens from the cache
+
+    Args:
+        api_tokens (QuerySet[ApiToken]): the API tokens to remove; only their digests are retrieved
+    """
+    keys = [_get_cache_key(digest) for digest in api_tokens.values_list('digest', flat=True)]
+    if keys:
+        caches['default'].delete_many(keys)
+        caches[settings.API_TOKEN_CACHE['LOCAL_CACHE']].delete_many(keys)
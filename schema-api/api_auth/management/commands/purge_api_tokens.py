@@ -0,0 +1,33 @@
+import logging.config
+from argparse import ArgumentParser
+from typing import Any, Dict
+
+from django.utils import timezone
+
+from api_auth.services import ApiTokenService
+from util.commands import ApplicationBaseCommand
+from util.datetime import parse_duration
+from util.logging import get_logging_config, get_logging_level_by_verbosity
+
+logging.config.dictConfig(get_logging_config())
+logger = logging.getLogger(__name__)
+
+
+class Command(ApplicationBaseCommand):
+    help = 'Delete API tokens that expired longer ago than a retention period'
+
+    def add_arguments(self, parser: ArgumentParser):
+        parser.add_argument('-r', '--retention', help='Period for which expired tokens are retained, e.g. "30d"',
+                            default='30d')
+        parser.add_argument('-b', '--batch-size', help='Number of tokens deleted in each transaction', type=int,
+                            default=1000)
+
+    def handle(self, *args, **options: Dict[str, Any]):
+        logger.setLevel(get_logging_level_by_verbosity(options['verbosity']))
+
+        if options['batch_size'] < 1:
+            raise ValueError('Batch size must be greater than or equal to 1')
+
+        expired_before = timezone.now() - parse_duration(options['retention'])
+        n_tokens = ApiTokenService.purge_tokens(expired_before, batch_size=options['batch_size'])
+        logger.info(f'Deleted {n_tokens} API tokens that expired before {expired_before.isoformat()}')
@@ -121,6 +121,10 @@ class ApiToken(models.Model):
                                        error_context={'field': 'expiry'}
                                        )
         ]
+        indexes = [
+            # Authentication only looks up active tokens by their key
+            models.Index(fields=['key', 'expiry'], condition=Q(is_active=True), name='api_token_active_key_idx')
+        ]
 
     def __str__(self):
         return f'{self.__class__.__name__}({self.uuid}'
@@ -1,11 +1,22 @@
+from typing import Optional
+
 from rest_framework.permissions import BasePermission
 
 from api.models import Participation, Context
 from api.services import ParticipationService
+from api_auth.auth import Principal
 from api_auth.models import AuthEntity
 from api_auth.constants import AuthEntityType
 
 
+def get_principal(request) -> Optional[Principal]:
+    # The principal is only consulted if it was resolved for the user of the request
+    principal = getattr(request, 'principal', None)
+    if principal is not None and principal.auth_entity is request.user:
+        return principal
+    return None
+
+
 class IsUser(BasePermission):
 
     def has_permission(self, request, view):
@@ -23,6 +34,10 @@ class IsApplicationService(BasePermission):
 class IsActive(BasePermission):
 
     def has_permission(self, request, view):
+        principal = get_principal(request)
+        if principal is not None:
+            return principal.is_active
+
         user: AuthEntity = request.user
         is_active = True
         if user.entity_type == AuthEntityType.USER:
@@ -40,6 +55,11 @@ class IsContextMember(BasePermission):
         except AttributeError:
             return False
 
+        # A principal authenticated by a participation is a member of the participation's context
+        principal = get_principal(request)
+        if principal is not None and principal.context is not None:
+            return principal.context.pk == context.pk
+
         try:
             ParticipationService(context=context).get_participation(user)
         except Participation.DoesNotExist:
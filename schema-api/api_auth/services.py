@@ -6,11 +6,12 @@ from cryptography.hazmat.primitives import hashes
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import transaction
-from django.db.models import QuerySet
+from django.db.models import QuerySet, Q
 from django.utils import timezone
 
 from api.models import Context, Participation
 from api.services import ParticipationService
+from api_auth import caches as api_token_cache
 from api_auth.constants import AuthEntityType
 from api_auth.models import UserProfile, ApiToken, AuthEntity
 from util.datetime import parse_duration
@@ -67,6 +68,11 @@ class AuthEntityService(BaseService):
         except ValidationError as ve:
             raise ApplicationErrorHelper.to_application_error(ve)
         auth_entity.save()
+
+        # Cached tokens hold a snapshot of the entities that they authenticate, including the parents of users
+        api_token_cache.invalidate_api_tokens(ApiToken.objects.filter(
+            Q(auth_entity=auth_entity) | Q(participation__user=auth_entity) | Q(participation__user__parent=auth_entity)
+        ))
         return auth_entity
 
     # Application service management methods
@@ -171,6 +177,7 @@ class AuthEntityService(BaseService):
         if profile_arguments:
             user_profile_service = UserProfileService(auth_entity)
             user_profile_service.update_user_profile(update_values=profile_arguments)
+            api_token_cache.invalidate_api_tokens(ApiToken.objects.filter(participation__user=auth_entity))
 
         return auth_entity
 
@@ -237,10 +244,39 @@ class ApiTokenService(BaseService):
     @staticmethod
     def authenticate(token: str) -> Union[Tuple[AuthEntity, None], Tuple[None, Participation]]:
         target_digest = ApiTokenService._hash_token(token)
-        target_key = token[:settings.TOKEN_KEY_LENGTH]
-        api_token = ApiToken.objects.filter(key=target_key, is_active=True, expiry__gt=timezone.now()).get(digest=target_digest)
+        api_token = api_token_cache.get_api_token(target_digest)
+        if api_token is None:
+            target_key = token[:settings.TOKEN_KEY_LENGTH]
+            # The authenticated entities are loaded along with the token, to be cached with it
+            candidates = ApiToken.objects.select_related(
+                'auth_entity__parent', 'participation__user__parent', 'participation__user__profile',
+                'participation__context'
+            ).filter(key=target_key, is_active=True, expiry__gt=timezone.now())
+            # Digests are compared in constant time, rather than in the lookup, to not leak how much of them matched
+            api_token = next((t for t in candidates if secrets.compare_digest(t.digest, target_digest)), None)
+            if api_token is None:
+                raise ApiToken.DoesNotExist('No active API token matches the given token')
+            api_token_cache.set_api_token(api_token)
         return api_token.auth_entity, api_token.participation
 
+    @staticmethod
+    def purge_tokens(expired_before: datetime, batch_size: int = 1000) -> int:
+        """Delete API tokens that expired before a given timestamp, in batches
+
+        Args:
+            expired_before (datetime): the timestamp before which tokens must have expired to be deleted
+            batch_size (int): the number of tokens deleted in each transaction
+
+        Returns:
+            The number of deleted tokens
+        """
+        total = 0
+        while True:
+            pks = list(ApiToken.objects.filter(expiry__lt=expired_before).values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                return total
+            total += ApiToken.objects.filter(pk__in=pks).delete()[0]
+
     def __init__(self, auth_entity: AuthEntity, context: Context = None):
         if context is None:
             self.auth_entity, self.participation = auth_entity, None
@@ -327,6 +363,7 @@ class ApiTokenService(BaseService):
         except ValidationError as ve:
             raise ApplicationErrorHelper.to_application_error(ve)
         api_token.save()
+        api_token_cache.invalidate_api_tokens(ApiToken.objects.filter(pk=api_token.pk))
         return api_token
 
     def revoke_token(self, api_token: ApiToken = None, token_uuid: str = None):
@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.models import Context
+from api.services import ParticipationService
+from api_auth.auth import ApiTokenAuthentication
+from api_auth.constants import AuthEntityType
+from api_auth.models import AuthEntity
+from api_auth.permissions import IsUser, IsActive, IsContextMember
+from api_auth.services import ApiTokenService, AuthEntityService
+
+
+class ContextMemberPermissionsTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        app_service = AuthEntity.objects.create(username='as', entity_type=AuthEntityType.APPLICATION_SERVICE)
+        cls.context = Context.objects.create(owner=app_service, name='context')
+        cls.other_context = Context.objects.create(owner=app_service, name='other-context')
+        user = AuthEntityService(app_service).create_user('user')
+        ParticipationService(cls.context).add_to_context(user)
+        cls.token, _ = ApiTokenService(user, cls.context).issue_token(duration='1d')
+
+    def setUp(self):
+        caches[settings.API_TOKEN_CACHE['LOCAL_CACHE']].clear()
+
+    def _authenticate(self) -> Request:
+        request = Request(APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {self.token}'),
+                          authenticators=[ApiTokenAuthentication()])
+        request.user
+        return request
+
+    def test_permissions_of_context_members_are_evaluated_without_queries(self):
+        request = self._authenticate()
+
+        with self.assertNumQueries(0):
+            self.assertTrue(all(
+                permission().has_permission(request, None) for permission in (IsUser, IsActive, IsContextMember)
+            ))
+
+    def test_context_membership_is_limited_to_the_context_of_the_principal(self):
+        request = self._authenticate()
+        request.context = self.other_context
+
+        with self.assertNumQueries(0):
+            self.assertFalse(IsContextMember().has_permission(request, None))
@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase
+from django.utils import timezone
+
+from api.models import Context
+from api.services import ParticipationService
+from api_auth.constants import AuthEntityType
+from api_auth.models import ApiToken, AuthEntity
+from api_auth.services import ApiTokenService, AuthEntityService
+
+
+class ApiTokenServiceAuthenticateTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.app_service = AuthEntity.objects.create(username='as', entity_type=AuthEntityType.APPLICATION_SERVICE)
+        cls.context = Context.objects.create(owner=cls.app_service, name='context')
+        cls.user = AuthEntityService(cls.app_service).create_user('user')
+        ParticipationService(cls.context).add_to_context(cls.user)
+
+    def setUp(self):
+        caches[settings.API_TOKEN_CACHE['LOCAL_CACHE']].clear()
+        self.api_token_service = ApiTokenService(self.user, self.context)
+        self.token, self.api_token = self.api_token_service.issue_token(duration='1d')
+
+    def test_authenticate_resolves_cached_tokens_without_queries(self):
+        ApiTokenService.authenticate(self.token)
+
+        with self.assertNumQueries(0):
+            _, participation = ApiTokenService.authenticate(self.token)
+            self.assertEqual(participation.context, self.context)
+            self.assertTrue(participation.user.parent.is_active)
+            self.assertEqual(participation.user.profile.fs_user_dir, 'user')
+
+    def test_authenticate_rejects_revoked_tokens(self):
+        ApiTokenService.authenticate(self.token)
+        self.api_token_service.revoke_token(token_uuid=self.api_token.uuid)
+
+        with self.assertRaises(ApiToken.DoesNotExist):
+            ApiTokenService.authenticate(self.token)
+
+    def test_authenticate_resolves_disabled_users(self):
+        ApiTokenService.authenticate(self.token)
+        AuthEntityService(self.app_service).disable_user(username='user')
+
+        _, participation = ApiTokenService.authenticate(self.token)
+        self.assertFalse(participation.user.is_active)
+
+    def test_authenticate_resolves_disabled_application_services(self):
+        ApiTokenService.authenticate(self.token)
+        AuthEntityService.disable_application_service(username='as')
+
+        _, participation = ApiTokenService.authenticate(self.token)
+        self.assertFalse(participation.user.parent.is_active)
+
+    def test_authenticate_rejects_tokens_of_removed_participations(self):
+        ApiTokenService.authenticate(self.token)
+        ParticipationService(self.context).remove_from_context(self.user)
+
+        with self.assertRaises(ApiToken.DoesNotExist):
+            ApiTokenService.authenticate(self.token)
+
+    def test_authenticate_rejects_tokens_that_only_match_the_key(self):
+        forged_token = self.token[:settings.TOKEN_KEY_LENGTH] + '0' * (len(self.token) - settings.TOKEN_KEY_LENGTH)
+
+        with self.assertRaises(ApiToken.DoesNotExist):
+            ApiTokenService.authenticate(forged_token)
+
+
+class ApiTokenServicePurgeTokensTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.app_service = AuthEntity.objects.create(username='as', entity_type=AuthEntityType.APPLICATION_SERVICE)
+
+    def test_purge_tokens_deletes_tokens_expired_before_the_given_timestamp(self):
+        api_token_service = ApiTokenService(self.app_service)
+        now = timezone.now()
+        for days in (1, 10, 20, 40):
+            api_token_service.issue_token(created=now - timedelta(days=days + 1), expiry=now - timedelta(days=days))
+        _, active_api_token = api_token_service.issue_token(duration='1d')
+
+        self.assertEqual(ApiTokenService.purge_tokens(now - timedelta(days=5), batch_size=2), 3)
+        self.assertSetEqual(
+            {t.expiry for t in ApiToken.objects.all()}, {now - timedelta(days=1), active_api_token.expiry}
+        )
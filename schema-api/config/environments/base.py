@@ -139,6 +139,7 @@ AUTH_USER_MODEL = 'api_auth.AuthEntity'
 MIGRATION_MODULES = {
     'api': 'migrations.api',
     'api_auth': 'migrations.api_auth',
+    'core': 'migrations.core',
     'experiments': 'migrations.experiments',
     'files': 'migrations.files',
     'monitor': 'migrations.monitor',
@@ -172,6 +173,13 @@ CACHES = {
         },
     } if env.bool('SCHEMA_API_ENABLE_CACHE', False) else {
         "BACKEND": "django.core.cache.backends.dummy.DummyCache"
+    },
+    # Process-local LRU cache of resolved API tokens, in front of the default cache
+    'api-tokens': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {
+            'MAX_ENTRIES': env.int('SCHEMA_API_TOKEN_LOCAL_CACHE_MAX_ENTRIES', 10000)
+        }
     }
 }
 CACHE_TIMEOUT = env.int('SCHEMA_API_CACHE_TIMEOUT_SECONDS', 15)
@@ -1,8 +1,20 @@
 from config.env import env
 
 DISABLE_TASK_SCHEDULING = env.bool('SCHEMA_API_DISABLE_TASK_SCHEDULING', False)
+TASK_BATCH_MAX_SIZE = env.int('SCHEMA_API_TASK_BATCH_MAX_SIZE', 1000)
+TASK_RUNNING_LOGS_CACHE_TIMEOUT = env.int('SCHEMA_API_TASK_RUNNING_LOGS_CACHE_TIMEOUT_SECONDS', 5)
 UPDATE_STATE_ON_TASKS_LISTING = env.bool('SCHEMA_API_UPDATE_STATE_ON_TASKS_LISTING', False)
 
+TASK_LOGS = {
+    'CHUNK_SIZE': env.int('SCHEMA_API_TASK_LOGS_CHUNK_SIZE', 1024 * 1024),
+    'MAX_PAGE_SIZE': env.int('SCHEMA_API_TASK_LOGS_MAX_PAGE_SIZE', 16 * 1024 * 1024),
+    # Each follower of a log waits on the event loop for up to the timeout, yet polls the log at the interval, so the
+    # followers of each process are capped to bound the load of their polling
+    'FOLLOW_INTERVAL_SECONDS': env.int('SCHEMA_API_TASK_LOGS_FOLLOW_INTERVAL_SECONDS', 2),
+    'FOLLOW_TIMEOUT_SECONDS': env.int('SCHEMA_API_TASK_LOGS_FOLLOW_TIMEOUT_SECONDS', 60),
+    'MAX_FOLLOWERS': env.int('SCHEMA_API_TASK_LOGS_MAX_FOLLOWERS', 4)
+}
+
 TASK_API = {
     'TASK_API_CLASS': env.str('SCHEMA_API_TASK_API_CLASS', None),
     'GET_TASK_ENDPOINT': env.str('SCHEMA_API_TASK_API_GET_ENDPOINT', None),
@@ -27,6 +39,35 @@ TASK_DEFAULT_RESOURCES = {
 CONTEXT_NAME_SLUG_PATTERN = env.str('SCHEMA_API_CONTEXT_NAME_SLUG_PATTERN', None)
 CONTEXT_NAME_SLUG_PATTERN_VIOLATION_MESSAGE = env.str('SCHEMA_API_CONTEXT_NAME_SLUG_PATTERN_VIOLATION_MESSAGE', None)
 
+EXECUTIONS_SYNCHRONIZATION = {
+    'CHUNK_SIZE': env.int('SCHEMA_API_EXECUTIONS_SYNC_CHUNK_SIZE', 500),
+    'MAX_WORKERS': env.int('SCHEMA_API_EXECUTIONS_SYNC_MAX_WORKERS', 4),
+    'MAX_CONCURRENCY': env.int('SCHEMA_API_EXECUTIONS_SYNC_MAX_CONCURRENCY', 32),
+    'MIN_CHECK_INTERVAL_SECONDS': env.int('SCHEMA_API_EXECUTIONS_SYNC_MIN_CHECK_INTERVAL_SECONDS', 2),
+    'MAX_CHECK_INTERVAL_SECONDS': env.int('SCHEMA_API_EXECUTIONS_SYNC_MAX_CHECK_INTERVAL_SECONDS', 300),
+    'CHECK_BACKOFF_FACTOR': env.float('SCHEMA_API_EXECUTIONS_SYNC_CHECK_BACKOFF_FACTOR', 0.5),
+    'MAX_LIVE_DATA_MISSES': env.int('SCHEMA_API_EXECUTIONS_SYNC_MAX_LIVE_DATA_MISSES', 5)
+}
+
+WATCH_LEASES = {
+    'SHARDS': env.int('SCHEMA_API_WATCH_SHARDS', 64),
+    'TTL_SECONDS': env.int('SCHEMA_API_WATCH_LEASE_TTL_SECONDS', 60)
+}
+
+# Backend of the quotas ledgers, either 'database' or 'redis'
+QUOTAS_LEDGER = {
+    'BACKEND': env.str('SCHEMA_API_QUOTAS_LEDGER_BACKEND', 'database'),
+    'REDIS': {
+        'HOST': env.str('SCHEMA_API_QUOTAS_LEDGER_REDIS_HOST', 'localhost'),
+        'PORT': env.int('SCHEMA_API_QUOTAS_LEDGER_REDIS_PORT', 6379),
+        'DB': env.int('SCHEMA_API_QUOTAS_LEDGER_REDIS_DB', 0),
+        'KEY_PREFIX': env.str('SCHEMA_API_QUOTAS_LEDGER_REDIS_KEY_PREFIX', 'schema-api:quotas'),
+        'RECONCILE_GRACE_SECONDS': env.int('SCHEMA_API_QUOTAS_LEDGER_REDIS_RECONCILE_GRACE_SECONDS', 300),
+        # Additional keyword arguments of the connection pool, as in the `connection` of the Redis managers
+        'CONNECTION_OPTIONS': env.json('SCHEMA_API_QUOTAS_LEDGER_REDIS_CONNECTION_OPTIONS', '{}')
+    }
+}
+
 MANAGER_CONFIG_PATH = env.path('SCHEMA_API_MANAGER_CONFIG_PATH', './managers.yml')
 WORKFLOWS = {
     'STORE_DEFINITIONS': env.bool('SCHEMA_API_WORKFLOWS_STORE_DEFINITIONS', True),
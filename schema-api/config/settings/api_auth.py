@@ -6,5 +6,11 @@ AUTHORIZATION_HEADER_PREFIX = env.str('SCHEMA_API_AUTHORIZATION_HEADER_PREFIX',
 USE_AUTH = env.bool('SCHEMA_API_USE_AUTH', True)
 MINIMUM_USERNAME_LENGTH = env.int('SCHEMA_API_MINIMUM_USERNAME_LENGTH', 1)
 
+API_TOKEN_CACHE = {
+    'LOCAL_CACHE': 'api-tokens',
+    'TIMEOUT': env.int('SCHEMA_API_TOKEN_CACHE_TIMEOUT_SECONDS', 60),
+    'LOCAL_TIMEOUT': env.int('SCHEMA_API_TOKEN_LOCAL_CACHE_TIMEOUT_SECONDS', 5)
+}
+
 USERNAME_SLUG_PATTERN = env.str('SCHEMA_API_USERNAME_SLUG_PATTERN', None)
 USERNAME_SLUG_PATTERN_VIOLATION_MESSAGE = env.str('SCHEMA_API_USERNAME_SLUG_PATTERN_VIOLATION_MESSAGE', None)
@@ -86,6 +86,10 @@ class CoreConfig(AppConfig):
                     )[0]
                 except IndexError:
                     workflow_manager_options = {}
+                connection_options = dpath.get(manager_config, 'configuration/connection', default=None)
+                if connection_options:
+                    workflow_manager_options = {**workflow_manager_options,
+                                                'connection_options': dict(connection_options)}
                 workflow_manager = manager_class(**workflow_manager_options)
 
                 manager_registry['managers'][name] = {
@@ -0,0 +1,56 @@
+import logging.config
+from argparse import ArgumentParser
+from typing import Any, Dict
+
+from django.db import transaction
+from django.db.models import Max, QuerySet
+
+from api.models import Task
+from api.services import TaskStatusLogService
+from util.commands import ApplicationBaseCommand
+from util.logging import get_logging_config, get_logging_level_by_verbosity
+from workflows.models import Workflow
+from workflows.services import WorkflowStatusLogService
+
+logging.config.dictConfig(get_logging_config())
+logger = logging.getLogger(__name__)
+
+
+class Command(ApplicationBaseCommand):
+    help = 'Recompute the denormalized current status of tasks and workflows from their status history'
+
+    def add_arguments(self, parser: ArgumentParser):
+        parser.add_argument('-t', '--targets', help='Types of executions to backfill; all types if omitted',
+                            nargs='+', choices=['tasks', 'workflows'])
+        parser.add_argument('-b', '--batch-size', help='Number of executions updated in each transaction', type=int,
+                            default=10000)
+
+    def backfill(self, queryset: QuerySet, refresh, batch_size: int) -> int:
+        max_id = queryset.aggregate(max_id=Max('id'))['max_id']
+        if max_id is None:
+            return 0
+
+        total = 0
+        for start in range(0, max_id + 1, batch_size):
+            with transaction.atomic():
+                total += refresh(queryset.filter(id__gte=start, id__lt=start + batch_size))
+            logger.debug(f'Backfilled executions up to id {min(start + batch_size, max_id + 1) - 1}')
+        return total
+
+    def handle(self, *args, **options: Dict[str, Any]):
+        logger.setLevel(get_logging_level_by_verbosity(options['verbosity']))
+
+        if options['batch_size'] < 1:
+            raise ValueError('Batch size must be greater than or equal to 1')
+
+        targets = options['targets'] or ['tasks', 'workflows']
+
+        if 'tasks' in targets:
+            n_tasks = self.backfill(Task.objects.all(), TaskStatusLogService.refresh_current_status,
+                                    options['batch_size'])
+            logger.info(f'Backfilled current status of {n_tasks} tasks')
+
+        if 'workflows' in targets:
+            n_workflows = self.backfill(Workflow.objects.all(), WorkflowStatusLogService.refresh_current_status,
+                                        options['batch_size'])
+            logger.info(f'Backfilled current status of {n_workflows} workflows')
@@ -0,0 +1,127 @@
+import json
+import logging.config
+import time
+from argparse import ArgumentParser
+from typing import Any, Dict
+
+from django.core.management import CommandError
+
+from api.constants import TaskStatus
+from api.models import Task
+from api.services import TaskStatusLogService
+from core.managers.base import ExecutionManifest, ExecutionDetails, UserInfo
+from core.managers.redis import RedisExecutionManager, RedisExecutionStatus, RedisExecutionEvent, \
+    RedisExecutionEventTypes, orjson
+from core.utils import get_manager, get_manager_names, list_live_data
+from util.commands import ApplicationBaseCommand
+from util.logging import get_logging_config, get_logging_level_by_verbosity
+from workflows.models import Workflow
+from workflows.services import WorkflowStatusLogService
+
+logging.config.dictConfig(get_logging_config())
+logger = logging.getLogger(__name__)
+
+
+class Command(ApplicationBaseCommand):
+    help = 'Run benchmarks of performance-sensitive operations'
+
+    def add_arguments(self, parser: ArgumentParser):
+        subparsers = parser.add_subparsers(help='sub-command help', dest='command0', required=True)
+
+        synchronization_parser = subparsers.add_parser(
+            'synchronization', help='Time the live data lookups of a synchronization round against a configured '
+                                    'manager, for its dispatched executions; the lookups are read-only'
+        )
+        synchronization_parser.add_argument('-m', '--manager', help='Name of the manager to look up executions from',
+                                            required=True)
+        synchronization_parser.add_argument('-k', '--kind', help='Kind of executions to look up',
+                                            choices=['task', 'workflow'], default='task')
+        synchronization_parser.add_argument('-n', '--executions', help='Maximum number of dispatched executions to '
+                                                                       'look up', type=int, default=10000)
+        synchronization_parser.add_argument('-c', '--chunk-sizes', help='Chunk sizes to compare', type=int,
+                                            nargs='+', default=[100, 500, 1000])
+        synchronization_parser.add_argument('-w', '--max-workers', help='Numbers of concurrent lookups to compare',
+                                            type=int, nargs='+', default=[1, 4, 8])
+
+        deserialization_parser = subparsers.add_parser(
+            'deserialization', help='Time the decoding of execution documents read from Redis'
+        )
+        deserialization_parser.add_argument('-n', '--documents', help='Number of documents', type=int, default=5000)
+        deserialization_parser.add_argument('-e', '--events', help='Number of status events per document', type=int,
+                                            default=8)
+        deserialization_parser.add_argument('-r', '--rounds', help='Number of timed rounds per mode', type=int,
+                                            default=2)
+
+    def benchmark_deserialization(self, **options: Dict[str, Any]):
+        execution_manifest = ExecutionManifest(
+            execution=ExecutionDetails(definition=json.dumps({'name': 'task'}), is_task=True),
+            user_info=UserInfo(unique_id='user', username='user', fs_user_dir='user'),
+            context_id='1'
+        )
+        statuses = [RedisExecutionStatus.SCHEDULED, RedisExecutionStatus.INITIALIZING, RedisExecutionStatus.RUNNING]
+
+        documents = []
+        for _ in range(options['documents']):
+            redis_execution_data = RedisExecutionManager._create_execution_data(execution_manifest)
+            for i in range(options['events'] - 1):
+                redis_execution_data.events.append(RedisExecutionEvent(
+                    type=RedisExecutionEventTypes.STATUS_UPDATED, details={'status': statuses[i % len(statuses)]}
+                ))
+            redis_execution_data.stdout = ['output'] * options['events']
+            registered_execution_data, _ = RedisExecutionManager._serialize_execution_data(redis_execution_data)
+            documents.append(json.dumps(registered_execution_data))
+
+        self.stdout.write(f'{len(documents)} documents of {options["events"]} events, '
+                          f'{"orjson" if orjson is not None else "json"} parser')
+        for strict_validation in (True, False):
+            manager = RedisExecutionManager(host='localhost', strict_validation=strict_validation)
+            for round_idx in range(options['rounds']):
+                s = time.perf_counter()
+                for document in documents:
+                    manager._deserialize_document(document)
+                e = time.perf_counter()
+                self.stdout.write(f'{"Strict" if strict_validation else "Compact"} deserialization, round '
+                                  f'{round_idx + 1}: {e - s:.6f}s')
+
+    def benchmark_synchronization(self, **options: Dict[str, Any]):
+        if options['manager'] not in get_manager_names():
+            raise CommandError(f'Unknown manager {options["manager"]}')
+
+        target_statuses = [TaskStatus.QUEUED, TaskStatus.INITIALIZING, TaskStatus.RUNNING, TaskStatus.SCHEDULED]
+        if options['kind'] == 'task':
+            dispatched_executions = TaskStatusLogService.filter_tasks_by_status(Task.objects.all(), target_statuses)
+        else:
+            dispatched_executions = WorkflowStatusLogService.filter_workflows_by_status(
+                Workflow.objects.all(), target_statuses
+            )
+        events_cursors = dict(
+            dispatched_executions.filter(manager_name=options['manager'], backend_ref__isnull=False)
+            .values_list('backend_ref', 'events_cursor')[:options['executions']]
+        )
+        if not events_cursors:
+            raise CommandError(f'No dispatched {options["kind"]} executions of manager {options["manager"]}')
+
+        manager = get_manager(options['manager'])
+        ref_ids = list(events_cursors)
+
+        s = time.perf_counter()
+        live_data_map = dict(manager.list(ref_ids=ref_ids, events_cursors=events_cursors))
+        e = time.perf_counter()
+        self.stdout.write(f'{len(ref_ids)} executions, {len(live_data_map)} found, single lookup: {e - s:.6f}s')
+
+        for chunk_size in options['chunk_sizes']:
+            for max_workers in options['max_workers']:
+                s = time.perf_counter()
+                live_data_map = list_live_data(manager, ref_ids, events_cursors=events_cursors,
+                                               chunk_size=chunk_size, max_workers=max_workers)
+                e = time.perf_counter()
+                self.stdout.write(f'{len(ref_ids)} executions, {len(live_data_map)} found, chunk size {chunk_size}, '
+                                  f'{max_workers} workers: {e - s:.6f}s')
+
+    def handle(self, *args, **options: Dict[str, Any]):
+        logger.setLevel(get_logging_level_by_verbosity(options['verbosity']))
+
+        if options['command0'] == 'synchronization':
+            self.benchmark_synchronization(**options)
+        elif options['command0'] == 'deserialization':
+            self.benchmark_deserialization(**options)
@@ -1,16 +1,26 @@
+import asyncio
 import json
 import logging.config
+import os
+import socket
 import sys
 import time
 from argparse import ArgumentParser
-from typing import Any, Dict
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
 
+from django.conf import settings
 from django.db.models import QuerySet, Func, IntegerField, F
+from django.utils import timezone
+from prometheus_client import start_http_server
 
 from api.constants import TaskStatus
 from api.models import Task
 from api.services import TaskStatusLogService, TaskService
-from core.utils import get_manager
+from core.metrics import watcher_metrics
+from core.services import ShardLeaseService
+from core.utils import get_manager, get_manager_names
+from core.watchers import AsyncExecutionsWatcher, synchronize_executions
 from util.commands import ApplicationBaseCommand
 from util.logging import get_logging_config, get_logging_level_by_verbosity
 from workflows.models import Workflow
@@ -34,11 +44,47 @@ class Command(ApplicationBaseCommand):
             'total', help='Total number of workers in worker set', type=int, default=1, nargs="?"
         )
         executions_parser.add_argument('-i', '--interval', help='Number of seconds before each worker '
-                                                                'invocation', type=int)
+                                                                'invocation; each execution is checked when due, '
+                                                                'according to its own schedule', type=int)
         executions_parser.add_argument('-l', '--limit', help='Maximum number of executions managed in '
                                                              'each iteration', type=int)
         executions_parser.add_argument('-m', '--managers', help='Names of managers for which this worker '
                                                                 'set will manage their executions', nargs='+')
+        executions_parser.add_argument('--leases', help='Claim shards of executions through leases shared with the '
+                                                        'rest of the worker set, instead of using a static index and '
+                                                        'total', action='store_true')
+        executions_parser.add_argument('-s', '--shards', help='Total number of shards distributed through leases',
+                                       type=int, default=settings.WATCH_LEASES['SHARDS'])
+        executions_parser.add_argument('-t', '--lease-ttl', help='Number of seconds after which the leases of a '
+                                                                 'worker expire, unless renewed',
+                                       type=int, default=settings.WATCH_LEASES['TTL_SECONDS'])
+        executions_parser.add_argument('-a', '--asyncio', help='Run the worker on an event loop, looking up the live '
+                                                               'data of different managers and chunks concurrently',
+                                       action='store_true')
+        executions_parser.add_argument('-c', '--concurrency', help='Maximum number of concurrent live data lookups '
+                                                                   'of the asyncio runtime', type=int,
+                                       default=settings.EXECUTIONS_SYNCHRONIZATION['MAX_CONCURRENCY'])
+        executions_parser.add_argument('-p', '--metrics-port', help='Port on which the worker serves its Prometheus '
+                                                                    'metrics; metrics are not served if omitted',
+                                       type=int)
+        executions_parser.add_argument('-w', '--worker', help='Name of the worker within the worker set; defaults '
+                                                              'to the host name and process ID')
+
+        events_parser = subparsers.add_parser('events', help='Consume status events of dispatched executions')
+        events_parser.add_argument('-m', '--managers', help='Names of managers whose status events will be '
+                                                            'consumed; all managers that publish status events if '
+                                                            'omitted', nargs='+')
+        events_parser.add_argument('-g', '--group', help='Name of the consumer group that the worker joins',
+                                   default='schema-api-watchers')
+        events_parser.add_argument('-c', '--consumer', help='Name of the worker within the consumer group; defaults '
+                                                            'to the host name and process ID')
+        events_parser.add_argument('-n', '--count', help='Maximum number of events read from each events stream in '
+                                                         'each iteration', type=int, default=100)
+        events_parser.add_argument('-b', '--block', help='Milliseconds to wait for new events', type=int, default=5000)
+        events_parser.add_argument('-i', '--min-idle-time', help='Milliseconds after which events left unacknowledged '
+                                                                 'by any consumer of the group, including workers '
+                                                                 'that are gone, are claimed and applied again',
+                                   type=int, default=60000)
 
     def validate_arguments(self, **options: Dict[str, Any]) -> Dict[str, Any]:
         if options['index'] < 0:
@@ -65,8 +111,156 @@ class Command(ApplicationBaseCommand):
                 # Just call it to make sure the managers exist
                 get_manager(m)
 
+        if (metrics_port := options.get('metrics_port', None)) is not None:
+            if not 0 < metrics_port < 65536:
+                raise ValueError('Metrics port must be between 1 and 65535')
+
+        if options.get('concurrency', 1) < 1:
+            raise ValueError('Concurrency must be greater than or equal to 1')
+
+        if options.get('leases', False):
+            if options['total'] != 1:
+                raise ValueError('Worker index and total cannot be combined with leases')
+
+            if options['shards'] < 1:
+                raise ValueError('Shards must be greater than or equal to 1')
+
+            if options['lease_ttl'] < 1:
+                raise ValueError('Lease TTL in seconds, must be greater than or equal to 1s')
+
+            if interval and interval >= options['lease_ttl']:
+                raise ValueError('Interval must be shorter than the lease TTL, so that leases are renewed in time')
+
+            if not options.get('worker', None):
+                options['worker'] = f'{socket.gethostname()}-{os.getpid()}'
+
+        return options
+
+    def validate_events_arguments(self, **options: Dict[str, Any]) -> Dict[str, Any]:
+        if options['count'] < 1:
+            raise ValueError('Count must be greater than or equal to 1')
+
+        if options['block'] < 0:
+            raise ValueError('Block time must be greater than or equal to zero')
+
+        if options['min_idle_time'] < 1:
+            raise ValueError('Minimum idle time must be greater than or equal to 1')
+
+        if manager_names := options.get('managers', None):
+            for m in manager_names:
+                if not get_manager(m).publishes_events:
+                    raise ValueError(f'Manager {m} does not publish status events')
+        else:
+            options['managers'] = [m for m in get_manager_names() if get_manager(m).publishes_events]
+            if not options['managers']:
+                raise ValueError('No manager publishes status events')
+
+        if not options.get('consumer', None):
+            options['consumer'] = f'{socket.gethostname()}-{os.getpid()}'
+
         return options
 
+    def apply_events(self, manager_name: str, events: List[Tuple[str, Optional[str]]]) -> None:
+        target_statuses = [TaskStatus.QUEUED, TaskStatus.INITIALIZING, TaskStatus.RUNNING, TaskStatus.SCHEDULED]
+        ref_ids = {ref_id for _, ref_id in events if ref_id}
+        if not ref_ids:
+            return
+
+        workflows = WorkflowStatusLogService.filter_workflows_by_status(
+            Workflow.objects.filter(manager_name=manager_name, backend_ref__in=ref_ids),
+            target_statuses
+        )
+        tasks = TaskStatusLogService.filter_tasks_by_status(
+            Task.objects.filter(manager_name=manager_name, backend_ref__in=ref_ids),
+            target_statuses
+        )
+
+        synchronize_executions(list(workflows), WorkflowService.apply_live_data)
+        synchronize_executions(list(tasks), TaskService.apply_live_data)
+
+    def consume_events(self, claim: bool = False, **options: Dict[str, Any]) -> int:
+        """Read a batch of status events of each events stream and apply them
+
+        Events are acknowledged only after being applied; events that fail to be applied stay pending, to be claimed
+        again once idle, while the events of the rest of the streams are applied regardless.
+
+        Args:
+            claim (bool): claim the events left unacknowledged by any consumer of the group, instead of reading new ones
+
+        Returns:
+            int: the number of applied events
+        """
+        grouped = defaultdict(dict)
+        for manager_name in options['managers']:
+            manager = get_manager(manager_name)
+            grouped[type(manager)][manager_name] = manager
+
+        n_events = 0
+        for managers in grouped.values():
+            read_options = {'min_idle_time': options['min_idle_time']} if claim else {'block': options['block']}
+            try:
+                # Managers of the same class may be read at once, e.g. the streams of a Redis database
+                streams = next(iter(managers.values())).read_events_many(
+                    managers, options['group'], options['consumer'], count=options['count'], **read_options
+                )
+            except Exception as ex:
+                logger.error(f'Failed to read status events of managers {", ".join(managers)}: {ex}', exc_info=True)
+                # Unavailable managers are retried after the block time, instead of immediately
+                time.sleep(options['block'] / 1000)
+                continue
+
+            for manager_names, events in streams:
+                if not events:
+                    continue
+
+                s = time.perf_counter()
+                try:
+                    for manager_name in manager_names:
+                        self.apply_events(manager_name, events)
+                    managers[manager_names[0]].ack_events(options['group'], [event_id for event_id, _ in events])
+                except Exception as ex:
+                    logger.error(f'Failed to apply status events of managers {", ".join(manager_names)}; they will be '
+                                 f'claimed again once idle: {ex}', exc_info=True)
+                    continue
+                e = time.perf_counter()
+
+                logger.info(f'Applied {len(events)} status events of managers {", ".join(manager_names)} in '
+                            f'{e - s:.6f}s')
+                n_events += len(events)
+        return n_events
+
+    def handle_events(self, **options: Dict[str, Any]) -> None:
+        logger.debug('Validating arguments...')
+        args = self.validate_events_arguments(**options)
+
+        logger.info(f'Consuming status events as "{args["consumer"]}" of group "{args["group"]}"')
+
+        logger.debug('Applying idle events left unacknowledged by any consumer of the group')
+        while self.consume_events(claim=True, **args):
+            pass
+        claimed_at = time.monotonic()
+
+        try:
+            while True:
+                self.consume_events(**args)
+                # Events of workers that failed before acknowledging them are claimed periodically
+                if time.monotonic() - claimed_at >= args['min_idle_time'] / 1000:
+                    self.consume_events(claim=True, **args)
+                    claimed_at = time.monotonic()
+        except KeyboardInterrupt:
+            logger.info('Terminating signal caught. Exiting...')
+            sys.exit(0)
+
+    def filter_by_shard(self, queryset: QuerySet, **options: Dict[str, Any]) -> QuerySet:
+        if options.get('leases', False):
+            total, shards = options['shards'], options['leased_shards']
+        else:
+            total, shards = options['total'], [options['index']]
+
+        return queryset.annotate(
+            worker_idx=Func(F("id"), total, function="MOD", output_field=IntegerField())
+        ).filter(worker_idx__in=shards)
+
     def get_related_workflows(self, **options: Dict[str, Any]) -> QuerySet[Workflow]:
         target_statuses = [TaskStatus.QUEUED, TaskStatus.INITIALIZING, TaskStatus.RUNNING, TaskStatus.SCHEDULED]
         dispatched_workflows = WorkflowStatusLogService.filter_workflows_by_status(
@@ -74,9 +268,10 @@ class Command(ApplicationBaseCommand):
             target_statuses
         )
 
-        related_workflows = dispatched_workflows.annotate(
-            worker_idx=Func(F("id"), options['total'], function="MOD", output_field=IntegerField())
-        ).filter(worker_idx=options['index'])
+        # Only executions due to be checked are fetched, the most overdue first
+        related_workflows = self.filter_by_shard(dispatched_workflows, **options).filter(
+            next_check_at__lte=timezone.now()
+        ).order_by('next_check_at')
 
         if manager_names := options.get('managers', None):
             related_workflows = related_workflows.filter(manager_name__in=manager_names)
@@ -92,9 +287,10 @@ class Command(ApplicationBaseCommand):
             target_statuses
         )
 
-        related_tasks = dispatched_tasks.annotate(
-            worker_idx=Func(F("id"), options['total'], function="MOD", output_field=IntegerField())
-        ).filter(worker_idx=options['index'])
+        # Only executions due to be checked are fetched, the most overdue first
+        related_tasks = self.filter_by_shard(dispatched_tasks, **options).filter(
+            next_check_at__lte=timezone.now()
+        ).order_by('next_check_at')
 
         if manager_names := options.get('managers', None):
             related_tasks = related_tasks.filter(manager_name__in=manager_names)
@@ -103,15 +299,50 @@ class Command(ApplicationBaseCommand):
             return related_tasks[:limit]
         return related_tasks
 
+    def get_due_executions(self, lease_service: Optional[ShardLeaseService],
+                           **options: Dict[str, Any]) -> Tuple[List[Workflow], List[Task]]:
+        if lease_service:
+            options['leased_shards'] = lease_service.heartbeat()
+            logger.info(f'Holding leases of {len(options["leased_shards"])} shards')
+
+        return list(self.get_related_workflows(**options)), list(self.get_related_tasks(**options))
+
     def handle(self, *args, **options):
         logger.setLevel(get_logging_level_by_verbosity(options['verbosity']))
 
+        if options['command0'] == 'events':
+            try:
+                self.handle_events(**options)
+            except Exception as e:
+                logger.critical(e, exc_info=True)
+                sys.exit(1)
+            return
+
         try:
             logger.debug('Validating arguments...')
             args = self.validate_arguments(**options)
 
             logger.debug(f'Validated arguments: {json.dumps(args, indent=2)}')
 
+            if args.get('metrics_port', None) is not None:
+                start_http_server(args['metrics_port'])
+
+            lease_service = None
+            if args.get('leases', False):
+                lease_service = ShardLeaseService(args['worker'], args['shards'], args['lease_ttl'])
+                logger.info(f'Sharing {args["shards"]} shards through leases as worker "{args["worker"]}"')
+
+            if args.get('asyncio', False):
+                watcher = AsyncExecutionsWatcher(lambda: self.get_due_executions(lease_service, **args),
+                                                 interval=args.get('interval', None),
+                                                 concurrency=args['concurrency'])
+                try:
+                    asyncio.run(watcher.run())
+                finally:
+                    if lease_service:
+                        lease_service.release()
+                return
+
             repeat = True
             if bool(args.get('interval', None)):
                 logger.info('Starting service to watch for live data updates')
@@ -120,31 +351,33 @@ class Command(ApplicationBaseCommand):
             try:
                 while repeat:
 
-                    s = time.perf_counter()
-                    workflows = self.get_related_workflows(**args)
-                    e = time.perf_counter()
-                    workflows_query_time = e - s
-                    logger.info(f'Found {len(workflows)} dispatched workflow executions for which will check live data')
+                    if lease_service:
+                        args['leased_shards'] = lease_service.heartbeat()
+                        logger.info(f'Holding leases of {len(args["leased_shards"])} shards')
 
                     s = time.perf_counter()
-                    tasks = self.get_related_tasks(**args)
-                    e = time.perf_counter()
-                    tasks_query_time = e - s
+                    workflows = list(self.get_related_workflows(**args))
+                    tasks = list(self.get_related_tasks(**args))
+                    query_time = time.perf_counter() - s
+                    watcher_metrics.round_duration.labels(phase='query').observe(query_time)
+                    watcher_metrics.round_executions.labels(kind='workflow').observe(len(workflows))
+                    watcher_metrics.round_executions.labels(kind='task').observe(len(tasks))
+                    logger.info(f'Found {len(workflows)} dispatched workflow executions for which will check live data')
                     logger.info(f'Found {len(tasks)} dispatched task executions for which will check live data')
 
                     logger.info(f'Updating workflows')
                     s = time.perf_counter()
-                    WorkflowService.synchronize_dispatched_executions(workflows)
+                    synchronize_executions(workflows, WorkflowService.apply_live_data)
                     e = time.perf_counter()
                     workflows_update_time = e - s
 
                     logger.info(f'Updating tasks')
                     s = time.perf_counter()
-                    TaskService.synchronize_dispatched_executions(tasks)
+                    synchronize_executions(tasks, TaskService.apply_live_data)
                     e = time.perf_counter()
                     tasks_update_time = e - s
 
-                    logger.info(f'Round accumulated query time: {workflows_query_time + tasks_query_time:.6f}s')
+                    logger.info(f'Round accumulated query time: {query_time:.6f}s')
                     logger.info(f'Round accumulated update time: {workflows_update_time + tasks_update_time:.6f}s')
 
                     repeat = bool(args.get('interval', None))
@@ -156,7 +389,9 @@ class Command(ApplicationBaseCommand):
                     raise KeyboardInterrupt from ke
                 logger.info('Terminating signal caught. Exiting...')
                 sys.exit(0)
-
+            finally:
+                if lease_service:
+                    lease_service.release()
 
         except Exception as e:
             logger.critical(e, exc_info=True)
@@ -5,6 +5,7 @@ from abc import abstractmethod, ABC
 from datetime import datetime
 from typing import Dict, Optional, List, Tuple
 
+from asgiref.sync import sync_to_async
 from semantic_version import Version
 
 from api.constants import TaskStatus
@@ -35,19 +36,34 @@ class ExecutionManifest:
     metadata: Optional[Dict] = None
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class LiveExecutionData:
     status_history: Optional[List[Tuple[TaskStatus, datetime]]] = dataclasses.field(default_factory=list)
     stdout: Optional[List[str]] = dataclasses.field(default_factory=list)
     stderr: Optional[List[str]] = dataclasses.field(default_factory=list)
+    # Position in the live events of the execution after the returned status history, for managers that support
+    # incremental reads
+    events_cursor: Optional[int] = None
+    # Whether the execution has terminated, in which case its logs are complete and it can be archived once persisted
+    is_final: bool = False
+
+
+# The ID of each status event, along with the ref ID of the updated execution, if still available
+StatusEvents = List[Tuple[str, Optional[str]]]
 
 
 class BaseExecutionManager(ABC):
+    # Managers that publish status events implement `read_events` and `ack_events`, so that their executions can be
+    # watched for events; the rest are synchronized by polling
+    publishes_events = False
 
     @abstractmethod
     def submit(self, execution_manifest: ExecutionManifest) -> str:
         pass
 
+    def submit_many(self, execution_manifests: List[ExecutionManifest]) -> List[str]:
+        return [self.submit(execution_manifest) for execution_manifest in execution_manifests]
+
     @abstractmethod
     def get(self, ref_id: str) -> LiveExecutionData:
         pass
@@ -65,7 +81,55 @@ class BaseExecutionManager(ABC):
         pass
 
     @abstractmethod
-    def list(self, ref_ids: List[str] = None, statuses: List[TaskStatus] = None) -> List[Tuple[str, LiveExecutionData]]:
+    def list(self, ref_ids: List[str] = None, statuses: List[TaskStatus] = None,
+             events_cursors: Dict[str, int] = None) -> List[Tuple[str, LiveExecutionData]]:
+        """List the live data of executions
+
+        Managers that support incremental reads return only the status history after the given events cursor of each
+        execution, along with the cursor to continue from; others ignore the cursors and return the full history.
+
+        Args:
+            ref_ids (List[str]): ref IDs of the executions to list
+            statuses (List[TaskStatus]): statuses of the executions to list
+            events_cursors (Dict[str, int]): events cursors of executions, by ref ID
+
+        Returns:
+            List[Tuple[str, LiveExecutionData]]: the live data of the found executions, along with their ref IDs
+        """
+        pass
+
+    async def alist(self, ref_ids: List[str],
+                    events_cursors: Dict[str, int] = None) -> List[Tuple[str, LiveExecutionData]]:
+        """List the live data of executions from within an event loop
+
+        Managers with an asynchronous client override this; the default runs `list` in a thread executor, so that
+        managers with blocking clients can still be watched concurrently.
+
+        Args:
+            ref_ids (List[str]): ref IDs of the executions to list
+            events_cursors (Dict[str, int]): events cursors of executions, by ref ID
+
+        Returns:
+            List[Tuple[str, LiveExecutionData]]: the live data of the found executions, along with their ref IDs
+        """
+        return await sync_to_async(self.list, thread_sensitive=False)(ref_ids=ref_ids, events_cursors=events_cursors)
+
+    def archive(self, ref_ids: List[str]) -> None:
+        """Release executions whose final live data have been persisted
+
+        Managers that retain the data of terminated executions may discard them afterwards; by default, nothing is
+        released.
+
+        Args:
+            ref_ids (List[str]): ref IDs of the terminated executions
+        """
+        pass
+
+    async def aarchive(self, ref_ids: List[str]) -> None:
+        await sync_to_async(self.archive, thread_sensitive=False)(ref_ids)
+
+    async def aclose(self) -> None:
+        """Release the resources of the asynchronous client of the manager, if any"""
         pass
 
     @abstractmethod
@@ -75,3 +139,48 @@ class BaseExecutionManager(ABC):
     @abstractmethod
     def cancel(self, ref_id: str):
         pass
+
+    def read_events(self, group: str, consumer: str, count: int = None, block: int = None,
+                    min_idle_time: int = None) -> StatusEvents:
+        """Read status events of executions as a member of a consumer group
+
+        Managers that do not publish status events cannot be watched for events; their executions are synchronized by
+        polling.
+
+        Args:
+            group (str): the name of the consumer group
+            consumer (str): the name of the consumer within the group
+            count (int): maximum number of events to read
+            block (int): milliseconds to wait for new events; does not wait if omitted
+            min_idle_time (int): claim the events delivered to any consumer of the group, including consumers that are
+                gone, but not acknowledged for at least this many milliseconds, instead of reading new events
+
+        Returns:
+            StatusEvents: the ID of each event, along with the ref ID of the updated execution; the ref ID is None for
+                events that are no longer available
+        """
+        raise NotImplementedError(f'{self.__class__.__name__} does not publish status events')
+
+    @classmethod
+    def read_events_many(cls, managers: Dict[str, 'BaseExecutionManager'], group: str, consumer: str,
+                         count: int = None, block: int = None,
+                         min_idle_time: int = None) -> List[Tuple[List[str], StatusEvents]]:
+        """Read status events of several managers of this class, as in `read_events`
+
+        Managers are read one after the other, unless the class reads the events of several managers at once.
+
+        Args:
+            managers (Dict[str, BaseExecutionManager]): the managers, by name
+
+        Returns:
+            List[Tuple[List[str], StatusEvents]]: the events read from each source, along with the names of the
+                managers that publish to it
+        """
+        return [
+            ([name], manager.read_events(group, consumer, count=count, block=block, min_idle_time=min_idle_time))
+            for name, manager in managers.items()
+        ]
+
+    def ack_events(self, group: str, event_ids: List[str]) -> None:
+        raise NotImplementedError(f'{self.__class__.__name__} does not publish status events')
+
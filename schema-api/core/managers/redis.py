@@ -1,13 +1,21 @@
 import base64
 import dataclasses
 import json
+import logging
+import threading
 import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 from dateutil import parser
 from enum import IntEnum, Enum
-from typing import Dict, Optional, List, Tuple
+from typing import Dict, Optional, List, Tuple, Any
 
 import redis
+import redis.asyncio
+from django.conf import settings
+from django.utils import timezone
 from redis.commands.json.path import Path
 from redis.commands.search.field import TextField, NumericField
 from redis.commands.search.index_definition import IndexDefinition, IndexType
@@ -15,10 +23,75 @@ from redis.commands.search.query import Query
 from rest_framework import serializers
 
 from api.constants import TaskStatus
-from core.managers.base import BaseExecutionManager, ExecutionManifest, UserInfo, LiveExecutionData, ExecutionDetails
+from core.managers.base import BaseExecutionManager, ExecutionManifest, UserInfo, LiveExecutionData, ExecutionDetails, \
+    StatusEvents
 from util.exceptions import ApplicationMissingExecutionError
 from workflows.constants import WorkflowLanguages
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+def json_loads(data: str) -> Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+class FastJSONDecoder:
+    """Decoder of RedisJSON responses, using orjson when it is installed"""
+
+    def decode(self, data: str) -> Any:
+        return json_loads(data)
+
+
+@lru_cache(maxsize=65536)
+def parse_datetime(value: str) -> datetime:
+    # Timestamps of past events are decoded again on every synchronization round, so parsed values are cached
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        parsed = parser.parse(value)
+    if settings.USE_TZ and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+_connection_pools: Dict[Tuple[str, int, int], redis.ConnectionPool] = dict()
+_connection_pools_lock = threading.Lock()
+
+
+def get_connection_pool(host: str, port: int = 6379, db: int = 0, **connection_options) -> redis.ConnectionPool:
+    """Get the connection pool shared by all clients of a Redis database, creating it on first request
+
+    Connection options (e.g. `max_connections`, `health_check_interval`, `socket_timeout`) are applied when the pool
+    is created; options given for an already existing pool are ignored.
+
+    Args:
+        host (str): the Redis host
+        port (int): the Redis port
+        db (int): the Redis database
+        **connection_options: additional keyword arguments for the created `redis.ConnectionPool`
+
+    Returns:
+        redis.ConnectionPool: the connection pool of the given Redis database
+    """
+    key = (host, port, db)
+    with _connection_pools_lock:
+        connection_pool = _connection_pools.get(key)
+        if connection_pool is None:
+            connection_pool = redis.ConnectionPool(host=host, port=port, db=db, decode_responses=True,
+                                                   **connection_options)
+            _connection_pools[key] = connection_pool
+        else:
+            applied_options = {**connection_pool.connection_kwargs, 'max_connections': connection_pool.max_connections}
+            if any(applied_options.get(k) != v for k, v in connection_options.items()):
+                logger.warning(f'A connection pool for Redis at {host}:{port}/{db} already exists; ignoring different '
+                               f'connection options')
+    return connection_pool
+
 
 class RedisExecutionStatus(IntEnum):
     QUEUED = 0
@@ -37,7 +110,7 @@ class RedisExecutionEventTypes(Enum):
     QUOTAS_UPDATED = 'Quotas updated'
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class RedisExecutionEvent:
     type: RedisExecutionEventTypes
     created_at: datetime = dataclasses.field(default_factory=datetime.now)
@@ -125,6 +198,10 @@ class RedisExecutionManager(BaseExecutionManager):
     registry_index_name = 'schema-api-executions-data-idx'
     registry_key_prefix = 'schema-api:executions:data:'
     queue_key = 'schema-api:executions:queue'
+    # Status changes of executions are appended to this stream, by the manager itself on submission and by the
+    # backends that update the registered execution data afterwards
+    events_stream_key = 'schema-api:executions:events'
+    publishes_events = True
 
     def _verify_data_index(self) -> None:
         schema = [
@@ -144,53 +221,104 @@ class RedisExecutionManager(BaseExecutionManager):
 
         except redis.exceptions.ResponseError:
             pass
-        self.index = self.client.ft(self.registry_index_name)
-
-    def _create_client(self) -> redis.Redis:
-        client = redis.Redis(host=self.host, port=self.port, decode_responses=True)
-        response = client.ping()
-        if not response:
-            raise redis.ConnectionError('Unable to connect to Redis')
-
-        return client
+        self._index = self.client.ft(self.registry_index_name)
+
+    @property
+    def index(self):
+        # The data index is verified on first use instead of on initialization, which also serves as the connectivity
+        # check, so that loading the managers does not block on Redis
+        if self._index is None:
+            self._verify_data_index()
+        return self._index
+
+    def _create_client(self, connection_options: Dict) -> redis.Redis:
+        connection_pool = get_connection_pool(self.host, self.port, self.db, **connection_options)
+        return redis.Redis(connection_pool=connection_pool)
+
+    _schema_statuses = {
+        RedisExecutionStatus.QUEUED: TaskStatus.QUEUED,
+        RedisExecutionStatus.SCHEDULED: TaskStatus.SCHEDULED,
+        RedisExecutionStatus.INITIALIZING: TaskStatus.INITIALIZING,
+        RedisExecutionStatus.RUNNING: TaskStatus.RUNNING,
+        RedisExecutionStatus.TERMINATING: TaskStatus.RUNNING,
+        RedisExecutionStatus.COMPLETED: TaskStatus.COMPLETED,
+        RedisExecutionStatus.CANCELED: TaskStatus.CANCELED,
+        RedisExecutionStatus.ERROR: TaskStatus.ERROR,
+        RedisExecutionStatus.EVICTED: TaskStatus.ERROR
+    }
+    _terminal_statuses = frozenset([RedisExecutionStatus.ERROR, RedisExecutionStatus.CANCELED,
+                                    RedisExecutionStatus.EVICTED, RedisExecutionStatus.COMPLETED])
 
     @staticmethod
     def _to_schema_status(status: RedisExecutionStatus) -> TaskStatus:
-        status_map = {
-            RedisExecutionStatus.QUEUED: TaskStatus.QUEUED,
-            RedisExecutionStatus.SCHEDULED: TaskStatus.SCHEDULED,
-            RedisExecutionStatus.INITIALIZING: TaskStatus.INITIALIZING,
-            RedisExecutionStatus.RUNNING: TaskStatus.RUNNING,
-            RedisExecutionStatus.TERMINATING: TaskStatus.RUNNING,
-            RedisExecutionStatus.COMPLETED: TaskStatus.COMPLETED,
-            RedisExecutionStatus.CANCELED: TaskStatus.CANCELED,
-            RedisExecutionStatus.ERROR: TaskStatus.ERROR,
-            RedisExecutionStatus.EVICTED: TaskStatus.ERROR
-        }
-        return status_map[status]
-
-    @staticmethod
-    def _deserialize_status_data(redis_execution_data: RedisExecutionData) -> List[Tuple[TaskStatus, datetime]]:
-        events = redis_execution_data.events
-        status_updates = [
-            (
-                RedisExecutionManager._to_schema_status(RedisExecutionStatus(e['details']['status'])),
-                parser.parse(e['created_at'])
-            )
+        return RedisExecutionManager._schema_statuses[status]
+
+    def _deserialize_status_data(self, events: List[Dict]) -> List[Tuple[TaskStatus, datetime]]:
+        if self.strict_validation:
+            event_serializer = RedisExecutionEventSerializer(data=events, many=True)
+            event_serializer.is_valid(raise_exception=True)
+            return [
+                (RedisExecutionManager._to_schema_status(e['details']['status']), e['created_at'])
+                for e in event_serializer.validated_data
+                if e['type'] == RedisExecutionEventTypes.STATUS_UPDATED.value
+            ]
+
+        schema_statuses = RedisExecutionManager._schema_statuses
+        status_updated = RedisExecutionEventTypes.STATUS_UPDATED.value
+        return [
+            (schema_statuses[e['details']['status']], parse_datetime(e['created_at']))
             for e in events
-            if e['type'] == RedisExecutionEventTypes.STATUS_UPDATED.value
+            if e['type'] == status_updated
         ]
 
-        return status_updates
+    def _deserialize_document(self, document: str) -> Tuple[str, Optional[int], LiveExecutionData]:
+        if self.strict_validation:
+            redis_execution_data_serializer = RedisExecutionDataSerializer(data=json.loads(document))
+            # ISSUE: How to treat cases where unexpected format is found in the execution data registry
+            redis_execution_data_serializer.is_valid(raise_exception=True)
+            raw_redis_execution_data = redis_execution_data_serializer.validated_data
+
+            user_info = UserInfo(**raw_redis_execution_data.pop('user_info'))
+            events = [RedisExecutionEvent(**e) for e in raw_redis_execution_data.pop('events')]
+
+            redis_execution_data = RedisExecutionData(user_info=user_info, events=events, **raw_redis_execution_data)
+
+            status_history = [(RedisExecutionManager._to_schema_status(e.details['status']), e.created_at)
+                              for e in redis_execution_data.events
+                              if e.type == RedisExecutionEventTypes.STATUS_UPDATED.value]
+
+            live_execution_data = LiveExecutionData(stdout=redis_execution_data.stdout,
+                                                    stderr=redis_execution_data.stderr, status_history=status_history)
+            return redis_execution_data.ref_id, redis_execution_data.status, live_execution_data
+
+        raw_redis_execution_data = json_loads(document)
+        live_execution_data = LiveExecutionData(
+            status_history=self._deserialize_status_data(raw_redis_execution_data.get('events') or []),
+            stdout=raw_redis_execution_data.get('stdout') or [],
+            stderr=raw_redis_execution_data.get('stderr') or []
+        )
+        return raw_redis_execution_data['ref_id'], raw_redis_execution_data.get('status'), live_execution_data
 
-    def __init__(self, *, host: str, port: int = 6379):
+    def __init__(self, *, host: str, port: int = 6379, db: int = 0, connection_options: Dict = None,
+                 events_stream_max_length: int = 100000, search_page_size: int = 1000, strict_validation: bool = False,
+                 archive_ttl: int = 7 * 24 * 60 * 60):
         self.host = host
         self.port = port
-        self.client = self._create_client()
-
-        self._verify_data_index()
+        self.db = db
+        self.events_stream_max_length = events_stream_max_length
+        self.search_page_size = search_page_size
+        # Validate execution data read from Redis with the DRF serializers, instead of only decoding the needed fields
+        self.strict_validation = strict_validation
+        # Seconds for which the data of terminated executions are kept, after their final live data are persisted
+        self.archive_ttl = archive_ttl
+        self.connection_options = connection_options or {}
+        self.client = self._create_client(self.connection_options)
+        self._async_client = None
+        self._index = None
+        self._events_groups = set()
 
-    def submit(self, execution_manifest: ExecutionManifest) -> str:
+    @staticmethod
+    def _create_execution_data(execution_manifest: ExecutionManifest) -> RedisExecutionData:
         redis_execution_data_payload = {
             'user_info': execution_manifest.user_info,
             'context_id': execution_manifest.context_id,
@@ -209,38 +337,162 @@ class RedisExecutionManager(BaseExecutionManager):
         redis_execution_data.events.append(status_update_event)
         redis_execution_data.status = RedisExecutionStatus.QUEUED
 
-        ref_id = redis_execution_data.ref_id
+        return redis_execution_data
 
-        redis_execution_data_serializer = RedisExecutionDataSerializer(redis_execution_data)
-        registered_execution_data = redis_execution_data_serializer.data
-        self.client.json().set(
-            f'{self.registry_key_prefix}{ref_id}', '$',
-            registered_execution_data
-        )
+    @staticmethod
+    def _serialize_execution_data(redis_execution_data: RedisExecutionData) -> Tuple[Dict, str]:
+        # The queued manifest shares all of its fields but the execution details with the registered data, so the
+        # execution data are serialized once and reused for both
+        registered_execution_data = RedisExecutionDataSerializer(redis_execution_data).data
+
+        queued_execution_manifest = {
+            field_name: registered_execution_data[field_name]
+            for field_name in RedisExecutionManifestSerializer().fields
+            if field_name in registered_execution_data
+        }
+        queued_execution_manifest['execution'] = RedisExecutionDetailsSerializer(redis_execution_data.execution).data
+
+        return registered_execution_data, json.dumps(queued_execution_manifest)
 
-        redis_execution_manifest_serializer = RedisExecutionManifestSerializer(redis_execution_data)
-        queued_data = json.dumps(redis_execution_manifest_serializer.data)
-        self.client.lpush(
-            self.queue_key, queued_data
+    def submit(self, execution_manifest: ExecutionManifest) -> str:
+        return self.submit_many([execution_manifest])[0]
+
+    def submit_many(self, execution_manifests: List[ExecutionManifest]) -> List[str]:
+        ref_ids = []
+        queued_data = []
+        pipeline = self.client.pipeline(transaction=True)
+        for execution_manifest in execution_manifests:
+            redis_execution_data = self._create_execution_data(execution_manifest)
+            registered_execution_data, queued_execution_manifest = self._serialize_execution_data(redis_execution_data)
+
+            pipeline.json().set(
+                f'{self.registry_key_prefix}{redis_execution_data.ref_id}', '$',
+                registered_execution_data
+            )
+            queued_data.append(queued_execution_manifest)
+            ref_ids.append(redis_execution_data.ref_id)
+
+            self.publish_status_event(redis_execution_data.ref_id, redis_execution_data.status,
+                                      created_at=redis_execution_data.events[-1].created_at, client=pipeline)
+
+        if queued_data:
+            # LPUSH prepends its values in the given order, so the queue ends up as if they were pushed one by one
+            pipeline.lpush(self.queue_key, *queued_data)
+            pipeline.execute()
+
+        return ref_ids
+
+    def publish_status_event(self, ref_id: str, status: RedisExecutionStatus, created_at: datetime = None,
+                             client: redis.Redis = None) -> None:
+        """Append a status change of an execution to the events stream
+
+        The stream is trimmed approximately to `events_stream_max_length` entries.
+
+        Args:
+            ref_id (str): the ref ID of the execution
+            status (RedisExecutionStatus): the new status of the execution
+            created_at (datetime): the time of the status change; defaults to the current time
+            client (redis.Redis): the client or pipeline to issue the command with; defaults to the manager's client
+        """
+        client = client if client is not None else self.client
+        created_at = created_at or datetime.now()
+        client.xadd(
+            self.events_stream_key,
+            {'ref_id': ref_id, 'status': int(status), 'created_at': created_at.isoformat()},
+            maxlen=self.events_stream_max_length, approximate=True
         )
 
-        return ref_id
+    def _verify_events_group(self, group: str) -> None:
+        if group in self._events_groups:
+            return
+
+        try:
+            # Groups consume events published after their creation; earlier changes are covered by polling
+            self.client.xgroup_create(self.events_stream_key, group, id='$', mkstream=True)
+        except redis.exceptions.ResponseError as re:
+            if 'BUSYGROUP' not in str(re):
+                raise
+        self._events_groups.add(group)
+
+    @staticmethod
+    def _parse_events(entries: List[Tuple[Optional[str], Optional[Dict]]]) -> StatusEvents:
+        # Entries that have been trimmed from the stream are returned without fields, or without an ID when claimed by
+        # Redis versions before 7, which leave them pending
+        return [(event_id, fields.get('ref_id') if fields else None) for event_id, fields in entries if event_id]
+
+    def _claim_events(self, group: str, consumer: str, count: int = None, min_idle_time: int = 0) -> StatusEvents:
+        # The pending entries of the group are scanned from the start, until enough events are claimed, since each
+        # XAUTOCLAIM call only scans a bounded number of entries
+        events, start_id = [], '0-0'
+        while True:
+            start_id, entries, *_ = self.client.xautoclaim(self.events_stream_key, group, consumer, min_idle_time,
+                                                           start_id=start_id, count=count)
+            events.extend(self._parse_events(entries))
+            if start_id == '0-0' or (count is not None and len(events) >= count):
+                return events
+
+    def read_events(self, group: str, consumer: str, count: int = None, block: int = None,
+                    min_idle_time: int = None) -> StatusEvents:
+        self._verify_events_group(group)
+
+        if min_idle_time is not None:
+            return self._claim_events(group, consumer, count=count, min_idle_time=min_idle_time)
+
+        response = self.client.xreadgroup(group, consumer, {self.events_stream_key: '>'}, count=count, block=block)
+        return [event for _, entries in response or [] for event in self._parse_events(entries)]
+
+    @classmethod
+    def read_events_many(cls, managers: Dict[str, 'RedisExecutionManager'], group: str, consumer: str,
+                         count: int = None, block: int = None,
+                         min_idle_time: int = None) -> List[Tuple[List[str], StatusEvents]]:
+        # Managers of the same Redis database share a connection pool and their events streams; the new events of all
+        # the streams of a database are read with a single call, while databases are read concurrently
+        streams = defaultdict(lambda: defaultdict(list))
+        for name, manager in managers.items():
+            streams[manager.client.connection_pool][manager.events_stream_key].append(name)
+
+        def read(pool_streams: Dict[str, List[str]]) -> List[Tuple[List[str], StatusEvents]]:
+            if min_idle_time is not None:
+                return [
+                    (names, managers[names[0]].read_events(group, consumer, count=count, min_idle_time=min_idle_time))
+                    for names in pool_streams.values()
+                ]
+
+            for names in pool_streams.values():
+                managers[names[0]]._verify_events_group(group)
+            client = managers[next(iter(pool_streams.values()))[0]].client
+            response = client.xreadgroup(group, consumer, {key: '>' for key in pool_streams}, count=count,
+                                         block=block)
+            return [(pool_streams[key], cls._parse_events(entries)) for key, entries in response or []]
+
+        if len(streams) == 1:
+            return read(next(iter(streams.values())))
+        with ThreadPoolExecutor(max_workers=len(streams)) as executor:
+            return [events for pool_events in executor.map(read, streams.values()) for events in pool_events]
+
+    def ack_events(self, group: str, event_ids: List[str]) -> None:
+        if event_ids:
+            self.client.xack(self.events_stream_key, group, *event_ids)
 
     def get(self, ref_id: str) -> LiveExecutionData:
-        execution_data = self.client.json().get(
+        execution_data = self.client.json(decoder=FastJSONDecoder()).get(
             f'{self.registry_key_prefix}{ref_id}',
             Path('.status'), Path('.events'), Path('.stdout'), Path('.stderr')
         )
+        if not execution_data:
+            raise ApplicationMissingExecutionError(
+                f'Expected to find data for execution "{ref_id}" but no data was found'
+            )
 
         stdout = execution_data.pop('.stdout', [])
         stderr = execution_data.pop('.stderr', [])
 
-        live_execution_status = RedisExecutionManager._deserialize_status_data(execution_data)
+        live_execution_status = self._deserialize_status_data(execution_data['.events'])
 
-        return LiveExecutionData(status=live_execution_status, stdout=stdout, stderr=stderr)
+        return LiveExecutionData(status_history=live_execution_status, stdout=stdout, stderr=stderr)
 
     def get_status_history(self, ref_id: str) -> List[Tuple[TaskStatus, datetime]]:
-        status_data = self.client.json().get(
+        status_data = self.client.json(decoder=FastJSONDecoder()).get(
             f'{self.registry_key_prefix}{ref_id}',
             Path('.status'), Path('.events')
         )
@@ -249,7 +501,7 @@ class RedisExecutionManager(BaseExecutionManager):
                 f'Expected to find data for execution "{ref_id}" but no data was found'
             )
 
-        return RedisExecutionManager._deserialize_status_data(status_data)
+        return self._deserialize_status_data(status_data['.events'])
 
     def get_stdout(self, ref_id: str) -> List[str]:
         stdout = self.client.json().get(f'{self.registry_key_prefix}{ref_id}', Path('.stdout'))
@@ -267,8 +519,136 @@ class RedisExecutionManager(BaseExecutionManager):
             )
         return stderr
 
+    def _queue_list_by_ref_ids(self, pipeline, ref_ids: List[str],
+                               events_cursors: Dict[str, int]) -> Dict[int, List[str]]:
+        # Known executions are fetched by key, retrieving only the paths needed for their status history
+        pipeline.json(decoder=FastJSONDecoder()).mget(
+            [f'{self.registry_key_prefix}{ref_id}' for ref_id in ref_ids], '$.status'
+        )
+
+        # Events are only ever appended, so only those past the cursor of each execution are fetched; executions are
+        # grouped by cursor, as JSON.MGET applies the same path to all keys
+        ref_ids_by_cursor = defaultdict(list)
+        for ref_id in ref_ids:
+            ref_ids_by_cursor[events_cursors.get(ref_id, 0)].append(ref_id)
+        for events_cursor, cursor_ref_ids in ref_ids_by_cursor.items():
+            pipeline.json(decoder=FastJSONDecoder()).mget(
+                [f'{self.registry_key_prefix}{ref_id}' for ref_id in cursor_ref_ids], f'$.events[{events_cursor}:]'
+            )
+        return ref_ids_by_cursor
+
+    def _parse_list_by_ref_ids(self, ref_ids: List[str], events_cursors: Dict[str, int],
+                               ref_ids_by_cursor: Dict[int, List[str]],
+                               results: List) -> Tuple[List[Tuple[str, LiveExecutionData]], List[str]]:
+        statuses, *events_by_cursor = results
+        new_events = dict()
+        for cursor_ref_ids, events in zip(ref_ids_by_cursor.values(), events_by_cursor):
+            new_events.update(zip(cursor_ref_ids, events))
+
+        live_execution_data_list = []
+        terminal_ref_ids = []
+        for ref_id, status_matches in zip(ref_ids, statuses):
+            events = new_events[ref_id]
+            # Missing keys return no matches, like executions that are not found in the search index
+            if not status_matches or events is None:
+                continue
+
+            live_execution_data = LiveExecutionData(status_history=self._deserialize_status_data(events),
+                                                    events_cursor=events_cursors.get(ref_id, 0) + len(events))
+            live_execution_data_list.append((ref_id, live_execution_data))
+
+            if status_matches[0] in self._terminal_statuses:
+                terminal_ref_ids.append(ref_id)
+
+        return live_execution_data_list, terminal_ref_ids
+
+    def _queue_logs(self, pipeline, ref_ids: List[str]) -> None:
+        keys = [f'{self.registry_key_prefix}{ref_id}' for ref_id in ref_ids]
+        pipeline.json(decoder=FastJSONDecoder()).mget(keys, '$.stdout')
+        pipeline.json(decoder=FastJSONDecoder()).mget(keys, '$.stderr')
+
+    @staticmethod
+    def _parse_logs(live_execution_data_list: List[Tuple[str, LiveExecutionData]], ref_ids: List[str],
+                    results: List) -> None:
+        live_execution_data_map = dict(live_execution_data_list)
+        stdout_matches, stderr_matches = results
+        for ref_id, stdout, stderr in zip(ref_ids, stdout_matches, stderr_matches):
+            live_execution_data = live_execution_data_map[ref_id]
+            live_execution_data.stdout = stdout[0] if stdout else []
+            live_execution_data.stderr = stderr[0] if stderr else []
+            live_execution_data.is_final = True
+
+    def _list_by_ref_ids(self, ref_ids: List[str],
+                         events_cursors: Dict[str, int] = None) -> List[Tuple[str, LiveExecutionData]]:
+        events_cursors = events_cursors or {}
+        pipeline = self.client.pipeline(transaction=False)
+        ref_ids_by_cursor = self._queue_list_by_ref_ids(pipeline, ref_ids, events_cursors)
+
+        live_execution_data_list, terminal_ref_ids = self._parse_list_by_ref_ids(
+            ref_ids, events_cursors, ref_ids_by_cursor, pipeline.execute()
+        )
+        # The logs of terminated executions are final, so they are returned to be persisted before archiving
+        if terminal_ref_ids:
+            pipeline = self.client.pipeline(transaction=False)
+            self._queue_logs(pipeline, terminal_ref_ids)
+            self._parse_logs(live_execution_data_list, terminal_ref_ids, pipeline.execute())
+
+        return live_execution_data_list
+
+    @property
+    def async_client(self) -> redis.asyncio.Redis:
+        # Asynchronous connections are bound to the event loop that opens them, so they are not shared through the
+        # module-level connection pools
+        if self._async_client is None:
+            self._async_client = redis.asyncio.Redis(host=self.host, port=self.port, db=self.db,
+                                                     decode_responses=True, **self.connection_options)
+        return self._async_client
+
+    async def alist(self, ref_ids: List[str],
+                    events_cursors: Dict[str, int] = None) -> List[Tuple[str, LiveExecutionData]]:
+        events_cursors = events_cursors or {}
+        pipeline = self.async_client.pipeline(transaction=False)
+        ref_ids_by_cursor = self._queue_list_by_ref_ids(pipeline, ref_ids, events_cursors)
+
+        live_execution_data_list, terminal_ref_ids = self._parse_list_by_ref_ids(
+            ref_ids, events_cursors, ref_ids_by_cursor, await pipeline.execute()
+        )
+        if terminal_ref_ids:
+            pipeline = self.async_client.pipeline(transaction=False)
+            self._queue_logs(pipeline, terminal_ref_ids)
+            self._parse_logs(live_execution_data_list, terminal_ref_ids, await pipeline.execute())
+
+        return live_execution_data_list
+
+    def _queue_archive(self, pipeline, ref_ids: List[str]) -> None:
+        # Keys that already expire keep their TTL, so that archiving an execution again does not postpone its removal
+        for ref_id in ref_ids:
+            pipeline.expire(f'{self.registry_key_prefix}{ref_id}', self.archive_ttl, nx=True)
+
+    def archive(self, ref_ids: List[str]) -> None:
+        if not ref_ids:
+            return
+        pipeline = self.client.pipeline(transaction=False)
+        self._queue_archive(pipeline, ref_ids)
+        pipeline.execute()
+
+    async def aarchive(self, ref_ids: List[str]) -> None:
+        if not ref_ids:
+            return
+        pipeline = self.async_client.pipeline(transaction=False)
+        self._queue_archive(pipeline, ref_ids)
+        await pipeline.execute()
+
+    async def aclose(self) -> None:
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
     def list(self, ref_ids: List[str] = None, statuses: List[TaskStatus] = None, user_id: str = None,
-             context_id=None) -> List[Tuple[str, LiveExecutionData]]:
+             context_id=None, events_cursors: Dict[str, int] = None) -> List[Tuple[str, LiveExecutionData]]:
+        if ref_ids and not (statuses or user_id or context_id):
+            return self._list_by_ref_ids(ref_ids, events_cursors)
+
         filters = []
 
         if ref_ids:
@@ -285,36 +665,22 @@ class RedisExecutionManager(BaseExecutionManager):
         if context_id:
             filters.append('@context_id:"{}"'.format(user_id))
 
-        if filters:
-            result = self.index.search(Query(' '.join(filters)))
-        else:
-            result = self.index.search(Query("*"))
-
-        live_execution_data_list = []
-
-        for d in result.docs:
-            redis_execution_data_serializer = RedisExecutionDataSerializer(data=json.loads(d.json))
-            # ISSUE: How to treat cases where unexpected format is found in the execution data registry
-            redis_execution_data_serializer.is_valid(raise_exception=True)
-            raw_redis_execution_data = redis_execution_data_serializer.validated_data
-
-            user_info = UserInfo(**raw_redis_execution_data.pop('user_info'))
-            events = [RedisExecutionEvent(**e) for e in raw_redis_execution_data.pop('events')]
-
-            redis_execution_data = RedisExecutionData(user_info=user_info, events=events, **raw_redis_execution_data)
-
-            status_history = [(RedisExecutionManager._to_schema_status(e.details['status']), e.created_at)
-                              for e in redis_execution_data.events
-                              if e.type == RedisExecutionEventTypes.STATUS_UPDATED.value]
+        query = Query(' '.join(filters)) if filters else Query("*")
 
-            live_execution_data = LiveExecutionData(stdout=redis_execution_data.stdout,
-                                                    stderr=redis_execution_data.stderr, status_history=status_history)
+        # RediSearch returns the first 10 results unless paging is defined explicitly
+        docs = []
+        while True:
+            result = self.index.search(query.paging(len(docs), self.search_page_size))
+            docs.extend(result.docs)
+            if not result.docs or len(docs) >= result.total:
+                break
 
-            live_execution_data_list.append((redis_execution_data.ref_id, live_execution_data))
+        live_execution_data_list = []
 
-            if raw_redis_execution_data['status'] in [RedisExecutionStatus.ERROR, RedisExecutionStatus.CANCELED,
-                                                      RedisExecutionStatus.EVICTED, RedisExecutionStatus.COMPLETED]:
-                self.cancel(raw_redis_execution_data['ref_id'])
+        for d in docs:
+            ref_id, status, live_execution_data = self._deserialize_document(d.json)
+            live_execution_data.is_final = status in self._terminal_statuses
+            live_execution_data_list.append((ref_id, live_execution_data))
 
         return live_execution_data_list
 
@@ -0,0 +1,39 @@
+"""
+Metrics of the watchers, exposed in the Prometheus format through `prometheus_client`
+
+The metrics are grouped in `WatcherMetrics`, which registers them on the given registry, so that tests can record them
+on an isolated `CollectorRegistry` instead of the process-wide default one.
+"""
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Histogram
+
+
+class WatcherMetrics:
+
+    def __init__(self, registry: CollectorRegistry = REGISTRY):
+        self.registry = registry
+        self.round_duration = Histogram(
+            'schema_api_watcher_round_duration_seconds',
+            'Duration of the phases of watcher rounds (query of due executions, manager fetch and DB apply)',
+            labelnames=('phase',), buckets=(.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30, 60),
+            registry=registry
+        )
+        self.round_executions = Histogram(
+            'schema_api_watcher_round_executions', 'Number of executions checked in each watcher round',
+            labelnames=('kind',), buckets=(0, 1, 10, 50, 100, 500, 1000, 5000, 10000, 50000), registry=registry
+        )
+        self.status_transitions = Counter(
+            'schema_api_watcher_status_transitions', 'Number of status transitions applied by the watcher',
+            registry=registry
+        )
+        self.manager_errors = Counter(
+            'schema_api_watcher_manager_errors', 'Number of failed live data lookups, by manager',
+            labelnames=('manager',), registry=registry
+        )
+        self.persistence_lag = Histogram(
+            'schema_api_watcher_persistence_lag_seconds',
+            'Time between the creation of a status in the execution backend and its persistence',
+            buckets=(.1, .5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600), registry=registry
+        )
+
+
+watcher_metrics = WatcherMetrics()
@@ -128,3 +128,23 @@ class BaseTag(models.Model):
 
     class Meta:
         abstract = True
+
+
+class WatchWorker(models.Model):
+    name = models.CharField(help_text='Name of a watch worker, unique within the worker set', max_length=255,
+                            unique=True)
+    heartbeat_at = models.DateTimeField(help_text='Time of the latest heartbeat of the worker',
+                                        default=get_current_datetime)
+
+
+class WatchShardLease(models.Model):
+    shard = models.PositiveIntegerField(help_text='Shard of the dispatched executions, as the remainder of their ID '
+                                                  'divided by the total number of shards', unique=True)
+    owner = models.CharField(help_text='Name of the watch worker holding the lease', max_length=255, blank=True)
+    expires_at = models.DateTimeField(help_text='Time after which the lease may be claimed by another worker',
+                                      null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner'], name='watch_shard_lease_owner_idx')
+        ]
@@ -11,9 +11,18 @@ class WorkflowManagerSerializer(serializers.Serializer):
     languages = WorkflowManagerLanguageSerializer(many=True, required=False, allow_empty=False)
     use_definition = serializers.BooleanField(default=False)
 
+
+class ManagerConnectionSerializer(serializers.Serializer):
+    max_connections = serializers.IntegerField(min_value=1, required=False)
+    health_check_interval = serializers.IntegerField(min_value=0, required=False)
+    socket_timeout = serializers.FloatField(min_value=0, required=False)
+    socket_connect_timeout = serializers.FloatField(min_value=0, required=False)
+
+
 class ManagerConfigurationSerializer(serializers.Serializer):
     delegate_tasks = serializers.BooleanField(default=False)
     workflows = WorkflowManagerSerializer(required=False)
+    connection = ManagerConnectionSerializer(required=False)
 
 
 class ManagerSerializer(serializers.Serializer):
@@ -0,0 +1,90 @@
+import logging
+import math
+from datetime import datetime, timedelta
+from typing import List
+
+from django.db import transaction
+
+from core.models import WatchWorker, WatchShardLease
+from util.defaults import get_current_datetime
+
+logger = logging.getLogger(__name__)
+
+
+class ShardLeaseService:
+    """
+    Distributes the shards of dispatched executions among a dynamic set of watch workers.
+
+    Each worker periodically sends a heartbeat, through which it renews the leases of the shards it holds, releases
+    shards beyond its fair share and claims free or expired shards up to its fair share. The fair share is recomputed
+    on each heartbeat from the number of live workers, so that the shards are rebalanced as workers join or leave and
+    the shards of crashed workers are taken over once their leases expire.
+    """
+
+    def __init__(self, worker: str, total_shards: int, ttl_seconds: int):
+        self.worker = worker
+        self.total_shards = total_shards
+        self.ttl = timedelta(seconds=ttl_seconds)
+
+    def get_fair_share(self, n_workers: int) -> int:
+        return math.ceil(self.total_shards / max(n_workers, 1))
+
+    def heartbeat(self) -> List[int]:
+        """
+        Renews the worker's registration and rebalances its shard leases
+
+        Returns:
+            A sorted list of the shards that the worker holds until its next heartbeat
+        """
+        now = get_current_datetime()
+        expires_at = now + self.ttl
+
+        WatchShardLease.objects.bulk_create(
+            [WatchShardLease(shard=shard) for shard in range(self.total_shards)], ignore_conflicts=True
+        )
+
+        with transaction.atomic():
+            WatchWorker.objects.update_or_create(name=self.worker, defaults={'heartbeat_at': now})
+            WatchWorker.objects.filter(heartbeat_at__lt=now - self.ttl).delete()
+            fair_share = self.get_fair_share(WatchWorker.objects.count())
+
+            owned_leases = WatchShardLease.objects.filter(owner=self.worker)
+            # Shards outside the current shard range are left over from a worker set with more shards
+            owned_leases.filter(shard__gte=self.total_shards).update(owner='', expires_at=None)
+            owned_leases.update(expires_at=expires_at)
+            owned_shards = sorted(owned_leases.values_list('shard', flat=True))
+
+            if len(owned_shards) > fair_share:
+                released_shards = owned_shards[fair_share:]
+                WatchShardLease.objects.filter(owner=self.worker, shard__in=released_shards).update(
+                    owner='', expires_at=None
+                )
+                owned_shards = owned_shards[:fair_share]
+                logger.info(f'Released shards {released_shards}')
+            elif len(owned_shards) < fair_share:
+                claimable_shards = self._lock_claimable_shards(now, fair_share - len(owned_shards))
+                if claimable_shards:
+                    WatchShardLease.objects.filter(shard__in=claimable_shards).update(
+                        owner=self.worker, expires_at=expires_at
+                    )
+                    owned_shards = sorted(owned_shards + claimable_shards)
+                    logger.info(f'Claimed shards {claimable_shards}')
+
+        return owned_shards
+
+    def _lock_claimable_shards(self, now: datetime, limit: int) -> List[int]:
+        # Shards locked by concurrently rebalancing workers are skipped, instead of waiting for their transactions
+        return list(
+            WatchShardLease.objects.select_for_update(skip_locked=True).filter(
+                shard__lt=self.total_shards
+            ).exclude(expires_at__gte=now).order_by('shard').values_list('shard', flat=True)[:limit]
+        )
+
+    def release(self) -> None:
+        """
+        Releases all the leases of the worker and removes it from the worker set, so that its shards are immediately
+        claimed by the remaining workers
+        """
+        with transaction.atomic():
+            WatchShardLease.objects.filter(owner=self.worker).update(owner='', expires_at=None)
+            WatchWorker.objects.filter(name=self.worker).delete()
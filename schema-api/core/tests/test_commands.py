@@ -0,0 +1,161 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch, MagicMock
+
+from django.conf import settings
+from django.core.management import call_command, CommandError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from api.constants import TaskStatus
+from api.models import Task
+from api.services import TaskStatusLogService, TaskService
+from core.management.commands.watch import Command as WatchCommand
+from core.managers.base import LiveExecutionData
+
+
+class WatchEventsCommandTestCase(TestCase):
+
+    def setUp(self):
+        self.tasks = [
+            Task.objects.create(name=f'task{i}', backend_ref=f'ref{i}', manager_name='manager') for i in range(3)
+        ]
+        for task in self.tasks:
+            TaskStatusLogService(task).log_status_update(TaskStatus.QUEUED)
+
+        self.manager = MagicMock()
+        self.manager.list.side_effect = lambda ref_ids, events_cursors=None: [
+            (ref_id, LiveExecutionData(status_history=[(TaskStatus.RUNNING, timezone.now())])) for ref_id in ref_ids
+        ]
+        self.manager.read_events_many.return_value = [(['manager'], [('1-0', 'ref0'), ('2-0', 'ref2'), ('3-0', None)])]
+
+    @patch('core.watchers.get_manager')
+    @patch('core.management.commands.watch.get_manager')
+    def test_consume_events_applies_only_changed_executions_and_acks_events(self, *get_manager_mocks):
+        for get_manager_mock in get_manager_mocks:
+            get_manager_mock.return_value = self.manager
+
+        n_events = WatchCommand().consume_events(managers=['manager'], group='group', consumer='consumer', count=10,
+                                                 block=0, min_idle_time=60000)
+
+        self.assertEqual(n_events, 3)
+        self.assertSetEqual(set(self.manager.list.call_args.kwargs['ref_ids']), {'ref0', 'ref2'})
+        self.manager.ack_events.assert_called_once_with('group', ['1-0', '2-0', '3-0'])
+        for task, expected_status in zip(self.tasks, (TaskStatus.RUNNING, TaskStatus.QUEUED, TaskStatus.RUNNING)):
+            task.refresh_from_db()
+            self.assertEqual(task.current_status, expected_status)
+
+    @patch('core.management.commands.watch.get_manager')
+    def test_consume_events_leaves_events_of_a_failed_manager_pending(self, get_manager_mock):
+        failing_manager = MagicMock()
+        failing_manager.read_events_many.return_value = [(['failing'], [('1-0', 'ref0')])]
+        get_manager_mock.side_effect = lambda name: self.manager if name == 'manager' else failing_manager
+        command = WatchCommand()
+
+        with patch.object(command, 'apply_events',
+                          side_effect=lambda name, events: 1 / 0 if name == 'failing' else None):
+            n_events = command.consume_events(managers=['failing', 'manager'], group='group', consumer='consumer',
+                                              count=10, block=0, min_idle_time=60000, claim=True)
+
+        self.assertEqual(n_events, 3)
+        failing_manager.ack_events.assert_not_called()
+        self.manager.ack_events.assert_called_once()
+        self.assertEqual(self.manager.read_events_many.call_args.kwargs['min_idle_time'], 60000)
+
+    @patch('core.management.commands.watch.get_manager_names', return_value=['polled', 'manager'])
+    @patch('core.management.commands.watch.get_manager')
+    def test_validate_events_arguments_defaults_to_managers_that_publish_events(self, get_manager_mock, _):
+        polled_manager = MagicMock(publishes_events=False)
+        get_manager_mock.side_effect = lambda name: self.manager if name == 'manager' else polled_manager
+
+        options = WatchCommand().validate_events_arguments(count=10, block=0, min_idle_time=60000, consumer='c')
+
+        self.assertListEqual(options['managers'], ['manager'])
+        with self.assertRaises(ValueError):
+            WatchCommand().validate_events_arguments(count=10, block=0, min_idle_time=60000, managers=['polled'])
+
+
+class WatchExecutionsCommandTestCase(TestCase):
+
+    def setUp(self):
+        self.tasks = [
+            Task.objects.create(name=f'task{i}', backend_ref=f'ref{i}', manager_name='manager') for i in range(4)
+        ]
+        for task in self.tasks:
+            TaskStatusLogService(task).log_status_update(TaskStatus.QUEUED)
+
+    def test_get_related_tasks_filters_by_leased_shards(self):
+        related_tasks = WatchCommand().get_related_tasks(leases=True, shards=2, leased_shards=[self.tasks[0].id % 2])
+
+        self.assertSetEqual({task.id for task in related_tasks}, {task.id for task in self.tasks[::2]})
+
+    def test_get_related_tasks_fetches_only_due_executions(self):
+        Task.objects.filter(pk=self.tasks[0].pk).update(next_check_at=timezone.now() + timedelta(minutes=5))
+
+        related_tasks = WatchCommand().get_related_tasks(index=0, total=1)
+
+        self.assertListEqual([task.id for task in related_tasks], [task.id for task in self.tasks[1:]])
+
+    def test_validate_arguments_rejects_interval_exceeding_lease_ttl(self):
+        with self.assertRaises(ValueError):
+            WatchCommand().validate_arguments(index=0, total=1, interval=60, leases=True, shards=8, lease_ttl=60)
+
+
+class BackfillCurrentStatusCommandTestCase(TestCase):
+
+    @override_settings(EXECUTIONS_SYNCHRONIZATION={**settings.EXECUTIONS_SYNCHRONIZATION, 'MAX_LIVE_DATA_MISSES': 1})
+    def test_backfill_keeps_lost_executions_unknown(self):
+        task = Task.objects.create(name='task', backend_ref='ref', manager_name='manager')
+        TaskStatusLogService(task).log_status_update(TaskStatus.RUNNING)
+        TaskService.apply_live_data([task], {})
+        Task.objects.filter(pk=task.pk).update(current_status=None, current_status_at=None)
+
+        call_command('backfill_current_status', targets=['tasks'], verbosity=0)
+
+        task.refresh_from_db()
+        self.assertEqual(task.current_status, TaskStatus.UNKNOWN)
+        # Lost executions are not watched again
+        self.assertListEqual(list(TaskStatusLogService.filter_tasks_by_status(
+            Task.objects.all(), [TaskStatus.QUEUED, TaskStatus.SCHEDULED, TaskStatus.INITIALIZING, TaskStatus.RUNNING]
+        )), [])
+
+
+class BenchmarkSynchronizationCommandTestCase(TestCase):
+
+    def setUp(self):
+        self.tasks = [
+            Task.objects.create(name=f'task{i}', backend_ref=f'ref{i}', manager_name=f'manager{i % 2}',
+                                events_cursor=i)
+            for i in range(4)
+        ]
+        for task in self.tasks[:3]:
+            TaskStatusLogService(task).log_status_update(TaskStatus.QUEUED)
+
+        self.manager = MagicMock()
+        self.manager.list.side_effect = lambda ref_ids, events_cursors=None: [
+            (ref_id, LiveExecutionData()) for ref_id in ref_ids
+        ]
+        patcher = patch('core.management.commands.benchmark.get_manager_names', return_value=['manager0', 'manager1'])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch('core.management.commands.benchmark.get_manager')
+    def test_synchronization_looks_up_dispatched_executions_of_manager(self, get_manager_mock):
+        get_manager_mock.return_value = self.manager
+
+        call_command('benchmark', 'synchronization', manager='manager0', chunk_sizes=[1], max_workers=[2],
+                     stdout=StringIO())
+
+        get_manager_mock.assert_called_once_with('manager0')
+        # The terminated task is not looked up, since it is no longer dispatched
+        for c in self.manager.list.call_args_list:
+            self.assertTrue(set(c.kwargs['ref_ids']) <= {'ref0', 'ref2'})
+        self.manager.list.assert_any_call(ref_ids=['ref0'], events_cursors={'ref0': 0})
+        self.manager.list.assert_any_call(ref_ids=['ref2'], events_cursors={'ref2': 2})
+
+    def test_synchronization_requires_dispatched_executions(self):
+        with self.assertRaises(CommandError):
+            call_command('benchmark', 'synchronization', manager='manager1', kind='workflow')
+
+        with self.assertRaises(CommandError):
+            call_command('benchmark', 'synchronization', manager='unknown')
@@ -0,0 +1,301 @@
+import base64
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from api.constants import TaskStatus
+from core.managers.base import ExecutionManifest, ExecutionDetails, UserInfo
+from core.managers.redis import RedisExecutionManager, RedisExecutionStatus, RedisExecutionEvent, \
+    RedisExecutionEventTypes, get_connection_pool, parse_datetime
+
+
+class RedisExecutionManagerConnectionTestCase(SimpleTestCase):
+
+    def test_initialization_does_not_connect_to_redis(self):
+        manager = RedisExecutionManager(host='lazy.redis.test')
+        self.assertEqual(manager.client.connection_pool._created_connections, 0)
+
+    def test_managers_of_the_same_database_share_a_connection_pool(self):
+        manager0 = RedisExecutionManager(host='shared.redis.test', connection_options={'max_connections': 5})
+        manager1 = RedisExecutionManager(host='shared.redis.test')
+        manager2 = RedisExecutionManager(host='shared.redis.test', db=1)
+
+        self.assertIs(manager0.client.connection_pool, manager1.client.connection_pool)
+        self.assertIsNot(manager0.client.connection_pool, manager2.client.connection_pool)
+        self.assertEqual(manager1.client.connection_pool.max_connections, 5)
+
+    def test_connection_pool_applies_connection_options(self):
+        connection_pool = get_connection_pool('options.redis.test', health_check_interval=30, socket_timeout=5)
+        self.assertEqual(connection_pool.connection_kwargs['health_check_interval'], 30)
+        self.assertEqual(connection_pool.connection_kwargs['socket_timeout'], 5)
+        self.assertTrue(connection_pool.connection_kwargs['decode_responses'])
+
+
+class RedisExecutionManagerSubmitTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.manager = RedisExecutionManager(host='submit.redis.test')
+        self.manager.client = MagicMock()
+        self.pipeline = self.manager.client.pipeline.return_value
+
+    @staticmethod
+    def _get_execution_manifest(i: int) -> ExecutionManifest:
+        return ExecutionManifest(
+            execution=ExecutionDetails(definition=json.dumps({'name': f'task{i}'}), is_task=True),
+            user_info=UserInfo(unique_id='user', username='user', fs_user_dir='user'),
+            context_id='1'
+        )
+
+    def test_submit_many_uses_a_single_transactional_pipeline(self):
+        ref_ids = self.manager.submit_many([self._get_execution_manifest(i) for i in range(3)])
+
+        self.assertEqual(len(set(ref_ids)), 3)
+        self.manager.client.pipeline.assert_called_once_with(transaction=True)
+        self.pipeline.execute.assert_called_once()
+        self.manager.client.lpush.assert_not_called()
+        self.manager.client.json.assert_not_called()
+
+        registered_keys = [c.args[0] for c in self.pipeline.json.return_value.set.call_args_list]
+        self.assertListEqual(registered_keys, [f'{self.manager.registry_key_prefix}{r}' for r in ref_ids])
+
+        self.pipeline.lpush.assert_called_once()
+        queue_key, *queued_data = self.pipeline.lpush.call_args.args
+        self.assertEqual(queue_key, self.manager.queue_key)
+        self.assertListEqual([json.loads(d)['ref_id'] for d in queued_data], ref_ids)
+
+    def test_submit_many_queues_the_manifest_of_the_registered_data(self):
+        [ref_id] = self.manager.submit_many([self._get_execution_manifest(0)])
+
+        registered_data = self.pipeline.json.return_value.set.call_args.args[2]
+        queued_data = json.loads(self.pipeline.lpush.call_args.args[1])
+
+        self.assertEqual(registered_data['ref_id'], ref_id)
+        self.assertEqual(registered_data['status'], RedisExecutionStatus.QUEUED)
+        self.assertNotIn('execution', registered_data)
+        for field_name in ('user_info', 'context_id', 'ref_id'):
+            self.assertEqual(queued_data[field_name], registered_data[field_name])
+        self.assertEqual(json.loads(base64.b64decode(queued_data['execution']['definition'])), {'name': 'task0'})
+
+    def test_submit_many_without_manifests_does_not_reach_redis(self):
+        self.assertListEqual(self.manager.submit_many([]), [])
+        self.pipeline.execute.assert_not_called()
+
+    def test_submit_many_publishes_queued_status_events(self):
+        ref_ids = self.manager.submit_many([self._get_execution_manifest(i) for i in range(2)])
+
+        published = [c.args for c in self.pipeline.xadd.call_args_list]
+        self.assertListEqual([stream_key for stream_key, _ in published], [self.manager.events_stream_key] * 2)
+        self.assertListEqual([fields['ref_id'] for _, fields in published], ref_ids)
+        self.assertListEqual([fields['status'] for _, fields in published], [RedisExecutionStatus.QUEUED] * 2)
+
+
+class RedisExecutionManagerEventsTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.manager = RedisExecutionManager(host='events.redis.test')
+        self.manager.client = MagicMock()
+
+    def test_read_events_creates_consumer_group_once(self):
+        self.manager.client.xreadgroup.return_value = []
+        self.manager.read_events('group', 'consumer')
+        self.manager.read_events('group', 'consumer')
+
+        self.manager.client.xgroup_create.assert_called_once_with(self.manager.events_stream_key, 'group', id='$',
+                                                                  mkstream=True)
+
+    def test_read_events_returns_ref_ids_of_updated_executions(self):
+        self.manager.client.xreadgroup.return_value = [
+            [self.manager.events_stream_key, [('1-0', {'ref_id': 'a', 'status': '3'}), ('2-0', None)]]
+        ]
+        events = self.manager.read_events('group', 'consumer', count=10, block=100)
+
+        self.assertListEqual(events, [('1-0', 'a'), ('2-0', None)])
+        self.manager.client.xreadgroup.assert_called_once_with(
+            'group', 'consumer', {self.manager.events_stream_key: '>'}, count=10, block=100
+        )
+
+    def test_read_events_claims_idle_events_of_any_consumer(self):
+        self.manager.client.xautoclaim.side_effect = [
+            ['5-0', [('1-0', {'ref_id': 'a', 'status': '3'})], []],
+            ['0-0', [('6-0', {'ref_id': 'b', 'status': '6'}), (None, None)], ['7-0']]
+        ]
+        events = self.manager.read_events('group', 'consumer', count=10, min_idle_time=60000)
+
+        self.assertListEqual(events, [('1-0', 'a'), ('6-0', 'b')])
+        self.assertListEqual([c.kwargs['start_id'] for c in self.manager.client.xautoclaim.call_args_list],
+                             ['0-0', '5-0'])
+        self.manager.client.xautoclaim.assert_called_with(self.manager.events_stream_key, 'group', 'consumer', 60000,
+                                                          start_id='5-0', count=10)
+        self.manager.client.xreadgroup.assert_not_called()
+
+    def test_read_events_many_reads_streams_of_a_database_with_a_single_call(self):
+        other_manager = RedisExecutionManager(host='events.redis.test')
+        other_manager.client = self.manager.client
+        self.manager.client.xreadgroup.return_value = [
+            [self.manager.events_stream_key, [('1-0', {'ref_id': 'a', 'status': '3'})]]
+        ]
+
+        streams = RedisExecutionManager.read_events_many({'manager0': self.manager, 'manager1': other_manager},
+                                                         'group', 'consumer', count=10, block=100)
+
+        self.assertListEqual(streams, [(['manager0', 'manager1'], [('1-0', 'a')])])
+        self.manager.client.xreadgroup.assert_called_once_with(
+            'group', 'consumer', {self.manager.events_stream_key: '>'}, count=10, block=100
+        )
+
+    def test_ack_events_acknowledges_given_events(self):
+        self.manager.ack_events('group', ['1-0', '2-0'])
+        self.manager.client.xack.assert_called_once_with(self.manager.events_stream_key, 'group', '1-0', '2-0')
+
+
+
+class RedisExecutionManagerListTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.manager = RedisExecutionManager(host='list.redis.test', search_page_size=2)
+        self.manager.client = MagicMock()
+        self.manager._index = MagicMock()
+
+        execution_manifest = RedisExecutionManagerSubmitTestCase._get_execution_manifest(0)
+        self.documents = []
+        for _ in range(5):
+            redis_execution_data = RedisExecutionManager._create_execution_data(execution_manifest)
+            registered_execution_data, _ = RedisExecutionManager._serialize_execution_data(redis_execution_data)
+            self.documents.append(MagicMock(json=json.dumps(registered_execution_data)))
+
+    def _search(self, query):
+        return MagicMock(docs=self.documents[query._offset:query._offset + query._num], total=len(self.documents))
+
+    def test_list_pages_through_all_search_results(self):
+        self.manager._index.search.side_effect = self._search
+
+        live_execution_data_list = self.manager.list(statuses=[TaskStatus.QUEUED])
+
+        self.assertEqual(len(live_execution_data_list), 5)
+        self.assertEqual(self.manager._index.search.call_count, 3)
+
+    def test_list_by_ref_ids_fetches_only_status_paths_of_known_keys(self):
+        registered_execution_data = [json.loads(d.json) for d in self.documents[:2]]
+        ref_ids = [d['ref_id'] for d in registered_execution_data] + ['missing']
+        pipeline = self.manager.client.pipeline.return_value
+        pipeline.execute.return_value = [
+            [[d['status']] for d in registered_execution_data] + [None],
+            [d['events'] for d in registered_execution_data] + [None]
+        ]
+
+        live_execution_data_list = self.manager.list(ref_ids=ref_ids)
+
+        self.manager._index.search.assert_not_called()
+        keys = [f'{self.manager.registry_key_prefix}{ref_id}' for ref_id in ref_ids]
+        self.assertListEqual([c.args for c in pipeline.json.return_value.mget.call_args_list],
+                             [(keys, '$.status'), (keys, '$.events[0:]')])
+        self.assertListEqual([ref_id for ref_id, _ in live_execution_data_list], ref_ids[:2])
+        for _, live_execution_data in live_execution_data_list:
+            self.assertListEqual([s for s, _ in live_execution_data.status_history], [TaskStatus.QUEUED])
+            self.assertListEqual(live_execution_data.stdout, [])
+            self.assertEqual(live_execution_data.events_cursor, 1)
+
+    def test_list_by_ref_ids_fetches_only_events_past_the_cursors(self):
+        registered_execution_data = [json.loads(d.json) for d in self.documents[:3]]
+        ref_ids = [d['ref_id'] for d in registered_execution_data]
+        pipeline = self.manager.client.pipeline.return_value
+        pipeline.execute.return_value = [
+            [[d['status']] for d in registered_execution_data],
+            [registered_execution_data[0]['events'], []],
+            [registered_execution_data[2]['events']]
+        ]
+
+        live_execution_data_list = self.manager.list(ref_ids=ref_ids,
+                                                     events_cursors={ref_ids[0]: 1, ref_ids[1]: 1, ref_ids[2]: 4})
+
+        keys = [f'{self.manager.registry_key_prefix}{ref_id}' for ref_id in ref_ids]
+        self.assertListEqual([c.args for c in pipeline.json.return_value.mget.call_args_list],
+                             [(keys, '$.status'), (keys[:2], '$.events[1:]'), (keys[2:], '$.events[4:]')])
+        self.assertListEqual([(len(d.status_history), d.events_cursor) for _, d in live_execution_data_list],
+                             [(1, 2), (0, 1), (1, 5)])
+
+    def test_alist_uses_the_async_client_and_returns_final_logs_of_terminated_executions(self):
+        registered_execution_data = [json.loads(d.json) for d in self.documents[:2]]
+        ref_ids = [d['ref_id'] for d in registered_execution_data]
+        self.manager._async_client = MagicMock(delete=AsyncMock())
+        pipeline = self.manager._async_client.pipeline.return_value
+        pipeline.execute = AsyncMock(side_effect=[
+            [[[RedisExecutionStatus.COMPLETED], [registered_execution_data[1]['status']]],
+             [d['events'] for d in registered_execution_data]],
+            [[[['out']]], [[['err']]]]
+        ])
+
+        live_execution_data_list = async_to_sync(self.manager.alist)(ref_ids=ref_ids)
+
+        self.manager.client.pipeline.assert_not_called()
+        self.manager._async_client.delete.assert_not_called()
+        self.assertListEqual([ref_id for ref_id, _ in live_execution_data_list], ref_ids)
+        self.assertListEqual([(d.is_final, d.stdout, d.stderr) for _, d in live_execution_data_list],
+                             [(True, ['out'], ['err']), (False, [], [])])
+
+    def test_list_by_ref_ids_does_not_delete_terminated_executions(self):
+        registered_execution_data = json.loads(self.documents[0].json)
+        pipeline = self.manager.client.pipeline.return_value
+        pipeline.execute.side_effect = [
+            [[[RedisExecutionStatus.ERROR]], [registered_execution_data['events']]],
+            [[None], [None]]
+        ]
+
+        [(_, live_execution_data)] = self.manager.list(ref_ids=[registered_execution_data['ref_id']])
+
+        self.assertTrue(live_execution_data.is_final)
+        self.assertListEqual(live_execution_data.stdout, [])
+        self.manager.client.json.return_value.delete.assert_not_called()
+
+    def test_archive_expires_keys_without_extending_existing_ttls(self):
+        self.manager.archive(['ref0', 'ref1'])
+
+        pipeline = self.manager.client.pipeline.return_value
+        self.assertListEqual([c.args for c in pipeline.expire.call_args_list],
+                             [(f'{self.manager.registry_key_prefix}ref0', self.manager.archive_ttl),
+                              (f'{self.manager.registry_key_prefix}ref1', self.manager.archive_ttl)])
+        self.assertTrue(all(c.kwargs == {'nx': True} for c in pipeline.expire.call_args_list))
+        pipeline.execute.assert_called_once()
+
+
+class RedisExecutionManagerDeserializationTestCase(SimpleTestCase):
+
+    def setUp(self):
+        redis_execution_data = RedisExecutionManager._create_execution_data(
+            RedisExecutionManagerSubmitTestCase._get_execution_manifest(0)
+        )
+        redis_execution_data.events.append(RedisExecutionEvent(type=RedisExecutionEventTypes.QUOTAS_UPDATED))
+        redis_execution_data.events.append(RedisExecutionEvent(
+            type=RedisExecutionEventTypes.STATUS_UPDATED, details={'status': RedisExecutionStatus.TERMINATING}
+        ))
+        redis_execution_data.stdout = ['output']
+        registered_execution_data, _ = RedisExecutionManager._serialize_execution_data(redis_execution_data)
+        self.document = json.dumps(registered_execution_data)
+
+    def test_compact_deserialization_matches_strict_deserialization(self):
+        strict_manager = RedisExecutionManager(host='strict.redis.test', strict_validation=True)
+        compact_manager = RedisExecutionManager(host='compact.redis.test')
+
+        strict = strict_manager._deserialize_document(self.document)
+        compact = compact_manager._deserialize_document(self.document)
+
+        self.assertEqual(compact, strict)
+        self.assertListEqual([s for s, _ in compact[2].status_history], [TaskStatus.QUEUED, TaskStatus.RUNNING])
+        self.assertListEqual(compact[2].stdout, ['output'])
+
+    def test_strict_deserialization_rejects_invalid_documents(self):
+        document = json.loads(self.document)
+        document['events'][0]['type'] = 'Unknown'
+        strict_manager = RedisExecutionManager(host='strict.redis.test', strict_validation=True)
+
+        with self.assertRaises(ValidationError):
+            strict_manager._deserialize_document(json.dumps(document))
+
+    def test_parse_datetime_returns_aware_datetimes(self):
+        self.assertEqual(parse_datetime('2024-01-01T10:00:00Z'), parse_datetime('2024-01-01T10:00:00'))
+        self.assertTrue(timezone.is_aware(parse_datetime('2024-01-01T10:00:00')))
+
@@ -0,0 +1,49 @@
+import urllib.request
+
+from django.test import SimpleTestCase
+from prometheus_client import CollectorRegistry, generate_latest, start_http_server
+
+from core.metrics import WatcherMetrics
+
+
+class WatcherMetricsTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.registry = CollectorRegistry()
+        self.metrics = WatcherMetrics(self.registry)
+
+    def test_metrics_are_recorded_per_label_set(self):
+        self.metrics.manager_errors.labels(manager='a').inc()
+        self.metrics.manager_errors.labels(manager='a').inc(2)
+        self.metrics.manager_errors.labels(manager='b').inc()
+
+        get_value = self.registry.get_sample_value
+        self.assertEqual(get_value('schema_api_watcher_manager_errors_total', {'manager': 'a'}), 3)
+        self.assertEqual(get_value('schema_api_watcher_manager_errors_total', {'manager': 'b'}), 1)
+
+    def test_histograms_record_cumulative_buckets(self):
+        for value in (0.004, 0.5, 3, 100):
+            self.metrics.round_duration.labels(phase='fetch').observe(value)
+
+        get_value = self.registry.get_sample_value
+        name = 'schema_api_watcher_round_duration_seconds'
+        self.assertEqual(get_value(f'{name}_bucket', {'phase': 'fetch', 'le': '0.005'}), 1)
+        self.assertEqual(get_value(f'{name}_bucket', {'phase': 'fetch', 'le': '5.0'}), 3)
+        self.assertEqual(get_value(f'{name}_bucket', {'phase': 'fetch', 'le': '+Inf'}), 4)
+        self.assertEqual(get_value(f'{name}_count', {'phase': 'fetch'}), 4)
+        self.assertAlmostEqual(get_value(f'{name}_sum', {'phase': 'fetch'}), 103.504)
+
+    def test_metrics_server_serves_registered_metrics(self):
+        self.metrics.status_transitions.inc()
+        server, thread = start_http_server(0, addr='127.0.0.1', registry=self.registry)
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{server.server_port}/metrics') as response:
+                body = response.read()
+                self.assertTrue(response.headers['Content-Type'].startswith('text/plain'))
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+        self.assertEqual(body, generate_latest(self.registry))
+        self.assertIn(b'schema_api_watcher_status_transitions_total 1.0', body)
@@ -0,0 +1,53 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import WatchShardLease, WatchWorker
+from core.services import ShardLeaseService
+
+
+class ShardLeaseServiceTestCase(TestCase):
+
+    def test_single_worker_claims_all_shards(self):
+        shards = ShardLeaseService('worker0', 8, 60).heartbeat()
+
+        self.assertListEqual(shards, list(range(8)))
+        self.assertEqual(WatchShardLease.objects.filter(owner='worker0').count(), 8)
+
+    def test_shards_are_rebalanced_when_workers_join(self):
+        worker0 = ShardLeaseService('worker0', 8, 60)
+        worker1 = ShardLeaseService('worker1', 8, 60)
+        worker0.heartbeat()
+
+        # The joining worker finds no free shards until the first worker releases its surplus
+        self.assertListEqual(worker1.heartbeat(), [])
+        self.assertListEqual(worker0.heartbeat(), [0, 1, 2, 3])
+        self.assertListEqual(worker1.heartbeat(), [4, 5, 6, 7])
+
+    def test_shards_of_crashed_workers_are_taken_over_after_expiration(self):
+        worker0 = ShardLeaseService('worker0', 4, 60)
+        worker1 = ShardLeaseService('worker1', 4, 60)
+        worker0.heartbeat()
+        worker1.heartbeat()
+        worker0.heartbeat()
+        self.assertListEqual(worker1.heartbeat(), [2, 3])
+
+        with patch('core.services.get_current_datetime', return_value=timezone.now() + timedelta(seconds=61)):
+            shards = worker0.heartbeat()
+
+        self.assertListEqual(shards, [0, 1, 2, 3])
+        self.assertFalse(WatchWorker.objects.filter(name='worker1').exists())
+
+    def test_release_frees_shards_for_remaining_workers(self):
+        worker0 = ShardLeaseService('worker0', 4, 60)
+        worker1 = ShardLeaseService('worker1', 4, 60)
+        worker0.heartbeat()
+        worker1.heartbeat()
+        worker0.heartbeat()
+        worker1.heartbeat()
+
+        worker1.release()
+
+        self.assertListEqual(worker0.heartbeat(), [0, 1, 2, 3])
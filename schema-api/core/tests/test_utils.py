@@ -0,0 +1,73 @@
+import threading
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+
+from core.managers.base import LiveExecutionData
+from core.utils import get_next_check_at, list_live_data
+
+
+class ListLiveDataTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.manager = MagicMock()
+        self.manager.list.side_effect = lambda ref_ids, events_cursors=None: [
+            (ref_id, LiveExecutionData()) for ref_id in ref_ids
+        ]
+
+    def test_list_live_data_looks_up_executions_in_chunks(self):
+        ref_ids = [f'ref{i}' for i in range(25)]
+        live_data_map = list_live_data(self.manager, ref_ids, chunk_size=10, max_workers=4)
+
+        self.assertSetEqual(set(live_data_map), set(ref_ids))
+        chunks = sorted((c.kwargs['ref_ids'] for c in self.manager.list.call_args_list), key=len, reverse=True)
+        self.assertListEqual([len(chunk) for chunk in chunks], [10, 10, 5])
+
+    def test_list_live_data_looks_up_chunks_concurrently(self):
+        # Each lookup waits for the lookups of the other chunks, so that they only complete if they run concurrently
+        barrier = threading.Barrier(3, timeout=5)
+
+        def list_executions(ref_ids, events_cursors=None):
+            barrier.wait()
+            return [(ref_id, LiveExecutionData()) for ref_id in ref_ids]
+
+        self.manager.list.side_effect = list_executions
+
+        live_data_map = list_live_data(self.manager, [f'ref{i}' for i in range(25)], chunk_size=10, max_workers=4)
+
+        self.assertEqual(len(live_data_map), 25)
+
+    def test_list_live_data_without_ref_ids_does_not_list_all_executions(self):
+        self.assertDictEqual(list_live_data(self.manager, [], chunk_size=10, max_workers=4), {})
+        self.manager.list.assert_not_called()
+
+    def test_list_live_data_passes_events_cursors_of_each_chunk(self):
+        ref_ids = [f'ref{i}' for i in range(15)]
+        list_live_data(self.manager, ref_ids, events_cursors={ref_id: i for i, ref_id in enumerate(ref_ids)},
+                       chunk_size=10, max_workers=1)
+
+        self.assertListEqual(
+            [c.kwargs['events_cursors'] for c in self.manager.list.call_args_list],
+            [{ref_id: i for i, ref_id in enumerate(ref_ids[:10])}, {ref_id: i + 10 for i, ref_id in enumerate(ref_ids[10:])}]
+        )
+
+
+
+@override_settings(EXECUTIONS_SYNCHRONIZATION={'MIN_CHECK_INTERVAL_SECONDS': 2, 'MAX_CHECK_INTERVAL_SECONDS': 300,
+                                               'CHECK_BACKOFF_FACTOR': 0.5})
+class GetNextCheckAtTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.now = timezone.now()
+
+    def test_get_next_check_at_after_transition_uses_minimum_interval(self):
+        self.assertEqual(get_next_check_at(self.now, self.now), self.now + timedelta(seconds=2))
+        self.assertEqual(get_next_check_at(self.now, None), self.now + timedelta(seconds=2))
+
+    def test_get_next_check_at_backs_off_while_status_is_unchanged(self):
+        self.assertEqual(get_next_check_at(self.now, self.now - timedelta(seconds=60)),
+                         self.now + timedelta(seconds=30))
+        self.assertEqual(get_next_check_at(self.now, self.now - timedelta(days=3)),
+                         self.now + timedelta(seconds=300))
@@ -0,0 +1,128 @@
+from datetime import timedelta
+from unittest.mock import patch, AsyncMock, MagicMock
+
+from asgiref.sync import async_to_sync
+from django.test import TestCase
+from django.utils import timezone
+from prometheus_client import CollectorRegistry
+
+from api.constants import TaskStatus
+from api.models import Task
+from api.services import TaskStatusLogService, TaskService
+from core.managers.base import BaseExecutionManager, LiveExecutionData
+from core.metrics import WatcherMetrics
+from core.watchers import AsyncExecutionsWatcher, synchronize_executions
+
+
+class AsyncExecutionsWatcherTestCase(TestCase):
+
+    def setUp(self):
+        self.tasks = [
+            Task.objects.create(name=f'task{i}', backend_ref=f'ref{i}', manager_name='manager') for i in range(5)
+        ]
+        for task in self.tasks:
+            TaskStatusLogService(task).log_status_update(TaskStatus.QUEUED)
+
+        # The default asynchronous listing of the base manager runs the blocking `list` in a thread
+        self.manager = MagicMock(aarchive=AsyncMock())
+        self.manager.alist.side_effect = lambda **kwargs: BaseExecutionManager.alist(self.manager, **kwargs)
+        self.manager.list.side_effect = lambda ref_ids, events_cursors=None: [
+            (ref_id, LiveExecutionData(status_history=[(TaskStatus.RUNNING, timezone.now())], events_cursor=2))
+            for ref_id in ref_ids
+        ]
+
+    @patch('core.watchers.get_manager')
+    def test_run_round_synchronizes_due_executions_in_chunks(self, get_manager_mock):
+        get_manager_mock.return_value = self.manager
+        watcher = AsyncExecutionsWatcher(lambda: ([], list(Task.objects.all())), concurrency=2, chunk_size=2)
+
+        async_to_sync(watcher.run_round)()
+
+        list_calls = self.manager.list.call_args_list
+        self.assertListEqual(sorted(len(c.kwargs['ref_ids']) for c in list_calls), [1, 2, 2])
+        for task in self.tasks:
+            task.refresh_from_db()
+            self.assertEqual(task.current_status, TaskStatus.RUNNING)
+            self.assertEqual(task.events_cursor, 2)
+
+
+class SynchronizeExecutionsTestCase(TestCase):
+
+    def setUp(self):
+        self.tasks = [
+            Task.objects.create(name=f'task{i}', backend_ref=f'ref{i}', manager_name=f'manager{i % 2}')
+            for i in range(4)
+        ]
+        for task in self.tasks:
+            TaskStatusLogService(task).log_status_update(TaskStatus.QUEUED)
+
+        self.managers = {'manager0': MagicMock(), 'manager1': MagicMock()}
+        self.managers['manager0'].list.side_effect = lambda ref_ids, events_cursors=None: [
+            (ref_id, LiveExecutionData(status_history=[(TaskStatus.RUNNING, timezone.now())])) for ref_id in ref_ids
+        ]
+        self.managers['manager1'].list.side_effect = ConnectionError('unreachable')
+
+    @patch('core.watchers.get_manager')
+    def test_synchronize_executions_records_transitions_and_manager_errors(self, get_manager_mock):
+        get_manager_mock.side_effect = lambda name: self.managers[name]
+        registry = CollectorRegistry()
+
+        with patch('core.watchers.watcher_metrics', WatcherMetrics(registry)), \
+                self.assertLogs('core.watchers', level='ERROR'):
+            synchronize_executions(self.tasks, TaskService.apply_live_data)
+
+        self.assertEqual(registry.get_sample_value('schema_api_watcher_status_transitions_total'), 2)
+        self.assertEqual(registry.get_sample_value('schema_api_watcher_persistence_lag_seconds_count'), 2)
+        self.assertEqual(
+            registry.get_sample_value('schema_api_watcher_manager_errors_total', {'manager': 'manager1'}), 1
+        )
+        self.managers['manager0'].archive.assert_called_once_with([])
+        for task in self.tasks:
+            task.refresh_from_db()
+            self.assertEqual(task.current_status, TaskStatus.RUNNING if task.manager_name == 'manager0' else
+                             TaskStatus.QUEUED)
+
+
+class SynchronizeExecutionsSchedulingTestCase(TestCase):
+
+    def setUp(self):
+        self.task = Task.objects.create(name='task', backend_ref='ref', manager_name='manager')
+
+    def _get_task(self) -> Task:
+        return Task.objects.get(pk=self.task.pk)
+
+    @patch('core.watchers.get_manager')
+    def test_synchronize_executions_advances_events_cursors(self, get_manager_mock):
+        TaskStatusLogService(self.task).log_status_update(TaskStatus.QUEUED)
+        manager = get_manager_mock.return_value
+        manager.list.return_value = [
+            ('ref', LiveExecutionData(status_history=[(TaskStatus.RUNNING, timezone.now())], events_cursor=3))
+        ]
+
+        synchronize_executions([self._get_task()], TaskService.apply_live_data)
+        synchronize_executions([self._get_task()], TaskService.apply_live_data)
+
+        self.assertListEqual([c.kwargs['events_cursors'] for c in manager.list.call_args_list],
+                             [{'ref': 0}, {'ref': 3}])
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.events_cursor, 3)
+        self.assertEqual(self.task.current_status, TaskStatus.RUNNING)
+
+    @patch('core.watchers.get_manager')
+    def test_synchronize_executions_schedules_next_checks(self, get_manager_mock):
+        ts = timezone.now()
+        TaskStatusLogService(self.task).log_status_update(TaskStatus.QUEUED, created_at=ts - timedelta(days=3))
+        manager = get_manager_mock.return_value
+        manager.list.return_value = [('ref', LiveExecutionData(status_history=[]))]
+
+        synchronize_executions([self._get_task()], TaskService.apply_live_data)
+        self.task.refresh_from_db()
+        unchanged_delay = self.task.next_check_at - ts
+
+        manager.list.return_value = [('ref', LiveExecutionData(status_history=[(TaskStatus.RUNNING, ts)]))]
+        synchronize_executions([self._get_task()], TaskService.apply_live_data)
+        self.task.refresh_from_db()
+        transition_delay = self.task.next_check_at - ts
+
+        self.assertGreater(unchanged_delay, timedelta(seconds=60))
+        self.assertLess(transition_delay, timedelta(seconds=30))
@@ -1,8 +1,12 @@
 import re
-from typing import Dict, Set
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Set, List, Optional
+
+from django.conf import settings
 
 from core.apps import MANAGERS
-from core.managers.base import BaseExecutionManager
+from core.managers.base import BaseExecutionManager, LiveExecutionData
 
 
 def normalize_version_definition(version: str) -> str:
@@ -46,3 +50,80 @@ def get_manager(name: str) -> BaseExecutionManager:
         raise ValueError(f'Unknown manager {name}')
 
     return manager['manager_ref']
+
+
+def get_manager_names() -> List[str]:
+    return list(MANAGERS['managers'].keys())
+
+
+def list_live_data(manager: BaseExecutionManager, ref_ids: List[str], events_cursors: Dict[str, int] = None,
+                   chunk_size: int = None, max_workers: int = None) -> Dict[str, LiveExecutionData]:
+    """Retrieve the live data of executions of a manager, looking them up in chunks that run concurrently
+
+    Args:
+        manager (BaseExecutionManager): the manager of the executions
+        ref_ids (List[str]): the ref IDs of the executions
+        events_cursors (Dict[str, int]): positions in the live events of the executions, by ref ID, from which to read
+            their status history
+        chunk_size (int): maximum number of ref IDs looked up with each `list` call; defaults to the
+            `EXECUTIONS_SYNCHRONIZATION['CHUNK_SIZE']` setting
+        max_workers (int): maximum number of concurrent `list` calls; defaults to the
+            `EXECUTIONS_SYNCHRONIZATION['MAX_WORKERS']` setting
+
+    Returns:
+        Dict[str, LiveExecutionData]: the live data of the executions that were found, by ref ID
+    """
+    chunk_size = chunk_size or settings.EXECUTIONS_SYNCHRONIZATION['CHUNK_SIZE']
+    max_workers = max_workers or settings.EXECUTIONS_SYNCHRONIZATION['MAX_WORKERS']
+
+    def list_chunk(chunk: List[str]):
+        if events_cursors is None:
+            return manager.list(ref_ids=chunk)
+        return manager.list(ref_ids=chunk, events_cursors={ref_id: events_cursors[ref_id] for ref_id in chunk})
+
+    chunks = [ref_ids[i:i + chunk_size] for i in range(0, len(ref_ids), chunk_size)]
+    if len(chunks) <= 1 or max_workers == 1:
+        results = [list_chunk(chunk) for chunk in chunks]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+            results = list(executor.map(list_chunk, chunks))
+
+    return {ref_id: live_data for result in results for ref_id, live_data in result}
+
+
+def get_next_check_at(now: datetime, last_transition_at: Optional[datetime]) -> datetime:
+    """Schedule the next check of the live data of a dispatched execution
+
+    The execution is checked again after an interval proportional to the time it has spent in its current status, so
+    that executions are re-checked quickly right after a status transition and back off exponentially while their
+    status remains unchanged.
+
+    Args:
+        now (datetime): the time of the current check
+        last_transition_at (datetime): the time at which the execution transitioned to its current status, if known
+
+    Returns:
+        datetime: the time at which the execution is due to be checked again
+    """
+    config = settings.EXECUTIONS_SYNCHRONIZATION
+    unchanged_seconds = max((now - last_transition_at).total_seconds(), 0) if last_transition_at else 0
+    interval = min(
+        max(unchanged_seconds * config['CHECK_BACKOFF_FACTOR'], config['MIN_CHECK_INTERVAL_SECONDS']),
+        config['MAX_CHECK_INTERVAL_SECONDS']
+    )
+    return now + timedelta(seconds=interval)
+
+
+def get_next_retry_at(now: datetime, misses: int) -> datetime:
+    """Schedule the next check of a dispatched execution whose live data were missing
+
+    Args:
+        now (datetime): the time of the current check
+        misses (int): the number of consecutive checks that the live data of the execution were missing
+
+    Returns:
+        datetime: the time at which the execution is due to be checked again
+    """
+    config = settings.EXECUTIONS_SYNCHRONIZATION
+    interval = min(config['MIN_CHECK_INTERVAL_SECONDS'] * 2 ** misses, config['MAX_CHECK_INTERVAL_SECONDS'])
+    return now + timedelta(seconds=interval)
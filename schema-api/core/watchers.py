@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import signal
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from api.models import Task
+from api.services import TaskService
+from core.managers.base import BaseExecutionManager, LiveExecutionData
+from core.metrics import watcher_metrics
+from core.utils import get_manager, get_manager_names, list_live_data
+from workflows.models import Workflow
+from workflows.services import WorkflowService
+
+logger = logging.getLogger(__name__)
+
+ApplyLiveData = Callable[[List, Dict[str, LiveExecutionData]], List]
+
+
+def record_transitions(transitioned_executions: List) -> None:
+    now = timezone.now()
+    watcher_metrics.status_transitions.inc(len(transitioned_executions))
+    for e in transitioned_executions:
+        watcher_metrics.persistence_lag.observe(max((now - e.current_status_at).total_seconds(), 0))
+
+
+def apply_live_data_of_manager(executions: List, live_data_map: Dict[str, LiveExecutionData],
+                               apply_live_data: ApplyLiveData) -> List[str]:
+    """Apply the live data of dispatched executions of a manager, recording the watcher metrics
+
+    Args:
+        executions (List): the dispatched executions, either tasks or workflows
+        live_data_map (Dict[str, LiveExecutionData]): the live data of the executions, by backend ref
+        apply_live_data (ApplyLiveData): the service method that applies the live data of the executions
+
+    Returns:
+        List[str]: the ref IDs of the terminated executions, to be archived once their final live data are committed
+    """
+    s = time.perf_counter()
+    transitioned_executions = apply_live_data(executions, live_data_map)
+    watcher_metrics.round_duration.labels(phase='apply').observe(time.perf_counter() - s)
+    record_transitions(transitioned_executions)
+    return [ref_id for ref_id, d in live_data_map.items() if d.is_final]
+
+
+def synchronize_executions(executions: List, apply_live_data: ApplyLiveData) -> None:
+    """Synchronize dispatched executions with their live data, recording the watcher metrics
+
+    This is the synchronization path of both the polling and the events watchers; the asyncio watcher only looks up the
+    live data differently. Executions whose manager fails to return their live data are left as they are, to be
+    checked on a subsequent round.
+
+    Args:
+        executions (List): the dispatched executions, either tasks or workflows
+        apply_live_data (ApplyLiveData): the service method that applies the live data of the executions
+    """
+    grouped = defaultdict(list)
+    for e in executions:
+        grouped[e.manager_name].append(e)
+
+    for manager_name, manager_executions in grouped.items():
+        s = time.perf_counter()
+        manager = get_manager(manager_name)
+        try:
+            live_data_map = list_live_data(
+                manager, [e.backend_ref for e in manager_executions],
+                events_cursors={e.backend_ref: e.events_cursor for e in manager_executions}
+            )
+        except Exception as ex:
+            watcher_metrics.manager_errors.labels(manager=manager_name).inc()
+            logger.error(f'Failed to retrieve live data from manager {manager_name}: {ex}', exc_info=True)
+            continue
+        finally:
+            watcher_metrics.round_duration.labels(phase='fetch').observe(time.perf_counter() - s)
+
+        # Terminated executions are archived only once their final live data are committed
+        manager.archive(apply_live_data_of_manager(manager_executions, live_data_map, apply_live_data))
+
+
+class AsyncExecutionsWatcher:
+    """
+    Synchronizes dispatched executions from an event loop.
+
+    The live data of the executions are looked up per manager and chunk concurrently, up to a maximum number of
+    lookups in flight, while database reads and writes run in the thread executor of `sync_to_async`. The watcher
+    stops gracefully on SIGTERM or SIGINT, after the executions of the current round are applied.
+    """
+
+    def __init__(self, get_due_executions: Callable[[], Tuple[List[Workflow], List[Task]]],
+                 interval: Optional[int] = None, concurrency: int = None, chunk_size: int = None):
+        self.get_due_executions = get_due_executions
+        self.interval = interval
+        self.concurrency = concurrency or settings.EXECUTIONS_SYNCHRONIZATION['MAX_CONCURRENCY']
+        self.chunk_size = chunk_size or settings.EXECUTIONS_SYNCHRONIZATION['CHUNK_SIZE']
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        logger.info('Terminating signal caught. Exiting after the current round...')
+        self._stopping.set()
+
+    async def synchronize_chunk(self, manager_name: str, manager: BaseExecutionManager, executions: List,
+                                apply_live_data: ApplyLiveData) -> None:
+        async with self._semaphore:
+            s = time.perf_counter()
+            try:
+                live_data = await manager.alist(
+                    ref_ids=[e.backend_ref for e in executions],
+                    events_cursors={e.backend_ref: e.events_cursor for e in executions}
+                )
+            except Exception as ex:
+                watcher_metrics.manager_errors.labels(manager=manager_name).inc()
+                logger.error(f'Failed to retrieve live data from manager {manager_name}: {ex}', exc_info=True)
+                return
+            finally:
+                watcher_metrics.round_duration.labels(phase='fetch').observe(time.perf_counter() - s)
+
+        # Terminated executions are archived only once their final live data are committed
+        await manager.aarchive(
+            await sync_to_async(apply_live_data_of_manager)(executions, dict(live_data), apply_live_data)
+        )
+
+    async def synchronize(self, executions: List, apply_live_data: ApplyLiveData) -> None:
+        grouped = defaultdict(list)
+        for e in executions:
+            grouped[e.manager_name].append(e)
+
+        chunks = []
+        for manager_name, manager_executions in grouped.items():
+            manager = get_manager(manager_name)
+            chunks.extend(
+                self.synchronize_chunk(manager_name, manager, manager_executions[i:i + self.chunk_size],
+                                       apply_live_data)
+                for i in range(0, len(manager_executions), self.chunk_size)
+            )
+        await asyncio.gather(*chunks)
+
+    async def run_round(self) -> None:
+        s = time.perf_counter()
+        workflows, tasks = await sync_to_async(self.get_due_executions)()
+        watcher_metrics.round_duration.labels(phase='query').observe(time.perf_counter() - s)
+        watcher_metrics.round_executions.labels(kind='workflow').observe(len(workflows))
+        watcher_metrics.round_executions.labels(kind='task').observe(len(tasks))
+        logger.info(f'Found {len(workflows)} workflow and {len(tasks)} task executions due to be checked')
+
+        await asyncio.gather(
+            self.synchronize(workflows, WorkflowService.apply_live_data),
+            self.synchronize(tasks, TaskService.apply_live_data)
+        )
+        e = time.perf_counter()
+        logger.info(f'Round completed in {e - s:.6f}s')
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, self.stop)
+
+        try:
+            while not self._stopping.is_set():
+                await self.run_round()
+                if not self.interval:
+                    break
+
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                loop.remove_signal_handler(signum)
+            for manager_name in get_manager_names():
+                await get_manager(manager_name).aclose()
@@ -2,6 +2,7 @@ from datetime import timedelta
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import caches
 from django.test import TestCase
 from django.urls import reverse
 from rest_framework import status
@@ -53,6 +54,10 @@ class ExperimentsAPIViewTestCase(APITestCase):
             'description': 'Experiment description'
         }
 
+    def setUp(self):
+        # The API keys of the test cases are fixed, so tokens resolved by previous test cases are evicted
+        caches[settings.API_TOKEN_CACHE['LOCAL_CACHE']].clear()
+
     def test_create_experiment_endpoint_returns_201_and_experiment_data_when_name_is_given(self):
         self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.api_key)
         url = reverse('experiments')
@@ -180,6 +185,10 @@ class ExperimentDetailsAPIViewTestCase(APITestCase):
             'description': 'Experiment description'
         }
 
+    def setUp(self):
+        # The API keys of the test cases are fixed, so tokens resolved by previous test cases are evicted
+        caches[settings.API_TOKEN_CACHE['LOCAL_CACHE']].clear()
+
     def test_update_experiment_endpoint_returns_202_and_experiment_data_when_name_updated(self):
         self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.api_key)
         url = reverse('experiment-details', args=[self.ref_experiment.creator.username, self.ref_experiment.name])
@@ -341,6 +350,10 @@ class ExperimentTasksAPIViewTestCase(APITestCase):
             str(t.uuid) for t in cls.tasks
         ]
 
+    def setUp(self):
+        # The API keys of the test cases are fixed, so tokens resolved by previous test cases are evicted
+        caches[settings.API_TOKEN_CACHE['LOCAL_CACHE']].clear()
+
     def test_set_experiment_tasks_returns_202_and_basic_list_of_tasks(self):
         self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.api_key)
         url = reverse('experiment-tasks', args=[self.ref_experiment.creator.username, self.ref_experiment.name])
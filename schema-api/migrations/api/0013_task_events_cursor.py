@@ -0,0 +1,48 @@
+# Generated by Django 5.2.3 on 2026-10-17 04:50
+
+from django.db import migrations, models
+from django.db.models import Case, Exists, F, IntegerField, OuterRef, Subquery, Value, When
+
+
+def get_status_precedence():
+    # STATUS_PRECEDENCE of api.constants, inlined since migrations must not depend on application code: UNKNOWN (-1)
+    # ranks above the statuses of a dispatched execution, but below its final statuses
+    return Case(When(status=-1, then=Value(13)), default=F('status') * 2, output_field=IntegerField())
+
+
+def remove_duplicate_statuses(apps, schema_editor):
+    Task = apps.get_model('api', 'Task')
+    StatusHistoryPoint = apps.get_model('api', 'StatusHistoryPoint')
+
+    # Keep the first logged point of each status of a task
+    StatusHistoryPoint.objects.filter(Exists(StatusHistoryPoint.objects.filter(
+        task=OuterRef('task'), status=OuterRef('status'), id__lt=OuterRef('id')
+    ))).delete()
+
+    latest_statuses = StatusHistoryPoint.objects.filter(task=OuterRef('pk')).annotate(
+        precedence=get_status_precedence()
+    ).order_by('-precedence', '-created_at')
+    Task.objects.update(
+        current_status=Subquery(latest_statuses.values('status')[:1]),
+        current_status_at=Subquery(latest_statuses.values('created_at')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_task_current_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='events_cursor',
+            field=models.PositiveIntegerField(default=0, help_text='Number of live events of the task execution that have already been applied'),
+        ),
+        migrations.RunPython(remove_duplicate_statuses, reverse_code=migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='statushistorypoint',
+            constraint=models.UniqueConstraint(fields=('task', 'status'), name='status_history_task_status_unique'),
+        ),
+    ]
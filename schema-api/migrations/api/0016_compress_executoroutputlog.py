@@ -0,0 +1,58 @@
+from django.db import migrations, models
+
+import util.fields
+
+BATCH_SIZE = 1000
+
+
+def copy_logs(apps, source_prefix, target_prefix):
+    ExecutorOutputLog = apps.get_model('api', 'ExecutorOutputLog')
+    fields = [f'{target_prefix}stdout', f'{target_prefix}stderr']
+
+    batch = []
+    for log in ExecutorOutputLog.objects.order_by('pk').iterator(chunk_size=BATCH_SIZE):
+        for stream in ('stdout', 'stderr'):
+            setattr(log, f'{target_prefix}{stream}', getattr(log, f'{source_prefix}{stream}'))
+        batch.append(log)
+        if len(batch) == BATCH_SIZE:
+            ExecutorOutputLog.objects.bulk_update(batch, fields)
+            batch = []
+    ExecutorOutputLog.objects.bulk_update(batch, fields)
+
+
+def compress_logs(apps, schema_editor):
+    copy_logs(apps, '', 'compressed_')
+
+
+def decompress_logs(apps, schema_editor):
+    copy_logs(apps, 'compressed_', '')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_task_live_data_misses'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='executoroutputlog',
+            name='compressed_stdout',
+            field=util.fields.CompressedTextField(default=''),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='executoroutputlog',
+            name='compressed_stderr',
+            field=util.fields.CompressedTextField(default=''),
+            preserve_default=False,
+        ),
+        migrations.RunPython(compress_logs, reverse_code=decompress_logs),
+        # Defaults allow the plain columns to be restored when reversing the migration
+        migrations.AlterField(model_name='executoroutputlog', name='stdout', field=models.TextField(default='')),
+        migrations.AlterField(model_name='executoroutputlog', name='stderr', field=models.TextField(default='')),
+        migrations.RemoveField(model_name='executoroutputlog', name='stdout'),
+        migrations.RemoveField(model_name='executoroutputlog', name='stderr'),
+        migrations.RenameField(model_name='executoroutputlog', old_name='compressed_stdout', new_name='stdout'),
+        migrations.RenameField(model_name='executoroutputlog', old_name='compressed_stderr', new_name='stderr'),
+    ]
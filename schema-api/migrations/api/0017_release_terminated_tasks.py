@@ -0,0 +1,25 @@
+# Generated by Django 5.2.3 on 2026-10-17 05:20
+
+from django.db import migrations, models
+
+
+def release_terminated_tasks(apps, schema_editor):
+    # Tasks that have already terminated (UNKNOWN, REJECTED, COMPLETED, ERROR or CANCELED) no longer hold resources
+    Task = apps.get_model('api', 'Task')
+    Task.objects.filter(pending=True, current_status__in=[-1, 2, 7, 8, 9]).update(pending=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_compress_executoroutputlog'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='task',
+            name='pending',
+            field=models.BooleanField(default=True, help_text='Whether the task still holds the resources that it requested; cleared once the task terminates, when it is released from the quotas ledgers'),
+        ),
+        migrations.RunPython(release_terminated_tasks, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-17 05:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_compress_executoroutputlog'),
+        ('api_auth', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='apitoken',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['key', 'expiry'], name='api_token_active_key_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.3 on 2026-10-17 04:53
+
+import util.defaults
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WatchWorker',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Name of a watch worker, unique within the worker set', max_length=255, unique=True)),
+                ('heartbeat_at', models.DateTimeField(default=util.defaults.get_current_datetime, help_text='Time of the latest heartbeat of the worker')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='WatchShardLease',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveIntegerField(help_text='Shard of the dispatched executions, as the remainder of their ID divided by the total number of shards', unique=True)),
+                ('owner', models.CharField(blank=True, help_text='Name of the watch worker holding the lease', max_length=255)),
+                ('expires_at', models.DateTimeField(help_text='Time after which the lease may be claimed by another worker', null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['owner'], name='watch_shard_lease_owner_idx')],
+            },
+        ),
+    ]
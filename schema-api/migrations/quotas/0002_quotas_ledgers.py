@@ -0,0 +1,47 @@
+# Generated by Django 5.2.3 on 2026-10-17 05:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_release_terminated_tasks'),
+        ('quotas', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContextQuotasLedger',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('active_tasks', models.IntegerField(default=0)),
+                ('active_cpu_cores', models.IntegerField(default=0)),
+                ('active_ram_gb', models.FloatField(default=0)),
+                ('active_disk_gb', models.FloatField(default=0)),
+                ('total_tasks', models.IntegerField(default=0)),
+                ('reconciled_at', models.DateTimeField(help_text='Time of the latest reconciliation against the tasks; ledgers that have never been reconciled are reconciled on their first use', null=True)),
+                ('context', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='quotas_ledger', to='api.context')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ParticipationQuotasLedger',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('active_tasks', models.IntegerField(default=0)),
+                ('active_cpu_cores', models.IntegerField(default=0)),
+                ('active_ram_gb', models.FloatField(default=0)),
+                ('active_disk_gb', models.FloatField(default=0)),
+                ('total_tasks', models.IntegerField(default=0)),
+                ('reconciled_at', models.DateTimeField(help_text='Time of the latest reconciliation against the tasks; ledgers that have never been reconciled are reconciled on their first use', null=True)),
+                ('participation', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='quotas_ledger', to='api.participation')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
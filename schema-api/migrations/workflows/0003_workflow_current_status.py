@@ -0,0 +1,51 @@
+# Generated by Django 5.2.3 on 2026-10-17 04:37
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, F, IntegerField, OuterRef, Subquery, Value, When
+
+
+def get_status_precedence():
+    # STATUS_PRECEDENCE of api.constants, inlined since migrations must not depend on application code: UNKNOWN (-1)
+    # ranks above the statuses of a dispatched execution, but below its final statuses
+    return Case(When(status=-1, then=Value(13)), default=F('status') * 2, output_field=IntegerField())
+
+
+def backfill_current_status(apps, schema_editor):
+    Workflow = apps.get_model('workflows', 'Workflow')
+    WorkflowStatusLog = apps.get_model('workflows', 'WorkflowStatusLog')
+
+    latest_statuses = WorkflowStatusLog.objects.filter(workflow=OuterRef('pk')).annotate(
+        precedence=get_status_precedence()
+    ).order_by('-precedence', '-created_at')
+    Workflow.objects.update(
+        current_status=Subquery(latest_statuses.values('status')[:1]),
+        current_status_at=Subquery(latest_statuses.values('created_at')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_task_current_status'),
+        ('workflows', '0002_rename_value_workflowstatuslog_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workflow',
+            name='current_status',
+            field=models.IntegerField(choices=[(-1, 'UNKNOWN'), (0, 'SUBMITTED'), (1, 'APPROVED'), (2, 'REJECTED'), (3, 'QUEUED'), (4, 'SCHEDULED'), (5, 'INITIALIZING'), (6, 'RUNNING'), (7, 'COMPLETED'), (8, 'ERROR'), (9, 'CANCELED')], help_text='Latest status of the workflow, as recorded in its status logs', null=True),
+        ),
+        migrations.AddField(
+            model_name='workflow',
+            name='current_status_at',
+            field=models.DateTimeField(help_text='Timestamp of the latest status of the workflow', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='workflow',
+            index=models.Index(fields=['current_status'], name='workflow_current_status_idx'),
+        ),
+        migrations.RunPython(backfill_current_status, reverse_code=migrations.RunPython.noop),
+    ]
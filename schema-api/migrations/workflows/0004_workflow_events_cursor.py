@@ -0,0 +1,48 @@
+# Generated by Django 5.2.3 on 2026-10-17 04:50
+
+from django.db import migrations, models
+from django.db.models import Case, Exists, F, IntegerField, OuterRef, Subquery, Value, When
+
+
+def get_status_precedence():
+    # STATUS_PRECEDENCE of api.constants, inlined since migrations must not depend on application code: UNKNOWN (-1)
+    # ranks above the statuses of a dispatched execution, but below its final statuses
+    return Case(When(status=-1, then=Value(13)), default=F('status') * 2, output_field=IntegerField())
+
+
+def remove_duplicate_statuses(apps, schema_editor):
+    Workflow = apps.get_model('workflows', 'Workflow')
+    WorkflowStatusLog = apps.get_model('workflows', 'WorkflowStatusLog')
+
+    # Keep the first logged entry of each status of a workflow
+    WorkflowStatusLog.objects.filter(Exists(WorkflowStatusLog.objects.filter(
+        workflow=OuterRef('workflow'), status=OuterRef('status'), id__lt=OuterRef('id')
+    ))).delete()
+
+    latest_statuses = WorkflowStatusLog.objects.filter(workflow=OuterRef('pk')).annotate(
+        precedence=get_status_precedence()
+    ).order_by('-precedence', '-created_at')
+    Workflow.objects.update(
+        current_status=Subquery(latest_statuses.values('status')[:1]),
+        current_status_at=Subquery(latest_statuses.values('created_at')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflows', '0003_workflow_current_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workflow',
+            name='events_cursor',
+            field=models.PositiveIntegerField(default=0, help_text='Number of live events of the workflow execution that have already been applied'),
+        ),
+        migrations.RunPython(remove_duplicate_statuses, reverse_code=migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='workflowstatuslog',
+            constraint=models.UniqueConstraint(fields=('workflow', 'status'), name='workflow_status_log_workflow_status_unique'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.3 on 2026-10-17 04:55
+
+import util.defaults
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_task_next_check_at'),
+        ('workflows', '0004_workflow_events_cursor'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workflow',
+            name='next_check_at',
+            field=models.DateTimeField(default=util.defaults.get_current_datetime, help_text='Time at which the live data of the workflow execution are due to be checked'),
+        ),
+        migrations.AddIndex(
+            model_name='workflow',
+            index=models.Index(condition=models.Q(('current_status__in', [3, 5, 6, 4])), fields=['next_check_at'], name='workflow_next_check_at_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-17 05:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflows', '0005_workflow_next_check_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workflow',
+            name='live_data_misses',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Number of consecutive checks in which the live data of the workflow execution were missing'),
+        ),
+    ]
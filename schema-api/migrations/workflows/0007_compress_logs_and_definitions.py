@@ -0,0 +1,68 @@
+from django.db import migrations, models
+
+import util.fields
+
+BATCH_SIZE = 1000
+
+
+def copy_fields(apps, model_name, field_names, source_prefix, target_prefix):
+    Model = apps.get_model('workflows', model_name)
+    fields = [f'{target_prefix}{field_name}' for field_name in field_names]
+
+    batch = []
+    for obj in Model.objects.order_by('pk').iterator(chunk_size=BATCH_SIZE):
+        for field_name in field_names:
+            setattr(obj, f'{target_prefix}{field_name}', getattr(obj, f'{source_prefix}{field_name}'))
+        batch.append(obj)
+        if len(batch) == BATCH_SIZE:
+            Model.objects.bulk_update(batch, fields)
+            batch = []
+    Model.objects.bulk_update(batch, fields)
+
+
+def compress_fields(apps, schema_editor):
+    copy_fields(apps, 'WorkflowDefinition', ['content'], '', 'compressed_')
+    copy_fields(apps, 'WorkflowExecutorOutputLog', ['stdout', 'stderr'], '', 'compressed_')
+
+
+def decompress_fields(apps, schema_editor):
+    copy_fields(apps, 'WorkflowDefinition', ['content'], 'compressed_', '')
+    copy_fields(apps, 'WorkflowExecutorOutputLog', ['stdout', 'stderr'], 'compressed_', '')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflows', '0006_workflow_live_data_misses'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workflowdefinition',
+            name='compressed_content',
+            field=util.fields.CompressedTextField(blank=True, default=''),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='workflowexecutoroutputlog',
+            name='compressed_stdout',
+            field=util.fields.CompressedJSONField(default=list),
+        ),
+        migrations.AddField(
+            model_name='workflowexecutoroutputlog',
+            name='compressed_stderr',
+            field=util.fields.CompressedJSONField(default=list),
+        ),
+        migrations.RunPython(compress_fields, reverse_code=decompress_fields),
+        # A default allows the plain column to be restored when reversing the migration
+        migrations.AlterField(model_name='workflowdefinition', name='content',
+                              field=models.TextField(blank=True, default='')),
+        migrations.RemoveField(model_name='workflowdefinition', name='content'),
+        migrations.RemoveField(model_name='workflowexecutoroutputlog', name='stdout'),
+        migrations.RemoveField(model_name='workflowexecutoroutputlog', name='stderr'),
+        migrations.RenameField(model_name='workflowdefinition', old_name='compressed_content', new_name='content'),
+        migrations.RenameField(model_name='workflowexecutoroutputlog', old_name='compressed_stdout',
+                               new_name='stdout'),
+        migrations.RenameField(model_name='workflowexecutoroutputlog', old_name='compressed_stderr',
+                               new_name='stderr'),
+    ]
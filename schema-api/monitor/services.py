@@ -2,10 +2,10 @@ from typing import Dict
 
 from django.conf import settings
 from django.core.cache import cache
-from django.db.models import OuterRef, Subquery, Count, Avg, ExpressionWrapper, F, DurationField, Sum
+from django.db.models import Count, Avg, ExpressionWrapper, F, DurationField, Sum
 
 from api.constants import TaskStatus
-from api.models import Task, StatusHistoryPoint
+from api.models import Task
 from api_auth.constants import AuthEntityType
 
 
@@ -17,19 +17,12 @@ class ApplicationServiceMonitoringService:
         self.application_service = application_service
 
     def _extract_metrics(self) -> Dict[str, object]:
-        latest_status_log_by_task = (
-            StatusHistoryPoint.objects
-            .filter(task=OuterRef('pk'))
-            .order_by('-created_at')[:1]
-        )
-
         tasks = (
             Task.objects
-            .annotate(status=Subquery(latest_status_log_by_task.values('status')))
-            .annotate(latest_status_update=Subquery(latest_status_log_by_task.values('created_at')))
+            .annotate(status=F('current_status'))
             .annotate(
                 duration_since_last_update=ExpressionWrapper(
-                    F('latest_status_update') - F('submitted_at'),
+                    F('current_status_at') - F('submitted_at'),
                     output_field=DurationField()
                 )
             )
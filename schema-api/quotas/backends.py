@@ -0,0 +1,519 @@
+"""
+Backends of the quotas ledgers
+
+A ledger holds the totals of the tasks that count against the quotas of a context or of a participation. The database
+backend keeps the ledgers in tables and admits submissions while holding a lock on their rows, which serializes the
+submissions of each context. The Redis backend keeps them in hashes and admits submissions with a Lua script, so that
+concurrent submissions of a context are admitted atomically without waiting on each other.
+"""
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache, partial
+from typing import Dict, List, Optional, Tuple, Type
+
+import redis
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Q, QuerySet, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from api.models import Context, Participation, Task
+from core.managers.redis import get_connection_pool
+from quotas.exceptions import QuotaHardViolationError, QuotaSoftViolationError
+from quotas.models import Quotas, QuotasLedger, ContextQuotasLedger, ParticipationQuotasLedger
+from util.exceptions import ApplicationError
+
+logger = logging.getLogger(__name__)
+
+LEDGER_FIELDS = ('total_tasks', 'active_tasks', 'active_cpu_cores', 'active_ram_gb', 'active_disk_gb')
+# The quota that limits each total of the ledgers
+LEDGER_QUOTAS = {
+    'total_tasks': 'total_tasks',
+    'active_tasks': 'max_active_tasks',
+    'active_cpu_cores': 'max_active_cpu_cores',
+    'active_ram_gb': 'max_active_ram_gb',
+    'active_disk_gb': 'max_active_disk_gb'
+}
+# Totals are evaluated in this order, for the context (0) and for the participation (1); the total tasks quotas, which
+# are permanently violated, come first
+EVALUATION_ORDER = (
+    (0, 'total_tasks'), (1, 'total_tasks'),
+    *((0, field) for field in LEDGER_FIELDS[1:]),
+    *((1, field) for field in LEDGER_FIELDS[1:])
+)
+
+# Totals to release from ledgers, by context id and by (context id, user id) respectively
+ContextTotals = Dict[int, Dict[str, float]]
+ParticipationTotals = Dict[Tuple[int, int], Dict[str, float]]
+
+
+def get_ledger_totals(tasks: QuerySet[Task]) -> Dict[str, float]:
+    active = Q(pending=True)
+    return tasks.aggregate(
+        active_tasks=Count('id', filter=active),
+        active_cpu_cores=Coalesce(Sum('resources__cpu_cores', filter=active), 0),
+        active_ram_gb=Coalesce(Sum('resources__ram_gb', filter=active), Value(0.), output_field=FloatField()),
+        active_disk_gb=Coalesce(Sum('resources__disk_gb', filter=active), Value(0.), output_field=FloatField()),
+        total_tasks=Count('id')
+    )
+
+
+def get_limit(quotas: Quotas, quota: str) -> Optional[float]:
+    limit = getattr(quotas, quota)
+    # Task count quotas of 0 are considered unset
+    if not limit and quota in ('total_tasks', 'max_active_tasks'):
+        return None
+    return limit
+
+
+def raise_violation(field: str, is_context_evaluation: bool, current: float, requested: float, limit: float) -> None:
+    error_class = QuotaHardViolationError if field == 'total_tasks' else QuotaSoftViolationError
+    raise error_class(
+        LEDGER_QUOTAS[field],
+        is_context_evaluation,
+        current=current,
+        requested=requested,
+        limit=limit,
+    )
+
+
+class QuotasLedgerBackend(ABC):
+
+    @abstractmethod
+    def reserve(self, participation: Participation, tasks: List[Task], requested: Dict[str, float],
+                context_quotas: Quotas, participation_quotas: Quotas) -> None:
+        """Admit the requested totals of a batch of submitted tasks, adding them to the ledgers of the context and of
+        the participation
+
+        Raises:
+            QuotaHardViolationError: if the batch exceeds the total tasks quota
+            QuotaSoftViolationError: if the batch exceeds a quota of active tasks or resources
+        """
+        pass
+
+    @abstractmethod
+    def cancel(self, participation: Participation, tasks: List[Task], requested: Dict[str, float]) -> None:
+        """Undo a reservation whose submission failed"""
+        pass
+
+    @abstractmethod
+    def release(self, context_totals: ContextTotals, participation_totals: ParticipationTotals) -> None:
+        """Subtract the totals of released tasks from the ledgers, in the transaction that releases the tasks"""
+        pass
+
+    @abstractmethod
+    def reconcile(self) -> int:
+        """Recompute the ledgers from the tasks, returning the number of reconciled ledgers"""
+        pass
+
+
+class DatabaseQuotasLedgerBackend(QuotasLedgerBackend):
+    """
+    Keeps the ledgers in the database, along with the tasks.
+
+    The ledgers are locked for the admission of a batch until the end of the submitting transaction, so that a batch
+    that is rolled back is never accounted for.
+    """
+
+    @staticmethod
+    def _reconcile_ledger(ledger: QuotasLedger, tasks: QuerySet[Task]) -> None:
+        for field, value in get_ledger_totals(tasks).items():
+            setattr(ledger, field, value)
+        ledger.reconciled_at = timezone.now()
+        ledger.save()
+
+    @staticmethod
+    def _lock_ledger(model: Type[QuotasLedger], **lookup) -> QuotasLedger:
+        ledger = model.objects.select_for_update().filter(**lookup).first()
+        if ledger is None:
+            model.objects.bulk_create([model(**lookup)], ignore_conflicts=True)
+            ledger = model.objects.select_for_update().get(**lookup)
+        return ledger
+
+    def _lock_ledgers(self, participation: Participation,
+                      excluded_tasks: List[Task]) -> Tuple[ContextQuotasLedger, ParticipationQuotasLedger]:
+        context_id, user_id = participation.context_id, participation.user_id
+
+        # The context ledger is always locked before the participation ledgers, so that submissions and releases
+        # cannot deadlock
+        context_ledger = self._lock_ledger(ContextQuotasLedger, context_id=context_id)
+        participation_ledger = self._lock_ledger(ParticipationQuotasLedger, participation=participation)
+
+        # Ledgers are created lazily, so that they are first reconciled against the tasks submitted before them
+        tasks = Task.objects.exclude(pk__in=[t.pk for t in excluded_tasks])
+        if context_ledger.reconciled_at is None:
+            self._reconcile_ledger(context_ledger, tasks.filter(context_id=context_id))
+        if participation_ledger.reconciled_at is None:
+            self._reconcile_ledger(participation_ledger, tasks.filter(context_id=context_id, user_id=user_id))
+        return context_ledger, participation_ledger
+
+    @staticmethod
+    def _increment_ledger(model: Type[QuotasLedger], lookup: Dict, requested: Dict[str, float],
+                          quotas: Quotas) -> bool:
+        # The ledger is checked against its quotas and incremented with a single conditional statement, which also locks
+        # it until the end of the submitting transaction
+        within_quotas = {}
+        for field in LEDGER_FIELDS:
+            limit = get_limit(quotas, LEDGER_QUOTAS[field])
+            if limit is not None:
+                within_quotas[f'{field}__lte'] = limit - requested[field]
+        return model.objects.filter(reconciled_at__isnull=False, **lookup, **within_quotas).update(
+            **{field: F(field) + value for field, value in requested.items()}
+        ) > 0
+
+    def reserve(self, participation: Participation, tasks: List[Task], requested: Dict[str, float],
+                context_quotas: Quotas, participation_quotas: Quotas) -> None:
+        quotas = (context_quotas, participation_quotas)
+        # The context ledger is always updated before the participation ledger, as in `_lock_ledgers`
+        lookups = (
+            (ContextQuotasLedger, {'context_id': participation.context_id}),
+            (ParticipationQuotasLedger, {'participation_id': participation.pk})
+        )
+        n_incremented = 0
+        for (model, lookup), ledger_quotas in zip(lookups, quotas):
+            if not self._increment_ledger(model, lookup, requested, ledger_quotas):
+                break
+            n_incremented += 1
+        if n_incremented == len(lookups):
+            return
+
+        # Ledgers that are missing, not reconciled yet or whose quotas would be exceeded are locked and evaluated in
+        # full, so that violations are reported in their evaluation order; the increments that were already applied are
+        # excluded from the evaluation
+        ledgers = self._lock_ledgers(participation, tasks)
+        for i, field in EVALUATION_ORDER:
+            limit = get_limit(quotas[i], LEDGER_QUOTAS[field])
+            current = getattr(ledgers[i], field) - (requested[field] if i < n_incremented else 0)
+            if limit is not None and current + requested[field] > limit:
+                raise_violation(field, i == 0, current, requested[field], limit)
+
+        for ledger in ledgers[n_incremented:]:
+            type(ledger).objects.filter(pk=ledger.pk).update(
+                **{field: F(field) + value for field, value in requested.items()}
+            )
+
+    def cancel(self, participation: Participation, tasks: List[Task], requested: Dict[str, float]) -> None:
+        # The reservation is rolled back along with the submission
+        pass
+
+    def release(self, context_totals: ContextTotals, participation_totals: ParticipationTotals) -> None:
+        # Ledgers are locked in a consistent order, contexts first, so that concurrent releases cannot deadlock
+        for context_id in sorted(context_totals):
+            ContextQuotasLedger.objects.filter(context_id=context_id).update(
+                **{field: F(field) - value for field, value in context_totals[context_id].items()}
+            )
+        for (context_id, user_id), totals in sorted(participation_totals.items()):
+            ParticipationQuotasLedger.objects.filter(
+                participation__context_id=context_id, participation__user_id=user_id
+            ).update(**{field: F(field) - value for field, value in totals.items()})
+
+    def reconcile(self) -> int:
+        # Each ledger is reconciled in a separate transaction, so that submissions are only blocked briefly
+        n_ledgers = 0
+        for ledger_id in ContextQuotasLedger.objects.values_list('pk', flat=True).iterator():
+            with transaction.atomic():
+                ledger = ContextQuotasLedger.objects.select_for_update().filter(pk=ledger_id).first()
+                if ledger is not None:
+                    self._reconcile_ledger(ledger, Task.objects.filter(context_id=ledger.context_id))
+                    n_ledgers += 1
+
+        for ledger_id in ParticipationQuotasLedger.objects.values_list('pk', flat=True).iterator():
+            with transaction.atomic():
+                ledger = ParticipationQuotasLedger.objects.select_for_update(of=('self',)).select_related(
+                    'participation'
+                ).filter(pk=ledger_id).first()
+                if ledger is not None:
+                    self._reconcile_ledger(ledger, Task.objects.filter(
+                        context_id=ledger.participation.context_id, user_id=ledger.participation.user_id
+                    ))
+                    n_ledgers += 1
+        return n_ledgers
+
+
+_LUA_FIELDS = '{' + ', '.join(f"'{field}'" for field in LEDGER_FIELDS) + '}'
+
+# KEYS: the context and the participation ledgers, and the pending reservations of the context
+# ARGV: the requested totals, followed by the limits of the context and of the participation, -1 for no limit, and the
+# id and the record of the reservation
+# Returns {0} if admitted, {1} if a ledger is not initialized or {2, ledger, field, current} on a violation
+_RESERVE_SCRIPT = f'''
+local fields = {_LUA_FIELDS}
+local n = #fields
+for k = 1, 2 do
+    if redis.call('HEXISTS', KEYS[k], 'version') == 0 then
+        return {{1}}
+    end
+end
+local order = {{{{1, 1}}, {{2, 1}}}}
+for k = 1, 2 do
+    for f = 2, n do
+        order[#order + 1] = {{k, f}}
+    end
+end
+for _, e in ipairs(order) do
+    local k, f = e[1], e[2]
+    local limit = tonumber(ARGV[k * n + f])
+    if limit >= 0 then
+        local current = tonumber(redis.call('HGET', KEYS[k], fields[f]) or '0')
+        if current + tonumber(ARGV[f]) > limit then
+            return {{2, k, f, tostring(current)}}
+        end
+    end
+end
+local now = redis.call('TIME')[1]
+for k = 1, 2 do
+    for f = 1, n do
+        redis.call('HINCRBYFLOAT', KEYS[k], fields[f], ARGV[f])
+    end
+    redis.call('HSET', KEYS[k], 'reserved_at', now)
+    redis.call('HINCRBY', KEYS[k], 'version', 1)
+end
+redis.call('HSET', KEYS[3], ARGV[3 * n + 1], ARGV[3 * n + 2])
+return {{0}}
+'''
+
+# KEYS: the ledgers to subtract from; ledgers that are not initialized are skipped
+# ARGV: the totals to subtract from each ledger, consecutively
+_RELEASE_SCRIPT = f'''
+local fields = {_LUA_FIELDS}
+local n = #fields
+for k, key in ipairs(KEYS) do
+    if redis.call('HEXISTS', key, 'version') == 1 then
+        for f = 1, n do
+            redis.call('HINCRBYFLOAT', key, fields[f], -tonumber(ARGV[(k - 1) * n + f]))
+        end
+        redis.call('HINCRBY', key, 'version', 1)
+    end
+end
+return 0
+'''
+
+# KEYS: the context and the participation ledgers, and the pending reservations of the context
+# ARGV: the id of the reservation and the reserved totals
+# Returns 1 if the reservation was pending and has been cancelled
+_CANCEL_SCRIPT = f'''
+local fields = {_LUA_FIELDS}
+if redis.call('HDEL', KEYS[3], ARGV[1]) == 0 then
+    return 0
+end
+for k = 1, 2 do
+    if redis.call('HEXISTS', KEYS[k], 'version') == 1 then
+        for f = 1, #fields do
+            redis.call('HINCRBYFLOAT', KEYS[k], fields[f], -tonumber(ARGV[f + 1]))
+        end
+        redis.call('HINCRBY', KEYS[k], 'version', 1)
+    end
+end
+return 1
+'''
+
+# KEYS: the ledger and the pending reservations of its context
+# ARGV: the version of the ledger when its totals were computed, empty to initialize a new ledger, the seconds after a
+# reservation during which the ledger is not reconciled, and the totals
+# Returns 1 if the totals were set
+_RECONCILE_SCRIPT = f'''
+local fields = {_LUA_FIELDS}
+local version = redis.call('HGET', KEYS[1], 'version')
+if ARGV[1] == '' then
+    if version then
+        return 0
+    end
+else
+    if version ~= ARGV[1] or redis.call('HLEN', KEYS[2]) > 0 then
+        return 0
+    end
+    local reserved_at = tonumber(redis.call('HGET', KEYS[1], 'reserved_at') or '0')
+    if tonumber(redis.call('TIME')[1]) - reserved_at < tonumber(ARGV[2]) then
+        return 0
+    end
+end
+for f, field in ipairs(fields) do
+    redis.call('HSET', KEYS[1], field, ARGV[f + 2])
+end
+redis.call('HINCRBY', KEYS[1], 'version', 1)
+return 1
+'''
+
+RESERVATION_ADMITTED = 0
+RESERVATION_UNINITIALIZED = 1
+RESERVATION_VIOLATION = 2
+
+
+def _parse_total(value: str) -> float:
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+class RedisQuotasLedgerBackend(QuotasLedgerBackend):
+    """
+    Keeps the ledgers in Redis hashes, updated by Lua scripts.
+
+    A batch is evaluated and added to the ledgers of its context and participation by a single script, which Redis
+    runs atomically, so that concurrent submissions neither wait on a lock nor exceed the quotas together. Since Redis
+    does not take part in the database transactions:
+
+    - ledgers that are missing from Redis are initialized from the tasks on their first reservation;
+    - a reservation is recorded as pending under the id of the first task of its batch and is confirmed once the
+      submission is committed, or cancelled if the submission fails while the reservation is held;
+    - reservations whose submission is rolled back after they are released by `QuotasLedgerService.reserve`, for
+      example by an enclosing transaction or a failed commit, stay pending; on reconciliation, pending reservations
+      older than the grace period are cancelled if their tasks do not exist and dropped otherwise. Until then, the
+      totals of such a reservation count against the quotas of its context and participation;
+    - released totals are only subtracted once the release is committed;
+    - a ledger is only reconciled if it has not changed while its totals were computed, if it has not been reserved
+      for a grace period and if no reservation of its context is pending, so that the tasks of reservations that are
+      not yet committed are never missed and no reservation is compensated twice.
+    """
+
+    def __init__(self, *, host: str, port: int = 6379, db: int = 0, key_prefix: str = 'schema-api:quotas',
+                 reconcile_grace_seconds: int = 300, connection_options: Dict = None):
+        self.key_prefix = key_prefix
+        self.reconcile_grace_seconds = reconcile_grace_seconds
+        self.client = redis.Redis(connection_pool=get_connection_pool(host, port, db, **(connection_options or {})))
+        self._reserve_script = self.client.register_script(_RESERVE_SCRIPT)
+        self._release_script = self.client.register_script(_RELEASE_SCRIPT)
+        self._cancel_script = self.client.register_script(_CANCEL_SCRIPT)
+        self._reconcile_script = self.client.register_script(_RECONCILE_SCRIPT)
+
+    # The ledgers of a context and of its participations share a hash tag, so that they are stored in the same slot of
+    # a Redis cluster and can be updated by the same script
+    def get_context_key(self, context_id: int) -> str:
+        return f'{self.key_prefix}:{{{context_id}}}'
+
+    def get_participation_key(self, context_id: int, user_id: int) -> str:
+        return f'{self.key_prefix}:{{{context_id}}}:{user_id}'
+
+    def get_reservations_key(self, context_id: int) -> str:
+        return f'{self.key_prefix}:{{{context_id}}}:reservations'
+
+    @staticmethod
+    def get_reservation_id(tasks: List[Task]) -> int:
+        # The tasks of a batch are committed or rolled back together, and their ids are never reused
+        return min(t.pk for t in tasks)
+
+    def _initialize(self, key: str, context_id: int, tasks: QuerySet[Task]) -> None:
+        totals = get_ledger_totals(tasks)
+        self._reconcile_script(keys=[key, self.get_reservations_key(context_id)],
+                               args=['', 0, *(totals[field] for field in LEDGER_FIELDS)])
+
+    def reserve(self, participation: Participation, tasks: List[Task], requested: Dict[str, float],
+                context_quotas: Quotas, participation_quotas: Quotas) -> None:
+        context_id, user_id = participation.context_id, participation.user_id
+        keys = [self.get_context_key(context_id), self.get_participation_key(context_id, user_id),
+                self.get_reservations_key(context_id)]
+        limits = [
+            -1 if (limit := get_limit(quotas, LEDGER_QUOTAS[field])) is None else limit
+            for quotas in (context_quotas, participation_quotas) for field in LEDGER_FIELDS
+        ]
+        reservation_id = self.get_reservation_id(tasks)
+        reservation = json.dumps({'user_id': user_id, 'reserved_at': time.time(), 'requested': requested})
+        args = [requested[field] for field in LEDGER_FIELDS] + limits + [reservation_id, reservation]
+
+        result, *details = self._reserve_script(keys=keys, args=args)
+        if result == RESERVATION_UNINITIALIZED:
+            # The tasks of the batch are already stored, but are only accounted for by the reservation
+            other_tasks = Task.objects.filter(context_id=context_id).exclude(pk__in=[t.pk for t in tasks])
+            self._initialize(keys[0], context_id, other_tasks)
+            self._initialize(keys[1], context_id, other_tasks.filter(user_id=user_id))
+            result, *details = self._reserve_script(keys=keys, args=args)
+
+        if result == RESERVATION_VIOLATION:
+            # Ledgers and fields are numbered from 1 by the script
+            i, f = int(details[0]) - 1, int(details[1]) - 1
+            field = LEDGER_FIELDS[f]
+            raise_violation(field, i == 0, _parse_total(details[2]), requested[field],
+                            limits[i * len(LEDGER_FIELDS) + f])
+        if result != RESERVATION_ADMITTED:
+            raise ApplicationError(f'Quotas ledgers of context {context_id} could not be initialized')
+        transaction.on_commit(partial(self._confirm, context_id, reservation_id), robust=True)
+
+    def _confirm(self, context_id: int, reservation_id: int) -> None:
+        self.client.hdel(self.get_reservations_key(context_id), reservation_id)
+
+    def _subtract(self, totals: Dict[str, Dict[str, float]]) -> None:
+        self._release_script(
+            keys=list(totals),
+            args=[key_totals.get(field, 0) for key_totals in totals.values() for field in LEDGER_FIELDS]
+        )
+
+    def _cancel(self, context_id: int, user_id: int, reservation_id: int, requested: Dict[str, float]) -> int:
+        # Reservations are cancelled at most once, either when their submission fails or on reconciliation
+        return self._cancel_script(
+            keys=[self.get_context_key(context_id), self.get_participation_key(context_id, user_id),
+                  self.get_reservations_key(context_id)],
+            args=[reservation_id, *(requested[field] for field in LEDGER_FIELDS)]
+        )
+
+    def cancel(self, participation: Participation, tasks: List[Task], requested: Dict[str, float]) -> None:
+        context_id, user_id = participation.context_id, participation.user_id
+        try:
+            self._cancel(context_id, user_id, self.get_reservation_id(tasks), requested)
+        except redis.RedisError as e:
+            logger.error(f'Failed to cancel the quotas reservation of a failed submission in context {context_id}; '
+                         f'it will be cancelled on reconciliation: {e}')
+
+    def release(self, context_totals: ContextTotals, participation_totals: ParticipationTotals) -> None:
+        grouped = {context_id: {self.get_context_key(context_id): totals} for context_id, totals in
+                   context_totals.items()}
+        for (context_id, user_id), totals in participation_totals.items():
+            grouped.setdefault(context_id, dict())[self.get_participation_key(context_id, user_id)] = totals
+
+        # Each context is released by a separate script, since its ledgers may be stored in a different cluster slot
+        for context_id in sorted(grouped):
+            transaction.on_commit(partial(self._subtract, grouped[context_id]), robust=True)
+
+    def reconcile(self) -> int:
+        n_ledgers = 0
+        for context_id in Context.objects.values_list('pk', flat=True).iterator():
+            self._compensate_reservations(context_id)
+            n_ledgers += self._reconcile_ledger(self.get_context_key(context_id), context_id,
+                                                Task.objects.filter(context_id=context_id))
+        for context_id, user_id in Participation.objects.values_list('context_id', 'user_id').iterator():
+            n_ledgers += self._reconcile_ledger(self.get_participation_key(context_id, user_id), context_id,
+                                                Task.objects.filter(context_id=context_id, user_id=user_id))
+        return n_ledgers
+
+    def _compensate_reservations(self, context_id: int) -> None:
+        key = self.get_reservations_key(context_id)
+        expired_at = time.time() - self.reconcile_grace_seconds
+        for reservation_id, reservation in self.client.hgetall(key).items():
+            reservation_id, reservation = int(reservation_id), json.loads(reservation)
+            if reservation['reserved_at'] > expired_at:
+                continue
+            if Task.objects.filter(pk=reservation_id).exists():
+                # The submission was committed, but its confirmation was lost
+                self.client.hdel(key, reservation_id)
+            elif self._cancel(context_id, reservation['user_id'], reservation_id, reservation['requested']):
+                logger.warning(f'Cancelled the quotas reservation of task {reservation_id} in context {context_id}, '
+                               f'whose submission was rolled back')
+
+    def _reconcile_ledger(self, key: str, context_id: int, tasks: QuerySet[Task]) -> int:
+        version = self.client.hget(key, 'version')
+        if version is None:
+            # Ledgers that have never been reserved are initialized on their first reservation
+            return 0
+        totals = get_ledger_totals(tasks)
+        return self._reconcile_script(
+            keys=[key, self.get_reservations_key(context_id)],
+            args=[version, self.reconcile_grace_seconds, *(totals[field] for field in LEDGER_FIELDS)]
+        )
+
+
+@lru_cache(maxsize=1)
+def get_quotas_ledger_backend() -> QuotasLedgerBackend:
+    backend = settings.QUOTAS_LEDGER['BACKEND']
+    if backend == 'database':
+        return DatabaseQuotasLedgerBackend()
+    if backend == 'redis':
+        redis_settings = settings.QUOTAS_LEDGER['REDIS']
+        return RedisQuotasLedgerBackend(
+            host=redis_settings['HOST'], port=redis_settings['PORT'], db=redis_settings['DB'],
+            key_prefix=redis_settings['KEY_PREFIX'],
+            reconcile_grace_seconds=redis_settings['RECONCILE_GRACE_SECONDS'],
+            connection_options=redis_settings['CONNECTION_OPTIONS']
+        )
+    raise ImproperlyConfigured(f'Unknown quotas ledger backend "{backend}"; expected "database" or "redis"')
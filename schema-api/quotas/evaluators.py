@@ -1,7 +1,8 @@
 from abc import ABC, abstractmethod
+from typing import List
 
 from api.models import Task, ResourceSet
-from quotas.exceptions import QuotaSoftViolationError, QuotaHardViolationError
+from quotas.exceptions import QuotaSoftViolationError
 from quotas.models import Quotas
 
 
@@ -12,67 +13,10 @@ class QuotasEvaluator(ABC):
     def evaluate(context_quotas: Quotas, participation_quotas: Quotas, task: Task):
         pass
 
-
-class ActiveResourcesDbQuotasEvaluator(QuotasEvaluator):
-
-    @staticmethod
-    def evaluate(context_quotas: Quotas, participation_quotas: Quotas, task: Task):
-        resources: ResourceSet = task.resources
-
-        context_stats = ResourceSet.objects.filter(task__pending=True, task__context=task.context).exclude(
-            task__id=task.id
-        ).values(
-            'cpu_cores', 'ram_gb', 'disk_gb', 'task__user'
-        )
-        ActiveResourcesDbQuotasEvaluator._evaluate_for_all(context_quotas, resources, *context_stats, is_context_evaluation=True)
-
-        participation_stats = [s for s in context_stats if s['task__user'] == task.user.id]
-        ActiveResourcesDbQuotasEvaluator._evaluate_for_all(participation_quotas, resources, *participation_stats)
-
-    @staticmethod
-    def _evaluate_for_all(quotas: Quotas, requested: ResourceSet, *current: dict, is_context_evaluation=False):
-        aggregates = {
-            'cpu_cores': 0,
-            'ram_gb': 0,
-            'disk_gb': 0
-        }
-        if quotas.max_active_tasks and len(current) + 1 > quotas.max_active_tasks:
-            raise QuotaSoftViolationError(
-                'max_active_tasks',
-                is_context_evaluation,
-                current=len(current),
-                requested=1,
-                limit=quotas.max_active_tasks,
-            )
-        for row in current:
-            aggregates['cpu_cores'] += row['cpu_cores'] if row['cpu_cores'] is not None else 0
-            aggregates['ram_gb'] += row['ram_gb'] if row['ram_gb'] is not None else 0
-            aggregates['disk_gb'] += row['disk_gb'] if row['disk_gb'] is not None else 0
-
-        if quotas.max_active_cpu_cores is not None and aggregates['cpu_cores'] + requested.cpu_cores > quotas.max_active_cpu_cores:
-            raise QuotaSoftViolationError(
-                'max_active_cpu_cores',
-                is_context_evaluation,
-                current=aggregates['cpu_cores'],
-                requested=requested.cpu_cores,
-                limit=quotas.max_active_cpu_cores,
-            )
-        if quotas.max_active_ram_gb is not None and aggregates['ram_gb'] + requested.ram_gb > quotas.max_active_ram_gb:
-            raise QuotaSoftViolationError(
-                'max_active_ram_gb',
-                is_context_evaluation,
-                current=aggregates['ram_gb'],
-                requested=requested.ram_gb,
-                limit=quotas.max_active_ram_gb,
-            )
-        if quotas.max_active_disk_gb is not None and aggregates['disk_gb'] + requested.disk_gb > quotas.max_active_disk_gb:
-            raise QuotaSoftViolationError(
-                'max_active_disk_gb',
-                is_context_evaluation,
-                current=aggregates['disk_gb'],
-                requested=requested.disk_gb,
-                limit=quotas.max_active_disk_gb,
-            )
+    @classmethod
+    def evaluate_many(cls, context_quotas: Quotas, participation_quotas: Quotas, tasks: List[Task]):
+        for task in tasks:
+            cls.evaluate(context_quotas, participation_quotas, task)
 
 
 class RequestedResourcesQuotasEvaluator(QuotasEvaluator):
@@ -138,30 +82,3 @@ class RequestedResourcesQuotasEvaluator(QuotasEvaluator):
                 requested=len(executors.all()),
                 limit=participation_quotas.max_executors_request,
             )
-
-
-class TasksQuotasEvaluator(QuotasEvaluator):
-
-    @staticmethod
-    def evaluate(context_quotas: Quotas, participation_quotas: Quotas, task: Task):
-        context_stats = Task.objects.filter(pending=True, context=task.context).exclude(
-            id=task.id
-        )
-
-        if context_quotas.total_tasks and context_quotas.total_tasks < context_stats.count()+1:
-            raise QuotaHardViolationError(
-                'total_tasks',
-                True,
-                current=context_stats.count(),
-                requested=1,
-                limit=context_quotas.total_tasks,
-            )
-        participation_stats = context_stats.filter(user=task.user)
-        if participation_quotas.total_tasks and participation_quotas.total_tasks < participation_stats.count()+1:
-            raise QuotaHardViolationError(
-                'total_tasks',
-                False,
-                current=participation_stats.count(),
-                requested=1,
-                limit=participation_quotas.total_tasks,
-            )
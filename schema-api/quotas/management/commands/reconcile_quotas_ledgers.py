@@ -0,0 +1,19 @@
+import logging.config
+from typing import Any, Dict
+
+from quotas.services import QuotasLedgerService
+from util.commands import ApplicationBaseCommand
+from util.logging import get_logging_config, get_logging_level_by_verbosity
+
+logging.config.dictConfig(get_logging_config())
+logger = logging.getLogger(__name__)
+
+
+class Command(ApplicationBaseCommand):
+    help = 'Recompute the quotas ledgers of contexts and participations from their tasks'
+
+    def handle(self, *args, **options: Dict[str, Any]):
+        logger.setLevel(get_logging_level_by_verbosity(options['verbosity']))
+
+        n_ledgers = QuotasLedgerService.reconcile()
+        logger.info(f'Reconciled {n_ledgers} quotas ledgers')
@@ -32,3 +32,30 @@ class ContextQuotas(Quotas):
 
 class ParticipationQuotas(Quotas):
     participation = models.OneToOneField(Participation, on_delete=models.CASCADE, related_name='quotas')
+
+
+class QuotasLedger(models.Model):
+    """
+    Running totals of the tasks that count against quotas, maintained on submission and on termination of tasks so
+    that quotas are evaluated without scanning the tasks. Totals may drift, e.g. when tasks are deleted, and are
+    periodically reconciled against the tasks by `QuotasLedgerService.reconcile`.
+    """
+    active_tasks = models.IntegerField(default=0)
+    active_cpu_cores = models.IntegerField(default=0)
+    active_ram_gb = models.FloatField(default=0)
+    active_disk_gb = models.FloatField(default=0)
+    total_tasks = models.IntegerField(default=0)
+    reconciled_at = models.DateTimeField(null=True, help_text='Time of the latest reconciliation against the tasks; '
+                                                              'ledgers that have never been reconciled are reconciled '
+                                                              'on their first use')
+
+    class Meta:
+        abstract = True
+
+
+class ContextQuotasLedger(QuotasLedger):
+    context = models.OneToOneField(Context, on_delete=models.CASCADE, related_name='quotas_ledger')
+
+
+class ParticipationQuotasLedger(QuotasLedger):
+    participation = models.OneToOneField(Participation, on_delete=models.CASCADE, related_name='quotas_ledger')
@@ -1,10 +1,14 @@
 import logging
-from typing import Iterable
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List
 
 from django.db import transaction
 
-from api.models import Participation, Context
+from api.constants import TaskStatus
+from api.models import Participation, Context, Task
 from api_auth.models import AuthEntity
+from quotas.backends import get_quotas_ledger_backend
 from quotas.models import Quotas, ContextQuotas, ParticipationQuotas
 from util.exceptions import ApplicationNotFoundError
 
@@ -91,3 +95,107 @@ class QuotasService:
                 quotas.save()
             except ContextQuotas.DoesNotExist:
                 pass
+
+
+# Statuses of tasks that no longer hold the resources that they requested
+RELEASED_STATUSES = (TaskStatus.UNKNOWN, TaskStatus.REJECTED, TaskStatus.COMPLETED, TaskStatus.ERROR,
+                     TaskStatus.CANCELED)
+
+
+class QuotasLedgerService:
+    """
+    Maintains the ledgers of the tasks that count against the quotas of a context and of its participations.
+
+    Submitted tasks are admitted against the ledgers, and added to them, atomically, so that concurrent submissions
+    cannot exceed the quotas together, and they are released from the ledgers once they terminate. A task is released
+    exactly once, in the transaction that clears its `pending` flag. The ledgers are kept by the backend configured in
+    the `QUOTAS_LEDGER` setting.
+    """
+
+    def __init__(self, participation: Participation):
+        self.participation = participation
+        self.backend = get_quotas_ledger_backend()
+
+    @contextmanager
+    def reserve(self, tasks: List[Task], context_quotas: Quotas, participation_quotas: Quotas) -> Iterator[None]:
+        """Admit a batch of submitted tasks against the quotas of the context and of the participation, adding them to
+        the ledgers
+
+        The tasks of a batch are evaluated as a single request. Must be entered in the transaction that submits the
+        tasks; if the block raises, the reservation is cancelled. With the Redis backend, a reservation whose
+        transaction is rolled back after the block exits is only cancelled on reconciliation.
+
+        Args:
+            tasks (List[Task]): the submitted tasks, along with their resources
+            context_quotas (Quotas): the quotas of the context
+            participation_quotas (Quotas): the quotas of the participation
+
+        Raises:
+            QuotaHardViolationError: if the batch exceeds the total tasks quota
+            QuotaSoftViolationError: if the batch exceeds a quota of active tasks or resources
+        """
+        requested = {
+            'total_tasks': len(tasks),
+            'active_tasks': len(tasks),
+            'active_cpu_cores': sum(t.resources.cpu_cores for t in tasks),
+            'active_ram_gb': sum(t.resources.ram_gb for t in tasks),
+            'active_disk_gb': sum(t.resources.disk_gb for t in tasks)
+        }
+        self.backend.reserve(self.participation, tasks, requested, context_quotas, participation_quotas)
+        try:
+            yield
+        except BaseException:
+            self.backend.cancel(self.participation, tasks, requested)
+            raise
+
+    @staticmethod
+    @transaction.atomic
+    def release(task_ids: Iterable[int]) -> int:
+        """Release the resources of terminated tasks from the ledgers of their contexts and participations
+
+        Tasks that have not terminated, or that have already been released, are skipped; the rest are locked and have
+        their `pending` flag cleared, so that each task is released exactly once even if its termination is applied
+        concurrently.
+
+        Args:
+            task_ids (Iterable[int]): the primary keys of the tasks whose status was updated
+
+        Returns:
+            int: the number of released tasks
+        """
+        released = list(
+            Task.objects.select_for_update(of=('self',)).filter(
+                pk__in=task_ids, pending=True, current_status__in=RELEASED_STATUSES
+            ).order_by('pk').values_list(
+                'pk', 'context_id', 'user_id', 'resources__cpu_cores', 'resources__ram_gb', 'resources__disk_gb'
+            )
+        )
+        if not released:
+            return 0
+        Task.objects.filter(pk__in=[r[0] for r in released]).update(pending=False)
+
+        context_totals = defaultdict(lambda: defaultdict(float))
+        participation_totals = defaultdict(lambda: defaultdict(float))
+        for _, context_id, user_id, cpu_cores, ram_gb, disk_gb in released:
+            if context_id is None:
+                continue
+            ledgers_totals = [context_totals[context_id]]
+            if user_id is not None:
+                ledgers_totals.append(participation_totals[(context_id, user_id)])
+            for totals in ledgers_totals:
+                totals['active_tasks'] += 1
+                totals['active_cpu_cores'] += cpu_cores or 0
+                totals['active_ram_gb'] += ram_gb or 0
+                totals['active_disk_gb'] += disk_gb or 0
+
+        get_quotas_ledger_backend().release(context_totals, participation_totals)
+        return len(released)
+
+    @staticmethod
+    def reconcile() -> int:
+        """Recompute the totals of all ledgers from the tasks, correcting any drift
+
+        Returns:
+            int: the number of reconciled ledgers
+        """
+        return get_quotas_ledger_backend().reconcile()
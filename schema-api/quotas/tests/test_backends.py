@@ -0,0 +1,192 @@
+import json
+import time
+from unittest.mock import ANY, MagicMock, patch
+
+import redis
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+
+from api.constants import TaskStatus
+from api.models import Context, Participation, Task, ResourceSet
+from api.services import TaskService, TaskStatusLogService
+from api_auth.constants import AuthEntityType
+from api_auth.models import AuthEntity, UserProfile
+from quotas.backends import RedisQuotasLedgerBackend, get_quotas_ledger_backend, RESERVATION_ADMITTED, \
+    RESERVATION_UNINITIALIZED, RESERVATION_VIOLATION
+from quotas.exceptions import QuotaHardViolationError, QuotaSoftViolationError
+from quotas.services import QuotasService, QuotasLedgerService
+
+
+class RedisQuotasLedgerBackendTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        app_service = AuthEntity.objects.create(username='as', entity_type=AuthEntityType.APPLICATION_SERVICE)
+        cls.context = Context.objects.create(owner=app_service, name='context')
+        cls.user = AuthEntity.objects.create(username='user', parent=app_service)
+        cls.participation = Participation.objects.create(user=cls.user, context=cls.context)
+
+    def setUp(self):
+        self.backend = RedisQuotasLedgerBackend(host='quotas.redis.test', key_prefix='quotas')
+        self.backend.client = MagicMock()
+        self.backend._reserve_script = MagicMock(return_value=[RESERVATION_ADMITTED])
+        self.backend._release_script = MagicMock(return_value=0)
+        self.backend._cancel_script = MagicMock(return_value=1)
+        self.backend._reconcile_script = MagicMock(return_value=1)
+        self.context_key = f'quotas:{{{self.context.pk}}}'
+        self.participation_key = f'quotas:{{{self.context.pk}}}:{self.user.pk}'
+        self.reservations_key = f'quotas:{{{self.context.pk}}}:reservations'
+
+        patcher = patch('quotas.services.get_quotas_ledger_backend', return_value=self.backend)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _submit(self, n_tasks: int = 1):
+        return TaskService(context=self.context, auth_entity=self.user).submit_tasks([
+            {
+                'name': 'task',
+                'executors': [{'image': 'ubuntu:latest', 'command': ['echo']}],
+                'resources': {'cpu_cores': 2, 'ram_gb': 1.5, 'disk_gb': 4}
+            }
+            for _ in range(n_tasks)
+        ])
+
+    @patch('api.services.get_task_manager', return_value=None)
+    def test_reserve_evaluates_batch_with_a_single_script_call(self, _):
+        QuotasService(self.context).set_quotas(total_tasks=0, max_active_cpu_cores=8)
+        QuotasService(self.context, self.user).set_quotas(max_active_tasks=3, max_active_ram_gb=0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tasks = self._submit(2)
+
+        reservation_id = min(t.pk for t in tasks)
+        self.backend._reserve_script.assert_called_once_with(
+            keys=[self.context_key, self.participation_key, self.reservations_key],
+            args=[2, 2, 4, 3.0, 8.0] + [-1, -1, 8, -1, -1] + [-1, 3, -1, 0, -1] + [reservation_id, ANY]
+        )
+        reservation = json.loads(self.backend._reserve_script.call_args.kwargs['args'][-1])
+        self.assertEqual(reservation['user_id'], self.user.pk)
+        # The reservation is confirmed once the submission is committed
+        self.backend.client.hdel.assert_called_once_with(self.reservations_key, reservation_id)
+
+    @patch('api.services.get_task_manager', return_value=None)
+    def test_reserve_raises_violation_reported_by_script(self, _):
+        QuotasService(self.context, self.user).set_quotas(max_active_cpu_cores=4)
+        self.backend._reserve_script.return_value = [RESERVATION_VIOLATION, 2, 3, '4']
+
+        with self.assertRaises(QuotaSoftViolationError) as cm:
+            self._submit()
+        self.assertEqual(cm.exception.resource, 'max_active_cpu_cores')
+        self.assertFalse(cm.exception.is_context_violation)
+        self.assertDictEqual(cm.exception.state, {'current': 4, 'requested': 2, 'limit': 4})
+
+        QuotasService(self.context).set_quotas(total_tasks=5)
+        self.backend._reserve_script.return_value = [RESERVATION_VIOLATION, 1, 1, '5']
+        with self.assertRaises(QuotaHardViolationError) as cm:
+            self._submit()
+        self.assertEqual(cm.exception.resource, 'total_tasks')
+        self.assertTrue(cm.exception.is_context_violation)
+        self.assertFalse(Task.objects.exists())
+
+    @patch('api.services.get_task_manager', return_value=None)
+    def test_reserve_initializes_missing_ledgers_from_existing_tasks(self, _):
+        for pending in (True, False):
+            task = Task.objects.create(name='task', context=self.context, user=self.user, pending=pending)
+            ResourceSet.objects.create(task=task, cpu_cores=2, ram_gb=1.5, disk_gb=4)
+        self.backend._reserve_script.side_effect = [[RESERVATION_UNINITIALIZED], [RESERVATION_ADMITTED]]
+
+        self._submit()
+
+        self.assertEqual(self.backend._reserve_script.call_count, 2)
+        initializations = {
+            tuple(c.kwargs['keys']): c.kwargs['args'] for c in self.backend._reconcile_script.call_args_list
+        }
+        # The submitted task is excluded from the initial totals, since it is accounted for by the reservation
+        self.assertDictEqual(initializations, {
+            (self.context_key, self.reservations_key): ['', 0, 2, 1, 2, 1.5, 4.0],
+            (self.participation_key, self.reservations_key): ['', 0, 2, 1, 2, 1.5, 4.0]
+        })
+
+    @patch('api.services.get_manager')
+    @patch('api.services.get_task_manager', return_value='manager')
+    def test_reservation_is_cancelled_if_dispatch_fails(self, _, get_manager_mock):
+        UserProfile.objects.create(user=self.user, fs_user_dir='user')
+        get_manager_mock.return_value.submit_many.side_effect = RuntimeError('unavailable')
+
+        with self.assertRaises(RuntimeError):
+            self._submit(2)
+
+        reservation_id = self.backend._reserve_script.call_args.kwargs['args'][-2]
+        self.backend._cancel_script.assert_called_once_with(
+            keys=[self.context_key, self.participation_key, self.reservations_key],
+            args=[reservation_id, 2, 2, 4, 3.0, 8.0]
+        )
+
+    def test_release_subtracts_released_totals_once_committed(self):
+        task = Task.objects.create(name='task', context=self.context, user=self.user)
+        ResourceSet.objects.create(task=task, cpu_cores=2, ram_gb=1.5, disk_gb=4)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            TaskStatusLogService(task).log_status_update(TaskStatus.COMPLETED)
+            self.backend._release_script.assert_not_called()
+        self.assertEqual(len(callbacks), 1)
+
+        released = [0, 1, 2, 1.5, 4]
+        self.backend._release_script.assert_called_once_with(
+            keys=[self.context_key, self.participation_key], args=released + released
+        )
+
+    def test_reconcile_skips_ledgers_that_were_never_reserved(self):
+        self.backend.client.hgetall.return_value = {}
+        self.backend.client.hget.side_effect = lambda key, field: '7' if key == self.context_key else None
+
+        self.assertEqual(QuotasLedgerService.reconcile(), 1)
+        self.backend._reconcile_script.assert_called_once_with(
+            keys=[self.context_key, self.reservations_key], args=['7', 300, 0, 0, 0, 0.0, 0.0]
+        )
+
+    def test_reconcile_cancels_expired_reservations_of_rolled_back_submissions(self):
+        committed_task = Task.objects.create(name='task', context=self.context, user=self.user)
+        requested = {'total_tasks': 1, 'active_tasks': 1, 'active_cpu_cores': 2, 'active_ram_gb': 1.5,
+                     'active_disk_gb': 4}
+        expired_at = time.time() - 301
+        self.backend.client.hgetall.return_value = {
+            str(committed_task.pk).encode(): json.dumps(
+                {'user_id': self.user.pk, 'reserved_at': expired_at, 'requested': requested}),
+            str(committed_task.pk + 1).encode(): json.dumps(
+                {'user_id': self.user.pk, 'reserved_at': expired_at, 'requested': requested}),
+            str(committed_task.pk + 2).encode(): json.dumps(
+                {'user_id': self.user.pk, 'reserved_at': time.time(), 'requested': requested})
+        }
+        self.backend.client.hget.return_value = None
+
+        QuotasLedgerService.reconcile()
+
+        # Confirmations that were lost are dropped, while reservations whose tasks were rolled back are cancelled
+        self.backend.client.hdel.assert_called_once_with(self.reservations_key, committed_task.pk)
+        self.backend._cancel_script.assert_called_once_with(
+            keys=[self.context_key, self.participation_key, self.reservations_key],
+            args=[committed_task.pk + 1, 1, 1, 2, 1.5, 4]
+        )
+
+
+class QuotasLedgerBackendSettingsTestCase(TestCase):
+
+    def setUp(self):
+        get_quotas_ledger_backend.cache_clear()
+        self.addCleanup(get_quotas_ledger_backend.cache_clear)
+
+    @override_settings(QUOTAS_LEDGER={'BACKEND': 'unknown'})
+    def test_unknown_backend_is_improperly_configured(self):
+        with self.assertRaises(ImproperlyConfigured):
+            get_quotas_ledger_backend()
+
+    @patch('quotas.backends.get_connection_pool', return_value=redis.ConnectionPool())
+    def test_redis_backend_uses_configured_connection_options(self, get_connection_pool_mock):
+        with override_settings(QUOTAS_LEDGER={'BACKEND': 'redis', 'REDIS': {
+            'HOST': 'quotas.redis.test', 'PORT': 6380, 'DB': 1, 'KEY_PREFIX': 'quotas', 'RECONCILE_GRACE_SECONDS': 60,
+            'CONNECTION_OPTIONS': {'socket_timeout': 5}
+        }}):
+            get_quotas_ledger_backend()
+
+        get_connection_pool_mock.assert_called_once_with('quotas.redis.test', 6380, 1, socket_timeout=5)
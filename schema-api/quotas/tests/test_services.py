@@ -0,0 +1,110 @@
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from api.constants import TaskStatus
+from api.models import Context, Participation, Task, ResourceSet
+from api.services import TaskService, TaskStatusLogService
+from api_auth.constants import AuthEntityType
+from api_auth.models import AuthEntity
+from quotas.exceptions import QuotaHardViolationError, QuotaSoftViolationError
+from quotas.models import ContextQuotasLedger, ParticipationQuotasLedger
+from quotas.services import QuotasService, QuotasLedgerService
+
+
+@patch('api.services.get_task_manager', return_value=None)
+class QuotasLedgerServiceTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        app_service = AuthEntity.objects.create(username='as', entity_type=AuthEntityType.APPLICATION_SERVICE)
+        cls.context = Context.objects.create(owner=app_service, name='context')
+        cls.user0 = AuthEntity.objects.create(username='user0', parent=app_service)
+        cls.user1 = AuthEntity.objects.create(username='user1', parent=app_service)
+        cls.participation0 = Participation.objects.create(user=cls.user0, context=cls.context)
+        cls.participation1 = Participation.objects.create(user=cls.user1, context=cls.context)
+
+    @staticmethod
+    def _get_task_definition() -> dict:
+        return {
+            'name': 'task',
+            'executors': [{'image': 'ubuntu:latest', 'command': ['echo']}],
+            'resources': {'cpu_cores': 2, 'ram_gb': 1.5, 'disk_gb': 4}
+        }
+
+    def _submit(self, user: AuthEntity, n_tasks: int = 1):
+        return TaskService(context=self.context, auth_entity=user).submit_tasks(
+            [self._get_task_definition() for _ in range(n_tasks)]
+        )
+
+    def _assert_ledger(self, ledger, active_tasks: int, total_tasks: int):
+        ledger.refresh_from_db()
+        self.assertEqual(ledger.active_tasks, active_tasks)
+        self.assertEqual(ledger.active_cpu_cores, 2 * active_tasks)
+        self.assertAlmostEqual(ledger.active_ram_gb, 1.5 * active_tasks)
+        self.assertAlmostEqual(ledger.active_disk_gb, 4 * active_tasks)
+        self.assertEqual(ledger.total_tasks, total_tasks)
+
+    def test_submission_adds_tasks_to_context_and_participation_ledgers(self, _):
+        self._submit(self.user0, 2)
+        self._submit(self.user1)
+
+        self._assert_ledger(ContextQuotasLedger.objects.get(context=self.context), 3, 3)
+        self._assert_ledger(ParticipationQuotasLedger.objects.get(participation=self.participation0), 2, 2)
+        self._assert_ledger(ParticipationQuotasLedger.objects.get(participation=self.participation1), 1, 1)
+
+    def test_terminated_tasks_are_released_exactly_once(self, _):
+        task, _ = self._submit(self.user0, 2)
+
+        TaskStatusLogService(task).log_status_update(TaskStatus.COMPLETED)
+        TaskStatusLogService(task).log_status_update(TaskStatus.CANCELED)
+        self.assertEqual(QuotasLedgerService.release([task.pk]), 0)
+
+        self._assert_ledger(ContextQuotasLedger.objects.get(context=self.context), 1, 2)
+        self._assert_ledger(ParticipationQuotasLedger.objects.get(participation=self.participation0), 1, 2)
+        task.refresh_from_db()
+        self.assertFalse(task.pending)
+
+    def test_active_quotas_admit_tasks_once_active_tasks_terminate(self, _):
+        QuotasService(self.context, self.user0).set_quotas(max_active_cpu_cores=4)
+        tasks = self._submit(self.user0, 2)
+
+        with self.assertRaises(QuotaSoftViolationError) as cm:
+            self._submit(self.user0)
+        self.assertEqual(cm.exception.resource, 'max_active_cpu_cores')
+        self.assertFalse(cm.exception.is_context_violation)
+        self.assertDictEqual(cm.exception.state, {'current': 4, 'requested': 2, 'limit': 4})
+
+        TaskStatusLogService.log_status_update_many(tasks[:1], TaskStatus.ERROR)
+        self._submit(self.user0)
+        self._assert_ledger(ParticipationQuotasLedger.objects.get(participation=self.participation0), 2, 3)
+
+    def test_total_tasks_quota_counts_terminated_tasks(self, _):
+        QuotasService(self.context).set_quotas(total_tasks=2)
+        tasks = self._submit(self.user0, 2)
+        TaskStatusLogService.log_status_update_many(tasks, TaskStatus.COMPLETED)
+
+        with self.assertRaises(QuotaHardViolationError) as cm:
+            self._submit(self.user1)
+        self.assertEqual(cm.exception.resource, 'total_tasks')
+        self.assertTrue(cm.exception.is_context_violation)
+        self._assert_ledger(ContextQuotasLedger.objects.get(context=self.context), 0, 2)
+
+    def test_new_ledgers_are_reconciled_against_existing_tasks(self, _):
+        for pending in (True, False):
+            task = Task.objects.create(name='task', context=self.context, user=self.user0, pending=pending)
+            ResourceSet.objects.create(task=task, cpu_cores=2, ram_gb=1.5, disk_gb=4)
+
+        self._submit(self.user0)
+
+        self._assert_ledger(ContextQuotasLedger.objects.get(context=self.context), 2, 3)
+        self._assert_ledger(ParticipationQuotasLedger.objects.get(participation=self.participation0), 2, 3)
+
+    def test_reconcile_corrects_drifted_ledgers(self, _):
+        self._submit(self.user0, 2)
+        ContextQuotasLedger.objects.update(active_tasks=10, active_cpu_cores=-3, total_tasks=0)
+        ParticipationQuotasLedger.objects.update(active_ram_gb=100)
+
+        self.assertEqual(QuotasLedgerService.reconcile(), 2)
+        self._assert_ledger(ContextQuotasLedger.objects.get(context=self.context), 2, 2)
+        self._assert_ledger(ParticipationQuotasLedger.objects.get(participation=self.participation0), 2, 2)
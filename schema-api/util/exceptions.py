@@ -43,6 +43,10 @@ class ApplicationDuplicateError(ApplicationValidationError):
 class ApplicationNotFoundError(ApplicationError):
     pass
 
+
+class ApplicationThrottledError(ApplicationError):
+    pass
+
 class ApplicationWorkflowParsingError(ApplicationValidationError):
     pass
 
@@ -164,6 +168,8 @@ def custom_exception_handler(exc: Exception, context):
             response.status_code = status.HTTP_400_BAD_REQUEST
     elif issubclass(type(exc), ApplicationNotFoundError):
         response = exception_handler(rest_framework.exceptions.NotFound(detail=exc), context)
+    elif issubclass(type(exc), ApplicationThrottledError):
+        response = exception_handler(rest_framework.exceptions.Throttled(detail=str(exc)), context)
     elif issubclass(type(exc), QuotaViolationError):
         response = quotas_exception_handler(exc, context)
     else:
@@ -0,0 +1,253 @@
+import json
+import struct
+import zlib
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from django.db import models
+
+# Values are stored with a header of their codec and their decompressed size, so that they can be sized without being
+# decompressed
+RAW = 0
+ZLIB = 1
+ZLIB_FRAMES = 2
+HEADER = struct.Struct('>BQ')
+
+# Data larger than a frame are compressed in independent frames of a fixed decompressed size, following an index of
+# the frame size, the number of frames and the end offset of each compressed frame, so that a range is decompressed
+# from the frames that overlap it rather than from the start of the data
+FRAMES_HEADER = struct.Struct('>II')
+FRAME_END = struct.Struct('>Q')
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+DEFAULT_FRAME_SIZE = 256 * 1024
+
+
+def compress(data: bytes, threshold: int = 1024, level: int = 6, frame_size: int = DEFAULT_FRAME_SIZE) -> bytes:
+    """Encode data for storage, compressing them with zlib if their size reaches a threshold
+
+    Args:
+        data (bytes): the data to encode
+        threshold (int): the minimum size, in bytes, of data that are compressed
+        level (int): the zlib compression level
+        frame_size (int): the decompressed size of the independently compressed frames of data larger than it
+
+    Returns:
+        The encoded data
+    """
+    if len(data) < threshold:
+        return HEADER.pack(RAW, len(data)) + data
+    if len(data) <= frame_size:
+        return HEADER.pack(ZLIB, len(data)) + zlib.compress(data, level)
+
+    frames = [zlib.compress(data[i:i + frame_size], level) for i in range(0, len(data), frame_size)]
+    frame_ends, end = [], 0
+    for frame in frames:
+        end += len(frame)
+        frame_ends.append(FRAME_END.pack(end))
+    return b''.join([HEADER.pack(ZLIB_FRAMES, len(data)), FRAMES_HEADER.pack(frame_size, len(frames)), *frame_ends,
+                     *frames])
+
+
+def get_decompressed_size(value: Optional[bytes]) -> int:
+    return HEADER.unpack_from(value)[1] if value else 0
+
+
+def _iter_inflated(data: memoryview, chunk_size: int) -> Iterator[bytes]:
+    decompressor = zlib.decompressobj()
+    for i in range(0, len(data), chunk_size):
+        pending = data[i:i + chunk_size]
+        while pending:
+            yield decompressor.decompress(pending, chunk_size)
+            pending = decompressor.unconsumed_tail
+    yield decompressor.flush()
+
+
+def _iter_decoded(value: bytes, chunk_size: int) -> Iterator[bytes]:
+    codec, _ = HEADER.unpack_from(value)
+    data = memoryview(value)[HEADER.size:]
+    if codec == RAW:
+        for i in range(0, len(data), chunk_size):
+            yield bytes(data[i:i + chunk_size])
+    elif codec == ZLIB:
+        yield from _iter_inflated(data, chunk_size)
+    elif codec == ZLIB_FRAMES:
+        _, n_frames = FRAMES_HEADER.unpack_from(data)
+        index_size = FRAMES_HEADER.size + n_frames * FRAME_END.size
+        frame_start = 0
+        for (frame_end,) in FRAME_END.iter_unpack(data[FRAMES_HEADER.size:index_size]):
+            yield from _iter_inflated(data[index_size + frame_start:index_size + frame_end], chunk_size)
+            frame_start = frame_end
+    else:
+        raise ValueError(f'Unknown codec {codec} of compressed value')
+
+
+def iter_decompressed(value: Optional[bytes], offset: int = 0, length: int = None,
+                      chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """Decompress a range of an encoded value incrementally
+
+    Args:
+        value (Optional[bytes]): the encoded value
+        offset (int): the offset of the range in the decompressed data
+        length (int): the length of the range; up to the end of the data if omitted
+        chunk_size (int): the maximum size of the chunks that are decompressed at a time
+
+    Yields:
+        The consecutive chunks of the range, of at most `chunk_size` bytes each
+    """
+    if not value:
+        return
+
+    end = get_decompressed_size(value) if length is None else min(offset + length, get_decompressed_size(value))
+    position = 0
+    for chunk in _iter_decoded(value, chunk_size):
+        chunk_start, position = position, position + len(chunk)
+        if position <= offset:
+            continue
+        if chunk_start >= end:
+            return
+        yield chunk[max(offset - chunk_start, 0):end - chunk_start]
+
+
+def decompress(value: bytes) -> bytes:
+    return b''.join(iter_decompressed(value))
+
+
+class EncodedValueReader:
+    """
+    Reads ranges of an encoded value, fetching only the parts of the stored value that a range requires.
+
+    The stored value is read through a function of an offset and a length within it, up to its end if the length is
+    None, e.g. a `Substr` query. Ranges of raw values are fetched as they are, and ranges of values compressed in
+    frames are decompressed from the frames that overlap them, so a range costs at most two frames more than its size,
+    however large the value is. Values compressed in a single zlib stream, which are at most a frame large unless they
+    were stored before frames were introduced, are fetched whole and decompressed up to the end of the range.
+    """
+
+    def __init__(self, read: Callable[[int, Optional[int]], bytes]):
+        self.read = read
+        self._header = None
+        self._frame_ends = None
+
+    def _get_header(self) -> Tuple[int, int]:
+        if self._header is None:
+            header = self.read(0, HEADER.size)
+            self._header = HEADER.unpack(header) if header else (RAW, 0)
+        return self._header
+
+    def _get_frame_ends(self) -> Tuple[int, List[int]]:
+        if self._frame_ends is None:
+            frame_size, n_frames = FRAMES_HEADER.unpack(self.read(HEADER.size, FRAMES_HEADER.size))
+            index = self.read(HEADER.size + FRAMES_HEADER.size, n_frames * FRAME_END.size)
+            self._frame_ends = frame_size, [frame_end for (frame_end,) in FRAME_END.iter_unpack(index)]
+        return self._frame_ends
+
+    def get_size(self) -> int:
+        return self._get_header()[1]
+
+    def iter_range(self, offset: int = 0, length: int = None,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """Read a range of the decompressed value
+
+        Args:
+            offset (int): the offset of the range in the decompressed data
+            length (int): the length of the range; up to the end of the data if omitted
+            chunk_size (int): the maximum size of the chunks that are decompressed at a time
+
+        Yields:
+            The consecutive chunks of the range, of at most `chunk_size` bytes each
+        """
+        codec, size = self._get_header()
+        end = size if length is None else min(offset + length, size)
+        if offset >= end:
+            return
+
+        if codec == RAW:
+            for i in range(offset, end, chunk_size):
+                yield self.read(HEADER.size + i, min(chunk_size, end - i))
+        elif codec == ZLIB:
+            yield from iter_decompressed(self.read(0, None), offset, end - offset, chunk_size)
+        elif codec == ZLIB_FRAMES:
+            frame_size, frame_ends = self._get_frame_ends()
+            index_size = HEADER.size + FRAMES_HEADER.size + len(frame_ends) * FRAME_END.size
+            first, last = offset // frame_size, (end - 1) // frame_size
+            span_start = frame_ends[first - 1] if first else 0
+            frames = memoryview(self.read(index_size + span_start, frame_ends[last] - span_start))
+            for i in range(first, last + 1):
+                frame_start = (frame_ends[i - 1] if i else 0) - span_start
+                position = i * frame_size
+                for chunk in _iter_inflated(frames[frame_start:frame_ends[i] - span_start], chunk_size):
+                    chunk_start, position = position, position + len(chunk)
+                    if chunk_start >= end:
+                        break
+                    if position > offset:
+                        yield chunk[max(offset - chunk_start, 0):end - chunk_start]
+        else:
+            raise ValueError(f'Unknown codec {codec} of compressed value')
+
+
+class CompressedTextField(models.TextField):
+    """
+    Text field that is stored in binary form, compressed with zlib when its UTF-8 encoding reaches a size threshold.
+
+    Compression is transparent to the model; values are compressed when written and decompressed when read. The
+    stored value can be read without conversion, through an expression of a `BinaryField` output field, to decompress
+    only a range of it with `iter_decompressed`, or through `EncodedValueReader` to also fetch only the part of it
+    that a range requires. Since values are compared in their compressed form, only exact lookups are meaningful.
+
+    Values larger than the frame size are compressed in independent frames, which lets ranges be read without
+    decompressing the value from its start, at the cost of a slightly lower compression ratio, since each frame is
+    compressed without the history of the previous ones, and of an index of 8 bytes per frame. Smaller frames make
+    ranged reads cheaper and compression worse.
+    """
+
+    def __init__(self, *args, compression_threshold: int = 1024, compression_level: int = 6,
+                 compression_frame_size: int = DEFAULT_FRAME_SIZE, **kwargs):
+        self.compression_threshold = compression_threshold
+        self.compression_level = compression_level
+        self.compression_frame_size = compression_frame_size
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.compression_threshold != 1024:
+            kwargs['compression_threshold'] = self.compression_threshold
+        if self.compression_level != 6:
+            kwargs['compression_level'] = self.compression_level
+        if self.compression_frame_size != DEFAULT_FRAME_SIZE:
+            kwargs['compression_frame_size'] = self.compression_frame_size
+        return name, path, args, kwargs
+
+    def get_internal_type(self):
+        return 'BinaryField'
+
+    def to_text(self, value) -> str:
+        return self.to_python(value)
+
+    def from_text(self, value: str):
+        return value
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if value is None:
+            return value
+        data = self.to_text(value).encode('utf-8')
+        return connection.Database.Binary(
+            compress(data, self.compression_threshold, self.compression_level, self.compression_frame_size)
+        )
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return self.from_text(decompress(bytes(value)).decode('utf-8'))
+
+
+class CompressedJSONField(CompressedTextField):
+    """Compressed field of JSON serializable values"""
+
+    def to_python(self, value):
+        return value
+
+    def to_text(self, value) -> str:
+        return json.dumps(value)
+
+    def from_text(self, value: str):
+        return json.loads(value)
@@ -15,7 +15,7 @@ class KVPairsField(serializers.DictField):
 
     def to_representation(self, value):
         kv_pairs = value.all()
-        return {kvp.key: kvp.status for kvp in kv_pairs}
+        return {kvp.key: kvp.value for kvp in kv_pairs}
 
 
 class ModelMemberRelatedField(serializers.ListField):
@@ -42,6 +42,11 @@ class LatestInstanceRelatedField(serializers.Field):
         return self.serializer_class(latest_value).data
 
 
+class CurrentStatusSerializer(serializers.Serializer):
+    status = serializers.CharField(read_only=True, source='get_current_status_display')
+    updated_at = serializers.DateTimeField(read_only=True, source='current_status_at')
+
+
 class IntegerChoiceField(serializers.IntegerField):
 
     def to_representation(self, value):
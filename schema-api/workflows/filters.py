@@ -13,7 +13,7 @@ class WorkflowFilter(filters.FilterSet):
     order = filters.OrderingFilter(
         fields=(
             ('uuid', 'uuid'),
-            ('status', 'status'),
+            ('current_status', 'status'),
             ('submitted_at', 'submitted_at')
         )
     )
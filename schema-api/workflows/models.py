@@ -6,6 +6,7 @@ from api.models import Context
 from core.models import BaseSchedulable, BaseExecutor, BaseEnv, BaseInputMountPoint, BaseMountPoint, BaseResourceSet, \
     BaseTag
 from util.defaults import get_current_datetime
+from util.fields import CompressedJSONField, CompressedTextField
 from workflows.constants import WorkflowLanguages
 
 
@@ -19,13 +20,43 @@ class Workflow(BaseSchedulable):
     context = models.ForeignKey(Context, null=True, on_delete=models.SET_NULL)
     execution_order = models.CharField(max_length=255, blank=True)
     submitted_at = models.DateTimeField(default=get_current_datetime)
+    # Denormalized latest entry of the status logs, maintained by WorkflowStatusLogService.log_status_update
+    current_status = models.IntegerField(choices=TaskStatus.choices, null=True,
+                                         help_text='Latest status of the workflow, as recorded in its status logs')
+    current_status_at = models.DateTimeField(null=True, help_text='Timestamp of the latest status of the workflow')
+    # Position in the live events of the execution up to which they have been applied, maintained by
+    # WorkflowService.apply_live_data
+    events_cursor = models.PositiveIntegerField(
+        default=0, help_text='Number of live events of the workflow execution that have already been applied'
+    )
+    # Time at which the live data of the dispatched execution are due to be checked, maintained by
+    # WorkflowService.apply_live_data
+    next_check_at = models.DateTimeField(
+        default=get_current_datetime,
+        help_text='Time at which the live data of the workflow execution are due to be checked'
+    )
+    live_data_misses = models.PositiveSmallIntegerField(
+        default=0,
+        help_text='Number of consecutive checks in which the live data of the workflow execution were missing'
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['current_status'], name='workflow_current_status_idx'),
+            models.Index(
+                fields=['next_check_at'], name='workflow_next_check_at_idx',
+                condition=models.Q(current_status__in=[
+                    TaskStatus.QUEUED, TaskStatus.INITIALIZING, TaskStatus.RUNNING, TaskStatus.SCHEDULED
+                ])
+            )
+        ]
 
 
 class WorkflowDefinition(models.Model):
     workflow = models.OneToOneField(Workflow, on_delete=models.CASCADE, related_name='specification')
     language = models.CharField(choices=WorkflowLanguages.choices, max_length=32)
     version = models.CharField(max_length=16, blank=True)
-    content = models.TextField(blank=True)
+    content = CompressedTextField(blank=True)
 
 
 class WorkflowStatusLog(models.Model):
@@ -33,6 +64,11 @@ class WorkflowStatusLog(models.Model):
     status = models.IntegerField(choices=TaskStatus.choices)
     created_at = models.DateTimeField(default=get_current_datetime)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['workflow', 'status'], name='workflow_status_log_workflow_status_unique')
+        ]
+
 
 class WorkflowExecutor(BaseExecutor):
     workflow = models.ForeignKey(Workflow, on_delete=models.CASCADE, related_name='executors')
@@ -70,5 +106,5 @@ class WorkflowTag(BaseTag):
 
 class WorkflowExecutorOutputLog(models.Model):
     executor = models.OneToOneField(WorkflowExecutor, on_delete=models.CASCADE)
-    stdout = models.JSONField(default=list)
-    stderr = models.JSONField(default=list)
\ No newline at end of file
+    stdout = CompressedJSONField(default=list)
+    stderr = CompressedJSONField(default=list)
\ No newline at end of file
@@ -1,7 +1,7 @@
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
-from util.serializers import KVPairsField, LatestInstanceRelatedField, IntegerListField, SemverField
+from util.serializers import KVPairsField, IntegerListField, SemverField, CurrentStatusSerializer
 from workflows.models import WorkflowExecutorYield, WorkflowExecutor, WorkflowInputMountPoint, WorkflowOutputMountPoint, \
     WorkflowResourceSet, Workflow, WorkflowDefinition
 
@@ -67,7 +67,7 @@ class WorkflowStatusLogSerializer(serializers.Serializer):
 class WorkflowsBasicListSerializer(serializers.Serializer):
     uuid = serializers.UUIDField(read_only=True)
     name = serializers.CharField()
-    current_status = LatestInstanceRelatedField(WorkflowStatusLogSerializer, ['-created_at'], source='status_logs')
+    current_status = CurrentStatusSerializer(source='*', read_only=True)
 
 
 class WorkflowsDetailedListSerializer(WorkflowsBasicListSerializer):
@@ -94,7 +94,8 @@ class WorkflowSerializer(serializers.ModelSerializer):
     class Meta:
         model = Workflow
         read_only_fields = ['uuid']
-        exclude = ['backend_ref', 'id', 'user', 'context', 'manager_name']
+        exclude = ['backend_ref', 'id', 'user', 'context', 'manager_name', 'current_status', 'current_status_at',
+                   'events_cursor', 'next_check_at', 'live_data_misses']
 
     def validate_execution_order(self, execution_order):
         if any(filter(lambda idx: idx>=len(self.initial_data['executors']), eval(execution_order))):
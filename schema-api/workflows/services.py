@@ -1,26 +1,32 @@
 import json
+import logging
 from collections import defaultdict
 from copy import deepcopy
 from datetime import datetime
-from typing import List, Optional, Tuple, Iterable
+from typing import Dict, List, Optional, Tuple, Iterable
 
 from django.conf import settings
 from django.core.exceptions import MultipleObjectsReturned
 from django.db import transaction
-from django.db.models import QuerySet, OuterRef, Subquery
+from django.db.models import QuerySet, OuterRef, Subquery, Q, Case, When, Value, F
+from django.utils import timezone
 
-from api.constants import TaskStatus
+from api.constants import TaskStatus, STATUS_PRECEDENCE
 from api.models import Context
-from core.managers.base import UserInfo, ExecutionDetails, ExecutionManifest
-from core.utils import drop_none_values, get_manager
+from api.utils import get_status_precedence, get_preceding_statuses, supersedes
+from core.managers.base import UserInfo, ExecutionDetails, ExecutionManifest, LiveExecutionData
+from core.utils import drop_none_values, get_manager, get_next_check_at, get_next_retry_at
 from util.exceptions import ApplicationWorkflowParsingError
 from workflows.constants import WorkflowLanguages
 from workflows.models import Workflow, WorkflowExecutor, WorkflowExecutorYield, WorkflowEnv, WorkflowInputMountPoint, \
-    WorkflowOutputMountPoint, WorkflowResourceSet, WorkflowTag, WorkflowStatusLog, WorkflowDefinition
+    WorkflowOutputMountPoint, WorkflowResourceSet, WorkflowTag, WorkflowStatusLog, WorkflowDefinition, \
+    WorkflowExecutorOutputLog
 from workflows.parsers import SchemaNativeWorkflowParser
 from workflows.serializers import WorkflowSerializer
 from workflows.utils import get_qualified_workflow_manager
 
+logger = logging.getLogger(__name__)
+
 
 class WorkflowDefinitionService:
 
@@ -203,26 +209,115 @@ class WorkflowService:
 
     @staticmethod
     @transaction.atomic
-    def synchronize_dispatched_executions(workflows_qs: QuerySet[Workflow]):
-
-        grouped = defaultdict(list)
-        for w in workflows_qs:
-            grouped[w.manager_name].append(w)
+    def apply_live_data(workflows: List[Workflow], live_data_map: Dict[str, LiveExecutionData]) -> List[Workflow]:
+        """Apply the live data of dispatched executions of a manager and schedule their next check
 
-        for manager_name, manager_workflows in grouped.items():
-            backend_refs = [w.backend_ref for w in manager_workflows]
+        The new status log entries of all workflows are inserted with a single statement and their denormalized fields
+        are updated with another, regardless of the number of workflows and entries.
 
-            # ISSUE: Manager may not be available at subsequent deployments
-            manager = get_manager(manager_name)
+        Args:
+            workflows (List[Workflow]): the dispatched workflows, all handled by the same manager
+            live_data_map (Dict[str, LiveExecutionData]): the live data of the executions, by backend ref
 
-            # ISSUE: If returned data does not cover all queryset items, execution may get silently stuck with no update
-            live_data_map = dict(manager.list(ref_ids=backend_refs))
+        Returns:
+            List[Workflow]: the workflows whose current status changed
+        """
+        if not workflows:
+            return []
+
+        now = timezone.now()
+        max_misses = settings.EXECUTIONS_SYNCHRONIZATION['MAX_LIVE_DATA_MISSES']
+        workflow_status_logs = []
+        transitioned_workflows = []
+        lost_workflows = []
+        for w in workflows:
+            workflow_live_data = live_data_map.get(w.backend_ref, None)
+            if workflow_live_data is None:
+                # Executions missing from the live data are retried less often, until they are considered lost
+                w.live_data_misses += 1
+                w.next_check_at = get_next_retry_at(now, w.live_data_misses)
+                if w.live_data_misses >= max_misses:
+                    workflow_status_logs.append(
+                        WorkflowStatusLog(workflow=w, status=TaskStatus.UNKNOWN, created_at=now)
+                    )
+                    lost_workflows.append((w, w.current_status))
+                    logger.warning(f'Live data of workflow {w.uuid} were missing {w.live_data_misses} times; marking '
+                                   f'it as {TaskStatus.UNKNOWN.label}')
+                continue
+
+            w.live_data_misses = 0
+            transitioned = False
+
+            if status_history := workflow_live_data.status_history:
+                workflow_status_logs.extend(
+                    WorkflowStatusLog(workflow=w, status=status, created_at=created_at)
+                    for status, created_at in status_history
+                )
+                # The first entry of the latest status is the one kept, in case the status is repeated
+                status = max((status for status, _ in status_history), key=STATUS_PRECEDENCE.get)
+                if supersedes(status, w.current_status):
+                    w.current_status = status
+                    w.current_status_at = min(created_at for s, created_at in status_history if s == status)
+                    transitioned = True
+                    transitioned_workflows.append(w)
+
+            if workflow_live_data.events_cursor is not None:
+                w.events_cursor = workflow_live_data.events_cursor
+            # Executions are re-checked quickly after a status transition and less often while unchanged
+            w.next_check_at = get_next_check_at(now, now if transitioned else w.current_status_at)
+
+        # Statuses that are already logged are skipped by the unique (workflow, status) constraint
+        WorkflowStatusLog.objects.bulk_create(workflow_status_logs, ignore_conflicts=True)
+        WorkflowService._persist_final_logs(workflows, live_data_map)
+
+        # All workflows are updated with a single statement; the denormalized status is only moved forward, in case it
+        # has been updated concurrently since the workflows were read
+        transitions = [
+            (Q(pk=w.pk) & (
+                Q(current_status__isnull=True) | Q(current_status__in=get_preceding_statuses(w.current_status))
+            ), w)
+            for w in transitioned_workflows
+        ]
+        # Lost executions are marked as unknown only if their status has not been updated since they were read
+        for w, previous_status in lost_workflows:
+            w.current_status, w.current_status_at = TaskStatus.UNKNOWN, now
+            transitions.append((Q(pk=w.pk, current_status=previous_status), w))
+        Workflow.objects.filter(pk__in=[w.pk for w in workflows]).update(
+            current_status=Case(*[When(q, then=Value(w.current_status)) for q, w in transitions],
+                                default=F('current_status')),
+            current_status_at=Case(*[When(q, then=Value(w.current_status_at)) for q, w in transitions],
+                                   default=F('current_status_at')),
+            events_cursor=Case(*[When(pk=w.pk, then=Value(w.events_cursor)) for w in workflows]),
+            next_check_at=Case(*[When(pk=w.pk, then=Value(w.next_check_at)) for w in workflows]),
+            live_data_misses=Case(*[When(pk=w.pk, then=Value(w.live_data_misses)) for w in workflows])
+        )
+        return transitioned_workflows
 
-            for w in manager_workflows:
-                workflow_live_data = live_data_map[w.backend_ref]
+    @staticmethod
+    def _persist_final_logs(workflows: List[Workflow], live_data_map: Dict[str, LiveExecutionData]) -> None:
+        # The logs of terminated executions are stored with the executors, in their definition order, so that they
+        # remain available after the manager archives the executions
+        final_workflows = {
+            w.pk: live_data_map[w.backend_ref] for w in workflows
+            if w.backend_ref in live_data_map and live_data_map[w.backend_ref].is_final
+        }
+        if not final_workflows:
+            return
 
-                workflow_status_log_service = WorkflowStatusLogService(w)
-                workflow_status_log_service.update_live_data(workflow_live_data.status_history)
+        executors = defaultdict(list)
+        for executor in WorkflowExecutor.objects.filter(workflow__in=final_workflows.keys()).order_by('id'):
+            executors[executor.workflow_id].append(executor)
+
+        executor_output_logs = []
+        for workflow_pk, workflow_live_data in final_workflows.items():
+            for i, executor in enumerate(executors[workflow_pk]):
+                executor_output_logs.append(WorkflowExecutorOutputLog(
+                    executor=executor,
+                    stdout=workflow_live_data.stdout[i:i + 1],
+                    stderr=workflow_live_data.stderr[i:i + 1]
+                ))
+        WorkflowExecutorOutputLog.objects.bulk_create(executor_output_logs, update_conflicts=True,
+                                                      unique_fields=['executor'], update_fields=['stdout', 'stderr'])
 
     def get_workflows(self) -> QuerySet[Workflow]:
         return Workflow.objects.filter(user=self.user, context=self.context)
@@ -252,22 +347,57 @@ class WorkflowStatusLogService:
     @staticmethod
     def filter_workflows_by_status(queryset: QuerySet[Workflow], statuses: Iterable[TaskStatus]) -> QuerySet[
         Workflow]:
+        return queryset.filter(current_status__in=statuses)
+
+    @staticmethod
+    def refresh_current_status(queryset: QuerySet[Workflow]) -> int:
+        """Recompute the denormalized current status of the given workflows from their status logs
+
+        Args:
+            queryset (QuerySet[Workflow]): the workflows whose `current_status` and `current_status_at` should be
+                recomputed
 
+        Returns:
+            int: the number of updated workflows
+        """
         latest_statuses = WorkflowStatusLog.objects.filter(
             workflow=OuterRef('pk')
-        ).order_by('-status','-created_at')
+        ).annotate(precedence=get_status_precedence()).order_by('-precedence', '-created_at')
 
-        workflows_with_latest_status = queryset.annotate(
-            latest_status=Subquery(latest_statuses.values('status')[:1])
+        return queryset.update(
+            current_status=Subquery(latest_statuses.values('status')[:1]),
+            current_status_at=Subquery(latest_statuses.values('created_at')[:1])
         )
 
-        return workflows_with_latest_status.filter(latest_status__in=statuses)
-
     @transaction.atomic
     def update_live_data(self, live_status_history: List[Tuple[TaskStatus, datetime]]):
-        for sl in live_status_history:
-            self.log_status_update(sl[0], created_at=sl[1], avoid_duplicates=True)
+        if not live_status_history:
+            return
+
+        # Statuses that are already logged are skipped by the unique (workflow, status) constraint
+        WorkflowStatusLog.objects.bulk_create([
+            WorkflowStatusLog(workflow=self.workflow, status=status, created_at=created_at)
+            for status, created_at in live_status_history
+        ], ignore_conflicts=True)
+
+        # The first entry of the latest status is the one kept, in case the status is repeated
+        status = max((status for status, _ in live_status_history), key=STATUS_PRECEDENCE.get)
+        created_at = min(created_at for s, created_at in live_status_history if s == status)
+        self._update_current_status(WorkflowStatusLog(workflow=self.workflow, status=status, created_at=created_at))
+
+    def _update_current_status(self, workflow_status_log: WorkflowStatusLog) -> None:
+        # Each status is logged at most once per workflow and the latest status is the one of the highest precedence;
+        # only move the denormalized status forward
+        status, created_at = workflow_status_log.status, workflow_status_log.created_at
+        updated = Workflow.objects.filter(pk=self.workflow.pk).filter(
+            Q(current_status__isnull=True) | Q(current_status__in=get_preceding_statuses(status))
+        ).update(current_status=status, current_status_at=created_at)
+
+        if updated:
+            self.workflow.current_status = status
+            self.workflow.current_status_at = created_at
 
+    @transaction.atomic
     def log_status_update(self, status: TaskStatus, avoid_duplicates: bool = False, **optional) -> WorkflowStatusLog:
         if avoid_duplicates:
             try:
@@ -278,24 +408,36 @@ class WorkflowStatusLogService:
                         "status": status
                     }
                 )
-                return workflow_status_log
             except MultipleObjectsReturned:
-                return WorkflowStatusLog.objects.filter(workflow=self.workflow, status=status).order_by(
+                workflow_status_log = WorkflowStatusLog.objects.filter(workflow=self.workflow, status=status).order_by(
                     '-created_at').first()
         else:
-            return WorkflowStatusLog.objects.create(workflow=self.workflow, status=status, **optional)
+            workflow_status_log = WorkflowStatusLog.objects.create(workflow=self.workflow, status=status, **optional)
+
+        self._update_current_status(workflow_status_log)
+        return workflow_status_log
 
     def get_current_status(self) -> WorkflowStatusLog:
-        return WorkflowStatusLog.objects.filter(workflow=self.workflow).order_by('-status', '-created_at').first()
+        return WorkflowStatusLog.objects.filter(workflow=self.workflow).annotate(
+            precedence=get_status_precedence()
+        ).order_by('-precedence', '-created_at').first()
+
+    def _get_current_status_value(self) -> Optional[TaskStatus]:
+        # Workflows submitted before the current status was denormalized have none until `backfill_current_status` is
+        # run; their status log is consulted instead
+        if self.workflow.current_status is not None:
+            return self.workflow.current_status
+        current_status = self.get_current_status()
+        return current_status.status if current_status else None
 
     def is_workflow_pending(self) -> bool:
-        current_status = self.get_current_status()
-        return TaskStatus.SUBMITTED <= current_status.status <= TaskStatus.RUNNING
+        status = self._get_current_status_value()
+        return status is not None and TaskStatus.SUBMITTED <= status <= TaskStatus.RUNNING
 
     def is_workflow_dispatched(self) -> bool:
-        current_status = self.get_current_status()
-        return TaskStatus.QUEUED <= current_status.status <= TaskStatus.RUNNING
+        status = self._get_current_status_value()
+        return status is not None and TaskStatus.QUEUED <= status <= TaskStatus.RUNNING
 
     def does_workflow_await_dispatch(self):
-        current_status = self.get_current_status()
-        return TaskStatus.SUBMITTED <= current_status.status < TaskStatus.QUEUED
+        status = self._get_current_status_value()
+        return status is not None and TaskStatus.SUBMITTED <= status < TaskStatus.QUEUED
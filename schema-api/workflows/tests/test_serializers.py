@@ -0,0 +1,30 @@
+from django.test import SimpleTestCase
+
+from workflows.serializers import WorkflowSerializer
+
+
+class WorkflowSerializerTestCase(SimpleTestCase):
+
+    def _get_validated_data(self, **fields) -> dict:
+        serializer = WorkflowSerializer(data={
+            'name': 'workflow',
+            'executors': [{'image': 'ubuntu:latest', 'command': ['echo']}],
+            **fields
+        })
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data
+
+    def test_submitted_next_check_at_is_ignored(self):
+        # The watcher would not check a workflow scheduled in the future by its submitter
+        self.assertNotIn('next_check_at', WorkflowSerializer().fields)
+        self.assertNotIn('next_check_at', self._get_validated_data(next_check_at='2100-01-01T00:00:00Z'))
+
+    def test_submitted_events_cursor_is_ignored(self):
+        # The watcher would skip the live events of a workflow up to a cursor set by its submitter
+        self.assertNotIn('events_cursor', WorkflowSerializer().fields)
+        self.assertNotIn('events_cursor', self._get_validated_data(events_cursor=100))
+
+    def test_submitted_live_data_misses_are_ignored(self):
+        # A single missed check would mark a workflow submitted with misses near the maximum as unknown
+        self.assertNotIn('live_data_misses', WorkflowSerializer().fields)
+        self.assertNotIn('live_data_misses', self._get_validated_data(live_data_misses=100))